@@ -1,13 +1,59 @@
+import uuid
+
 from django.contrib import admin
+from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.contrib.auth.forms import AdminUserCreationForm
+from django.contrib.auth.forms import UserChangeForm as BaseUserChangeForm
+
+from utils.paginator import EstimatedCountPaginator
+
+from . import offboarding, roles
+from .models import Branch, Invitation, Tenant, TenantDeletion, User
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Changelist settings for tables too big to count: estimated totals, no
+    second COUNT(*) for the unfiltered total, and paging over the
+    primary key, which is time-ordered.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
+    ordering = ("-pk",)
+
+
+class RoleListFilter(admin.SimpleListFilter):
+    """
+    Filter by role without the ``SELECT DISTINCT role`` over the whole
+    table that a plain field filter runs: the choices are the built-in
+    roles plus the custom roles of the tenant being browsed, if any.
+    """
+
+    title = "role"
+    parameter_name = "role"
+
+    def lookups(self, request, model_admin):
+        try:
+            tenant_id = uuid.UUID(request.GET["tenant__id__exact"])
+        except (KeyError, ValueError):
+            tenant_id = getattr(request.user, "tenant_id", None)
+        return [(name, name) for name in sorted(roles.role_matrix(tenant_id))]
 
-from .models import Tenant, User
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(role=self.value())
+        return queryset
 
 
 @admin.register(Tenant)
-class TenantAdmin(admin.ModelAdmin):
-    list_display = ("name", "domain", "is_active")
+class TenantAdmin(LargeTableAdmin):
+    list_display = ("name", "domain", "currency", "is_active")
+    list_filter = ("is_active",)
+    search_fields = ("^name", "^domain")
     fieldsets = (
-        (None, {"fields": ("name", "domain", "owner", "is_active")}),
+        (None, {"fields": ("name", "domain", "currency", "is_active")}),
         (
             "Email Configuration",
             {
@@ -26,5 +72,100 @@ class TenantAdmin(admin.ModelAdmin):
         ),
     )
 
+    # Deleting a tenant deactivates it and leaves the rows to the
+    # purge_tenant task, instead of one cascade over everything it owns.
+    def get_deleted_objects(self, objs, request):
+        return [str(obj) for obj in objs], {"tenants": len(objs)}, set(), []
+
+    def delete_model(self, request, obj):
+        offboarding.start(obj, actor=request.user)
+
+    def delete_queryset(self, request, queryset):
+        for tenant in queryset:
+            offboarding.start(tenant, actor=request.user)
+
+
+@admin.register(TenantDeletion)
+class TenantDeletionAdmin(admin.ModelAdmin):
+    list_display = ("tenant_name", "status", "step", "created_at", "finished_at")
+    list_filter = ("status",)
+    readonly_fields = [field.name for field in TenantDeletion._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(Branch)
+class BranchAdmin(LargeTableAdmin):
+    list_display = ("name", "tenant", "is_active")
+    list_filter = ("is_active",)
+    list_select_related = ("tenant",)
+    search_fields = ("^name",)
+    autocomplete_fields = ("tenant",)
+
+
+class UserCreationForm(AdminUserCreationForm):
+    class Meta(AdminUserCreationForm.Meta):
+        model = User
+        fields = ("email",)
+        field_classes = {}
+
+
+class UserChangeForm(BaseUserChangeForm):
+    class Meta(BaseUserChangeForm.Meta):
+        model = User
+        field_classes = {}
+
+
+@admin.register(User)
+class UserAdmin(LargeTableAdmin, BaseUserAdmin):
+    form = UserChangeForm
+    add_form = UserCreationForm
+    list_display = ("email", "tenant", "branch", "role", "is_active", "is_staff")
+    list_filter = ("is_active", "is_staff", RoleListFilter)
+    list_select_related = ("tenant", "branch")
+    # Prefix and exact matches use accounts_user_email_upper_idx; a
+    # substring search would read every row.
+    search_fields = ("^email",)
+    search_help_text = "Email address, or the start of one."
+    autocomplete_fields = ("tenant", "branch")
+    fieldsets = (
+        (None, {"fields": ("email", "password")}),
+        ("Personal info", {"fields": ("first_name", "last_name")}),
+        ("Tenant", {"fields": ("tenant", "branch", "role")}),
+        (
+            "Permissions",
+            {
+                "fields": (
+                    "is_active",
+                    "is_deleted",
+                    "is_staff",
+                    "is_superuser",
+                    "groups",
+                    "user_permissions",
+                ),
+            },
+        ),
+        ("Important dates", {"fields": ("last_login", "date_joined")}),
+    )
+    add_fieldsets = (
+        (
+            None,
+            {
+                "classes": ("wide",),
+                "fields": ("email", "usable_password", "password1", "password2"),
+            },
+        ),
+    )
+
 
-admin.site.register(User)
+@admin.register(Invitation)
+class InvitationAdmin(LargeTableAdmin):
+    list_display = ("email", "tenant", "role", "is_accepted", "expires_at")
+    list_filter = ("is_accepted", RoleListFilter)
+    list_select_related = ("tenant",)
+    search_fields = ("^email",)
+    search_help_text = "Email address, or the start of one."
+    autocomplete_fields = ("tenant", "branch")
+    raw_id_fields = ("invited_by",)
+    readonly_fields = ("token",)
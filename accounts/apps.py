@@ -3,3 +3,12 @@ from django.apps import AppConfig
 
 class AccountsConfig(AppConfig):
     name = "accounts"
+
+    def ready(self):
+        from utils import warmup
+
+        from . import signals  # noqa: F401
+
+        # Cheap and useful to every process, celery workers included; the
+        # rest of the warm-up runs from wsgi.py / asgi.py.
+        warmup.models()
@@ -0,0 +1,148 @@
+import datetime
+import json
+import uuid
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from loguru import logger
+
+from utils.ids import uuid7
+from utils.redis_client import get_redis
+
+from .models import AuditEvent
+
+BUFFER_KEY = "audit:buffer"
+FLUSH_LOCK_KEY = "audit:flush-lock"
+
+# Delete the lock only while it still holds our token, so a flush that
+# outlived the lock's expiry can't release the next flusher's lock.
+RELEASE_LOCK = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+def record(action, target, actor=None, tenant_id=None, changes=None):
+    """
+    Queue an audit event for ``target``.
+
+    The event is timestamped now but only pushed to the Redis buffer once
+    the surrounding transaction commits, so rolled-back changes leave no
+    trail and the request never waits on an audit INSERT.
+    """
+    if actor is not None and not actor.is_authenticated:
+        actor = None
+    event = {
+        "id": str(uuid7()),
+        "created_at": timezone.now().isoformat(),
+        "tenant_id": tenant_id or getattr(target, "tenant_id", None),
+        "actor_id": actor.pk if actor else None,
+        "actor_email": actor.email if actor else "",
+        "action": action,
+        "target_type": target._meta.model_name,
+        "target_id": str(target.pk),
+        "changes": changes or {},
+    }
+    payload = json.dumps(event, cls=DjangoJSONEncoder)
+    transaction.on_commit(lambda: _push(payload))
+
+
+def _push(payload):
+    try:
+        get_redis().rpush(BUFFER_KEY, payload)
+    except Exception as e:
+        # Never drop an event: fall back to a direct insert.
+        logger.warning("Audit buffer unavailable, writing directly: {}", e)
+        AuditEvent.objects.bulk_create([_to_event(payload)])
+
+
+def _to_event(payload):
+    data = json.loads(payload)
+    data["created_at"] = parse_datetime(data["created_at"])
+    return AuditEvent(**data)
+
+
+def flush(batch_size=None):
+    """
+    Move up to ``batch_size`` buffered events into the audit table with a
+    single INSERT. Returns the number of events written.
+    """
+    batch_size = batch_size or settings.AUDIT_FLUSH_BATCH_SIZE
+    redis = get_redis()
+    # One flusher at a time, so batches are trimmed in the order read.
+    token = uuid.uuid4().hex
+    if not redis.set(FLUSH_LOCK_KEY, token, nx=True, ex=60):
+        return 0
+    try:
+        payloads = redis.lrange(BUFFER_KEY, 0, batch_size - 1)
+        if not payloads:
+            return 0
+        # Conflicts mean a previous flush inserted the batch but died before
+        # trimming it.
+        AuditEvent.objects.bulk_create(
+            [_to_event(payload) for payload in payloads], ignore_conflicts=True
+        )
+        redis.ltrim(BUFFER_KEY, len(payloads), -1)
+        return len(payloads)
+    finally:
+        redis.eval(RELEASE_LOCK, 1, FLUSH_LOCK_KEY, token)
+
+
+def _month_start(day, months=0):
+    month = day.month - 1 + months
+    return datetime.date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def _create_partition(cursor, table, partition, start, end):
+    # Events dated in a month without a partition land in the DEFAULT
+    # partition, and Postgres refuses to create a partition overlapping
+    # rows there. Move them out, create the partition, and put them back
+    # through the parent so they are routed into it.
+    default = f"{table}_default"
+    moved = f"{table}_moved"
+    cursor.execute(f"LOCK TABLE {table} IN SHARE ROW EXCLUSIVE MODE")
+    cursor.execute(f"CREATE TEMPORARY TABLE {moved} (LIKE {table})")
+    cursor.execute(
+        f"WITH rows AS (DELETE FROM {default} "
+        f"WHERE created_at >= %s AND created_at < %s RETURNING *) "
+        f"INSERT INTO {moved} SELECT * FROM rows",
+        [start, end],
+    )
+    cursor.execute(
+        f"CREATE TABLE {partition} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{start}') TO ('{end}')"
+    )
+    cursor.execute(f"INSERT INTO {table} SELECT * FROM {moved}")
+    if cursor.rowcount:
+        logger.info("Moved {} audit events into {}", cursor.rowcount, partition)
+    cursor.execute(f"DROP TABLE {moved}")
+
+
+def ensure_partitions(months_ahead=None):
+    """
+    Create the monthly partitions for the current month and the next
+    ``AUDIT_PARTITION_MONTHS_AHEAD`` months, moving any of their events
+    out of the DEFAULT partition. Only Postgres partitions the audit table;
+    elsewhere this is a no-op.
+    """
+    if connection.vendor != "postgresql":
+        return []
+    months_ahead = months_ahead or settings.AUDIT_PARTITION_MONTHS_AHEAD
+    table = AuditEvent._meta.db_table
+    today = timezone.localdate()
+    created = []
+    with connection.cursor() as cursor:
+        for months in range(months_ahead + 1):
+            start, end = _month_start(today, months), _month_start(today, months + 1)
+            partition = f"{table}_p{start:%Y%m}"
+            cursor.execute("SELECT to_regclass(%s)", [partition])
+            if cursor.fetchone()[0] is None:
+                with transaction.atomic():
+                    _create_partition(cursor, table, partition, start, end)
+            created.append(partition)
+    return created
@@ -1,16 +1,23 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.backends import ModelBackend
 
+from utils.profiling import timer
+
 
 class EmailBackend(ModelBackend):
     def authenticate(self, request, username=None, password=None, **kwargs):
         UserModel = get_user_model()
-        try:
-            user = UserModel.objects.get(email=username)
-            if user.check_password(password):
-                return user
-        except UserModel.DoesNotExist:
-            # Run the default password hasher once to reduce the timing
-            # difference between an existing and a non-existing user.
-            UserModel().set_password(password)
+        # simplejwt's login serializer passes the email as ``email``.
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        with timer("auth"):
+            try:
+                # The tenant comes along for the login rule's is_active check.
+                user = UserModel.objects.select_related("tenant").get(email=username)
+                if user.check_password(password):
+                    return user
+            except UserModel.DoesNotExist:
+                # Run the default password hasher once to reduce the timing
+                # difference between an existing and a non-existing user.
+                UserModel().set_password(password)
         return None
@@ -0,0 +1,85 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.http import quote_etag
+from loguru import logger
+
+from utils.redis_client import get_redis
+
+from .models import User
+from .roles import Perm, effective_permissions, role_matrix
+
+
+def _cache_key(tenant_id):
+    # One hash per tenant, so tenant-wide changes drop every entry at once.
+    return f"bootstrap:{tenant_id or 'none'}"
+
+
+def build(user_id):
+    """Build a terminal's startup payload from a single joined query."""
+    user = User.objects.select_related("tenant", "branch").get(pk=user_id)
+    tenant, branch = user.tenant, user.branch
+    # The payload is cached for BOOTSTRAP_CACHE_TTL, so read the roles past
+    # the per-process copy: a revoked permission must not live on for that
+    # TTL plus ROLE_LOCAL_CACHE_TTL.
+    perms = effective_permissions(user, role_matrix(user.tenant_id, local=False))
+    return {
+        "user": {
+            "id": user.id,
+            "email": user.email,
+            "first_name": user.first_name,
+            "last_name": user.last_name,
+            "role": user.role,
+        },
+        "tenant": tenant
+        and {
+            "id": tenant.id,
+            "name": tenant.name,
+            "domain": tenant.domain,
+            "currency": tenant.currency,
+            "is_active": tenant.is_active,
+        },
+        "branch": branch
+        and {"id": branch.id, "name": branch.name, "is_active": branch.is_active},
+        "permissions": [perm.name for perm in Perm if perm in perms],
+    }
+
+
+def cached_bootstrap(user):
+    key = _cache_key(user.tenant_id)
+    try:
+        cached = get_redis().hget(key, str(user.pk))
+    except Exception as e:
+        logger.warning("Bootstrap cache read failed: {}", e)
+        cached = None
+    if cached is not None:
+        return json.loads(cached)
+
+    data = build(user.pk)
+    try:
+        pipe = get_redis().pipeline()
+        pipe.hset(key, str(user.pk), json.dumps(data, cls=DjangoJSONEncoder))
+        pipe.expire(key, settings.BOOTSTRAP_CACHE_TTL)
+        pipe.execute()
+    except Exception as e:
+        logger.warning("Bootstrap cache write failed: {}", e)
+    return data
+
+
+def etag(data, media_type):
+    """A strong ETag for ``data`` rendered as ``media_type``."""
+    body = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True)
+    return quote_etag(hashlib.sha1(f"{media_type}\n{body}".encode()).hexdigest())
+
+
+def invalidate(tenant_id, user_id=None):
+    """Drop one user's payload, or the whole tenant's when ``user_id`` is None."""
+    try:
+        if user_id is None:
+            get_redis().delete(_cache_key(tenant_id))
+        else:
+            get_redis().hdel(_cache_key(tenant_id), str(user_id))
+    except Exception as e:
+        logger.warning("Bootstrap cache invalidation failed: {}", e)
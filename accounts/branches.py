@@ -0,0 +1,73 @@
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Q
+from loguru import logger
+
+from utils.redis_client import get_redis
+
+from .models import Branch
+from .roles import role_matrix
+
+
+def _cache_key(tenant_id):
+    return f"branches:{tenant_id}"
+
+
+def branch_summaries(tenant_id):
+    """
+    Return the tenant's branches annotated with ``user_count`` and
+    ``users_by_role``, counting active users, in a single query.
+    """
+    active = Q(user__is_active=True, user__is_deleted=False)
+    roles = list(role_matrix(tenant_id))
+    branches = (
+        Branch.objects.filter(tenant_id=tenant_id)
+        .annotate(
+            user_count=Count("user", filter=active),
+            **{
+                f"role_{i}": Count("user", filter=active & Q(user__role=role))
+                for i, role in enumerate(roles)
+            },
+        )
+        .order_by("name")
+    )
+    for branch in branches:
+        branch.users_by_role = {
+            role: getattr(branch, f"role_{i}")
+            for i, role in enumerate(roles)
+            if getattr(branch, f"role_{i}")
+        }
+    return branches
+
+
+def cached_branch_list(tenant_id, build):
+    """
+    Return the serialized branch listing for a tenant from Redis, calling
+    ``build()`` and storing the result on a miss.
+    """
+    key = _cache_key(tenant_id)
+    try:
+        cached = get_redis().get(key)
+    except Exception as e:
+        logger.warning("Branch cache read failed: {}", e)
+        cached = None
+    if cached is not None:
+        return json.loads(cached)
+
+    data = build()
+    try:
+        get_redis().set(
+            key, json.dumps(data, cls=DjangoJSONEncoder), ex=settings.BRANCH_CACHE_TTL
+        )
+    except Exception as e:
+        logger.warning("Branch cache write failed: {}", e)
+    return data
+
+
+def invalidate(tenant_id):
+    try:
+        get_redis().delete(_cache_key(tenant_id))
+    except Exception as e:
+        logger.warning("Branch cache invalidation failed: {}", e)
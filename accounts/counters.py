@@ -0,0 +1,209 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from utils.ids import uuid7
+
+from .models import Invitation, Tenant, TenantCounter, User
+
+USER_FIELDS = ("tenant_id", "role", "branch_id", "is_active", "is_deleted")
+INVITATION_FIELDS = ("tenant_id", "is_accepted", "expires_at")
+
+PENDING_PREFIX = "invitations:pending:"
+
+
+def _user_keys(values):
+    if not values["tenant_id"] or not values["is_active"] or values["is_deleted"]:
+        return []
+    return [
+        f"users:role:{values['role']}",
+        f"users:branch:{values['branch_id'] or 'none'}",
+    ]
+
+
+def _invitation_keys(values):
+    # Pending invitations are bucketed by expiry date, so "pending" and
+    # "expiring soon" are sums over a handful of rows.
+    if not values["tenant_id"] or values["is_accepted"]:
+        return []
+    return [f"{PENDING_PREFIX}{timezone.localdate(values['expires_at'])}"]
+
+
+_TRACKED = {
+    User: (USER_FIELDS, _user_keys),
+    Invitation: (INVITATION_FIELDS, _invitation_keys),
+}
+
+
+def _values(instance, fields):
+    return {name: getattr(instance, name) for name in fields}
+
+
+def apply(deltas):
+    """
+    Add ``{(tenant_id, key): delta}`` to the counters with one upsert.
+
+    Rows are written in key order so concurrent writers can't deadlock.
+    """
+    deltas = sorted((k, v) for k, v in deltas.items() if v)
+    if not deltas:
+        return
+    now = timezone.now()
+    table = connection.ops.quote_name(TenantCounter._meta.db_table)
+    id_field = TenantCounter._meta.get_field("id")
+    tenant_field = TenantCounter._meta.get_field("tenant")
+    params = []
+    for (tenant_id, key), delta in deltas:
+        params += [
+            id_field.get_db_prep_value(uuid7(), connection),
+            tenant_field.get_db_prep_value(tenant_id, connection),
+            key,
+            delta,
+            now,
+            now,
+        ]
+    rows = ", ".join(["(%s, %s, %s, %s, %s, %s)"] * len(deltas))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} (id, tenant_id, key, value, created_at, updated_at) "
+            f"VALUES {rows} ON CONFLICT (tenant_id, key) DO UPDATE SET "
+            f"value = {table}.value + EXCLUDED.value, updated_at = EXCLUDED.updated_at",
+            params,
+        )
+
+
+def capture(instance):
+    """
+    ``pre_save`` hook: make sure an update knows the row's previous state
+    when the instance wasn't loaded from the database.
+    """
+    fields, _ = _TRACKED[type(instance)]
+    loaded = getattr(instance, "_loaded_values", {})
+    if instance._state.adding or all(name in loaded for name in fields):
+        return
+    previous = type(instance).objects.filter(pk=instance.pk).values(*fields).first()
+    instance._loaded_values = {**loaded, **(previous or {})}
+
+
+def _touches(fields, update_fields):
+    if update_fields is None:
+        return True
+    names = set(fields) | {name.removesuffix("_id") for name in fields}
+    return bool(names & set(update_fields))
+
+
+def saved(instance, created, update_fields=None):
+    fields, keys = _TRACKED[type(instance)]
+    if not _touches(fields, update_fields):
+        return
+    new = _values(instance, fields)
+    deltas = Counter()
+    for key in keys(new):
+        deltas[(new["tenant_id"], key)] += 1
+    loaded = getattr(instance, "_loaded_values", {})
+    if not created and all(name in loaded for name in fields):
+        old = {name: loaded[name] for name in fields}
+        for key in keys(old):
+            deltas[(old["tenant_id"], key)] -= 1
+    apply(deltas)
+    instance._loaded_values = {**loaded, **new}
+
+
+def deleted(instance, origin=None):
+    # A tenant's counters go with the tenant; don't touch them mid-cascade.
+    # ``origin`` is the instance or queryset ``delete()`` was called on.
+    if isinstance(origin, Tenant) or getattr(origin, "model", None) is Tenant:
+        return
+    fields, keys = _TRACKED[type(instance)]
+    values = _values(instance, fields)
+    apply(Counter({(values["tenant_id"], key): -1 for key in keys(values)}))
+
+
+def summary(tenant_id):
+    """Build the dashboard summary from the tenant's counter rows."""
+    today = timezone.localdate()
+    soon = today + timedelta(days=settings.DASHBOARD_EXPIRING_DAYS)
+    result = {
+        "active_users": 0,
+        "users_by_role": {},
+        "users_by_branch": {},
+        "pending_invitations": 0,
+        "expiring_invitations": 0,
+    }
+    for key, value in TenantCounter.objects.filter(tenant_id=tenant_id).values_list(
+        "key", "value"
+    ):
+        if not value:
+            continue
+        if key.startswith("users:role:"):
+            result["users_by_role"][key.removeprefix("users:role:")] = value
+            result["active_users"] += value
+        elif key.startswith("users:branch:"):
+            result["users_by_branch"][key.removeprefix("users:branch:")] = value
+        elif key.startswith(PENDING_PREFIX):
+            expires = key.removeprefix(PENDING_PREFIX)
+            if expires >= today.isoformat():
+                result["pending_invitations"] += value
+                if expires <= soon.isoformat():
+                    result["expiring_invitations"] += value
+    return result
+
+
+def actual_counts(tenant_id):
+    """Recompute every counter for a tenant from the source tables."""
+    counts = Counter()
+    users = User.objects.filter(tenant_id=tenant_id, is_active=True, is_deleted=False)
+    for row in users.values("role").annotate(n=Count("id")):
+        counts[f"users:role:{row['role']}"] = row["n"]
+    for row in users.values("branch_id").annotate(n=Count("id")):
+        counts[f"users:branch:{row['branch_id'] or 'none'}"] = row["n"]
+    pending = (
+        Invitation.objects.filter(
+            tenant_id=tenant_id,
+            is_accepted=False,
+            expires_at__date__gte=timezone.localdate(),
+        )
+        .values(day=TruncDate("expires_at"))
+        .annotate(n=Count("id"))
+    )
+    for row in pending:
+        counts[f"{PENDING_PREFIX}{row['day']}"] = row["n"]
+    return counts
+
+
+def reconcile(tenant_id):
+    """
+    Repair drift for one tenant, e.g. from bulk updates that skip signals,
+    and drop buckets for invitations that have expired. Returns the number
+    of counters changed.
+    """
+    with transaction.atomic():
+        current = {
+            counter.key: counter
+            for counter in TenantCounter.objects.select_for_update().filter(
+                tenant_id=tenant_id
+            )
+        }
+        actual = actual_counts(tenant_id)
+        stale = [key for key in current if key not in actual]
+        TenantCounter.objects.filter(tenant_id=tenant_id, key__in=stale).delete()
+        changed = [
+            (key, value)
+            for key, value in actual.items()
+            if key not in current or current[key].value != value
+        ]
+        TenantCounter.objects.bulk_create(
+            [
+                TenantCounter(tenant_id=tenant_id, key=key, value=value)
+                for key, value in changed
+            ],
+            update_conflicts=True,
+            unique_fields=["tenant", "key"],
+            update_fields=["value", "updated_at"],
+        )
+    return len(stale) + len(changed)
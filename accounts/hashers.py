@@ -0,0 +1,78 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, make_password
+from django.db import connections, transaction
+from loguru import logger
+
+_executor = None
+_pending = set()
+_lock = threading.Lock()
+
+
+class TunablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 with the iteration count taken from
+    ``PASSWORD_HASH_ITERATIONS``; see the calibrate_hasher command.
+    Hashes with any other count are upgraded on the next login.
+    """
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASH_ITERATIONS or PBKDF2PasswordHasher.iterations
+
+
+def _rehash(user_id, encoded, raw_password):
+    from .models import User
+
+    try:
+        # Only replace the hash we verified; a password changed in the
+        # meantime wins.
+        User.objects.filter(pk=user_id, password=encoded).update(
+            password=make_password(raw_password)
+        )
+    except Exception as e:
+        logger.warning("Password rehash for user {} failed: {}", user_id, e)
+    finally:
+        with _lock:
+            _pending.discard(user_id)
+        # Pool threads outlive requests, so nothing else closes this
+        # thread's connection.
+        connections.close_all()
+
+
+def _submit(user_id, encoded, raw_password):
+    global _executor
+    with _lock:
+        if user_id in _pending:
+            return
+        _pending.add(user_id)
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                settings.PASSWORD_REHASH_WORKERS, thread_name_prefix="rehash"
+            )
+        _executor.submit(_rehash, user_id, encoded, raw_password)
+
+
+def schedule_rehash(user_id, encoded, raw_password):
+    """
+    Re-hash a password that verified against an outdated hash on a
+    background thread, once the current transaction commits.
+
+    The raw password never leaves the process, so this can't be a celery
+    task.
+    """
+    transaction.on_commit(lambda: _submit(user_id, encoded, raw_password))
+
+
+def _reset_executor():
+    # Executor threads don't survive fork(), e.g. gunicorn --preload.
+    global _executor, _lock
+    _executor, _lock = None, threading.Lock()
+    _pending.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_executor)
@@ -0,0 +1,19 @@
+from importlib import import_module
+
+from django.core.management.base import BaseCommand
+
+from benchmarks import BENCHMARKS
+
+
+class Command(BaseCommand):
+    help = "Run one of the benchmarks in the benchmarks package."
+
+    def add_arguments(self, parser):
+        subparsers = parser.add_subparsers(dest="benchmark", required=True)
+        for name in BENCHMARKS:
+            module = import_module(f"benchmarks.{name}")
+            subparser = subparsers.add_parser(name, help=module.help)
+            module.add_arguments(subparser)
+
+    def handle(self, *args, benchmark, **options):
+        import_module(f"benchmarks.{benchmark}").run(self.stdout, **options)
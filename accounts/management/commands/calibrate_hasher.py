@@ -0,0 +1,94 @@
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.hashers import TunablePBKDF2PasswordHasher
+
+# OWASP's current floor for PBKDF2-HMAC-SHA256.
+MIN_ITERATIONS = 600_000
+
+
+def _iterations_per_second(iterations):
+    start = time.perf_counter()
+    hashlib.pbkdf2_hmac("sha256", b"calibrate", os.urandom(16), iterations)
+    return iterations / (time.perf_counter() - start)
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure PBKDF2 speed per core and recommend PASSWORD_HASH_ITERATIONS "
+        "for a per-login hashing budget. Only TunablePBKDF2PasswordHasher "
+        "reads that setting."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--target-ms",
+            type=float,
+            default=250,
+            help="Time one password check may spend hashing, under full load.",
+        )
+        parser.add_argument("--cores", type=int, default=os.cpu_count())
+        parser.add_argument(
+            "--peak-logins",
+            type=float,
+            default=0,
+            help="Expected logins per second at peak, to check headroom.",
+        )
+        parser.add_argument("--probe-iterations", type=int, default=200_000)
+        parser.add_argument("--rounds", type=int, default=5)
+
+    def handle(
+        self, *args, target_ms, cores, peak_logins, probe_iterations, rounds, **options
+    ):
+        hasher = get_hasher()
+        if not isinstance(hasher, TunablePBKDF2PasswordHasher):
+            raise CommandError(
+                f"The default hasher is {hasher.algorithm} "
+                f"({type(hasher).__name__}); PASSWORD_HASH_ITERATIONS only "
+                "tunes TunablePBKDF2PasswordHasher."
+            )
+
+        idle = max(_iterations_per_second(probe_iterations) for _ in range(rounds))
+        # All cores busy at once is slower per core (shared caches, clocks).
+        with ProcessPoolExecutor(cores) as pool:
+            loaded = max(
+                sum(pool.map(_iterations_per_second, [probe_iterations] * cores))
+                / cores
+                for _ in range(rounds)
+            )
+        recommended = int(loaded * target_ms / 1000) // 10_000 * 10_000
+
+        start = time.perf_counter()
+        hasher.encode("calibrate", hasher.salt())
+        current_ms = (time.perf_counter() - start) * 1000
+
+        self.stdout.write(
+            f"PBKDF2-SHA256 iterations/s per core: {idle:,.0f} idle, "
+            f"{loaded:,.0f} with {cores} cores busy"
+        )
+        self.stdout.write(
+            f"Current hasher {hasher.algorithm}: {current_ms:.0f} ms per hash"
+        )
+        self.stdout.write(
+            f"Recommended for {target_ms:g} ms: PASSWORD_HASH_ITERATIONS={recommended}"
+        )
+        if recommended < MIN_ITERATIONS:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"That is below {MIN_ITERATIONS:,}; raise --target-ms or add "
+                    "cores rather than weakening hashes."
+                )
+            )
+        capacity = cores * loaded / max(recommended, 1)
+        self.stdout.write(f"Capacity: about {capacity:,.0f} logins/s on {cores} cores")
+        if peak_logins:
+            utilisation = peak_logins / capacity
+            message = f"Peak of {peak_logins:g} logins/s uses {utilisation:.0%} of it"
+            # Past ~70% busy, queueing dominates the tail latency.
+            style = self.style.WARNING if utilisation > 0.7 else self.style.SUCCESS
+            self.stdout.write(style(message))
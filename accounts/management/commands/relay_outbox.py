@@ -0,0 +1,43 @@
+import select
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from accounts.outbox import CHANNEL, relay
+
+
+class Command(BaseCommand):
+    help = "Continuously publish pending outbox messages to the Celery broker."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait for a notification before polling again.",
+        )
+
+    def handle(self, *args, interval, **options):
+        listening = connection.vendor == "postgresql"
+        if listening:
+            with connection.cursor() as cursor:
+                cursor.execute(f"LISTEN {CHANNEL}")
+
+        while True:
+            # Drain everything before waiting; a full batch means more is queued.
+            while relay():
+                pass
+            if listening:
+                # relay() may have closed a broken connection; a new one has
+                # to LISTEN again.
+                if connection.connection is None:
+                    connection.ensure_connection()
+                    with connection.cursor() as cursor:
+                        cursor.execute(f"LISTEN {CHANNEL}")
+                pg_connection = connection.connection
+                select.select([pg_connection], [], [], interval)
+                pg_connection.poll()
+                pg_connection.notifies.clear()
+            else:
+                time.sleep(interval)
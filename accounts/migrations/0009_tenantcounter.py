@@ -0,0 +1,44 @@
+# Generated by Django 5.2 on 2026-10-19 19:08
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0008_role"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TenantCounter",
+            fields=[
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("key", models.CharField(max_length=100)),
+                ("value", models.BigIntegerField(default=0)),
+                (
+                    "tenant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="counters",
+                        to="accounts.tenant",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("tenant", "key")},
+            },
+        ),
+    ]
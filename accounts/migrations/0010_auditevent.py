@@ -0,0 +1,92 @@
+# Generated by Django 5.2 on 2026-10-19 19:09
+
+import datetime
+import uuid
+
+import django.core.serializers.json
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def _month_start(day, months=0):
+    month = day.month - 1 + months
+    return datetime.date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def create_audit_table(apps, schema_editor):
+    model = apps.get_model("accounts", "AuditEvent")
+    if schema_editor.connection.vendor != "postgresql":
+        schema_editor.create_model(model)
+        return
+
+    table = model._meta.db_table
+    sql, params = schema_editor.table_sql(model)
+    schema_editor.execute(f"{sql} PARTITION BY RANGE (created_at)", params or None)
+    schema_editor.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+    today = datetime.date.today()
+    for months in range(3):
+        start, end = _month_start(today, months), _month_start(today, months + 1)
+        schema_editor.execute(
+            f"CREATE TABLE {table}_p{start:%Y%m} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{start}') TO ('{end}')"
+        )
+
+
+def drop_audit_table(apps, schema_editor):
+    schema_editor.delete_model(apps.get_model("accounts", "AuditEvent"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0009_tenantcounter"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name="AuditEvent",
+                    fields=[
+                        (
+                            "pk",
+                            models.CompositePrimaryKey(
+                                "id",
+                                "created_at",
+                                blank=True,
+                                editable=False,
+                                primary_key=True,
+                                serialize=False,
+                            ),
+                        ),
+                        ("id", models.UUIDField(default=uuid.uuid4, editable=False)),
+                        (
+                            "created_at",
+                            models.DateTimeField(default=django.utils.timezone.now),
+                        ),
+                        ("tenant_id", models.UUIDField(null=True)),
+                        ("actor_id", models.UUIDField(null=True)),
+                        ("actor_email", models.EmailField(blank=True, max_length=254)),
+                        ("action", models.CharField(max_length=50)),
+                        ("target_type", models.CharField(max_length=50)),
+                        ("target_id", models.CharField(max_length=64)),
+                        (
+                            "changes",
+                            models.JSONField(
+                                default=dict,
+                                encoder=django.core.serializers.json.DjangoJSONEncoder,
+                            ),
+                        ),
+                    ],
+                ),
+            ],
+        ),
+        migrations.RunPython(create_audit_table, drop_audit_table),
+        migrations.AddIndex(
+            model_name="auditevent",
+            index=models.Index(
+                fields=["tenant_id", "-created_at", "-id"],
+                name="accounts_audit_tenant_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-19 19:13
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Build the indexes without locking writes on large user tables.
+    atomic = False
+
+    dependencies = [
+        ("accounts", "0010_auditevent"),
+        ("auth", "0012_alter_user_first_name_max_length"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="branch",
+            index=models.Index(
+                fields=["tenant", "updated_at", "id"], name="accounts_branch_sync_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="user",
+            index=models.Index(
+                fields=["tenant", "updated_at", "id"], name="accounts_user_sync_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 5.2 on 2026-10-19 19:16
+
+import utils.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0011_sync_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="auditevent",
+            name="id",
+            field=models.UUIDField(default=utils.ids.uuid7, editable=False),
+        ),
+        migrations.AlterField(
+            model_name="branch",
+            name="id",
+            field=models.UUIDField(
+                default=utils.ids.uuid7,
+                editable=False,
+                primary_key=True,
+                serialize=False,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="invitation",
+            name="id",
+            field=models.UUIDField(
+                default=utils.ids.uuid7,
+                editable=False,
+                primary_key=True,
+                serialize=False,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="outboxmessage",
+            name="id",
+            field=models.UUIDField(
+                default=utils.ids.uuid7,
+                editable=False,
+                primary_key=True,
+                serialize=False,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="role",
+            name="id",
+            field=models.UUIDField(
+                default=utils.ids.uuid7,
+                editable=False,
+                primary_key=True,
+                serialize=False,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="tenant",
+            name="id",
+            field=models.UUIDField(
+                default=utils.ids.uuid7,
+                editable=False,
+                primary_key=True,
+                serialize=False,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="tenantcounter",
+            name="id",
+            field=models.UUIDField(
+                default=utils.ids.uuid7,
+                editable=False,
+                primary_key=True,
+                serialize=False,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="user",
+            name="id",
+            field=models.UUIDField(
+                default=utils.ids.uuid7,
+                editable=False,
+                primary_key=True,
+                serialize=False,
+            ),
+        ),
+    ]
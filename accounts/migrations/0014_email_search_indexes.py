@@ -0,0 +1,32 @@
+# Generated by Django 5.2 on 2026-10-19 19:41
+
+from django.contrib.postgres.indexes import OpClass
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+from django.db.models.functions import Upper
+
+
+class Migration(migrations.Migration):
+    # Build the indexes without locking writes on large user tables.
+    atomic = False
+
+    dependencies = [
+        ("accounts", "0013_tenantdeletion"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="invitation",
+            index=models.Index(
+                OpClass(Upper("email"), name="text_pattern_ops"),
+                name="accounts_invitation_email_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="user",
+            index=models.Index(
+                OpClass(Upper("email"), name="text_pattern_ops"),
+                name="accounts_user_email_upper_idx",
+            ),
+        ),
+    ]
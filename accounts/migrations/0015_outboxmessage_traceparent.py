@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-19 19:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0014_email_search_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="outboxmessage",
+            name="traceparent",
+            field=models.CharField(blank=True, max_length=55),
+        ),
+    ]
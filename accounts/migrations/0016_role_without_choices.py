@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-19 20:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0015_outboxmessage_traceparent"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="invitation",
+            name="role",
+            field=models.CharField(max_length=100),
+        ),
+        migrations.AlterField(
+            model_name="user",
+            name="role",
+            field=models.CharField(default="owner", max_length=100),
+        ),
+    ]
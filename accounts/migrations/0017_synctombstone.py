@@ -0,0 +1,41 @@
+# Generated by Django 5.2 on 2026-10-19 20:03
+
+import utils.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0016_role_without_choices"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SyncTombstone",
+            fields=[
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "id",
+                    models.UUIDField(
+                        default=utils.ids.uuid7,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("tenant_id", models.UUIDField()),
+                ("resource", models.CharField(max_length=20)),
+                ("object_id", models.UUIDField()),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["tenant_id", "updated_at", "id"],
+                        name="accounts_tombstone_sync_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-19 20:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0017_synctombstone"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="user",
+            name="password",
+            field=models.CharField(max_length=255),
+        ),
+    ]
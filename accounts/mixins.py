@@ -0,0 +1,92 @@
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from utils import cache
+
+
+class SparseFieldsMixin:
+    """
+    Support ``?fields=a,b`` on read endpoints.
+
+    The serializer only renders the requested fields, and the queryset only
+    selects the columns they read. Without the parameter every readable
+    field is returned, but write-only columns such as ``password`` are still
+    left out of the SELECT.
+    """
+
+    fields_param = "fields"
+
+    def selected_fields(self):
+        if not hasattr(self, "_selected_fields"):
+            readable = {
+                name: field
+                for name, field in self.get_serializer_class()().fields.items()
+                if not field.write_only
+            }
+            raw = self.request.query_params.get(self.fields_param)
+            if raw:
+                names = list(
+                    dict.fromkeys(filter(None, map(str.strip, raw.split(","))))
+                )
+                unknown = [name for name in names if name not in readable]
+                if unknown:
+                    raise ValidationError(
+                        {
+                            self.fields_param: [
+                                f'"{name}" is not a valid field.' for name in unknown
+                            ]
+                        }
+                    )
+                readable = {name: readable[name] for name in names}
+            self._selected_fields = readable
+        return self._selected_fields
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        columns = {field.name for field in queryset.model._meta.concrete_fields}
+        return queryset.only(
+            "pk",
+            *(
+                field.source
+                for field in self.selected_fields().values()
+                if field.source in columns
+            ),
+        )
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault("fields", list(self.selected_fields()))
+        return super().get_serializer(*args, **kwargs)
+
+
+class CachedListMixin:
+    """
+    Serve ``list()`` from the tenant cache in ``utils.cache``.
+
+    Entries vary by query string and are dropped when the namespace from
+    ``get_cache_namespace()`` is invalidated; see accounts.signals. A
+    stale entry may be rebuilt on a background thread after the request
+    has finished, so the listing is recomputed from the queryset and
+    serializer settled here, never from the request itself. Paginated
+    views bypass the cache.
+    """
+
+    cache_name = None
+
+    def get_cache_namespace(self):
+        """The namespace the listing belongs to, or None to skip the cache."""
+        return self.request.user.tenant_id
+
+    def list(self, request, *args, **kwargs):
+        namespace = self.get_cache_namespace()
+        if namespace is None or self.paginator is not None:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        # No request in the context: it may be over by the time this renders.
+        serializer = self.get_serializer(queryset, many=True, context={})
+        data = cache.get_or_set(
+            self.cache_name or type(self).__name__,
+            lambda: serializer.data,
+            namespace=namespace,
+            vary=sorted(request.query_params.lists()),
+        )
+        return Response(data)
@@ -1,10 +1,18 @@
 import uuid
 
+from django.contrib.auth.hashers import check_password
 from django.contrib.auth.models import AbstractUser, BaseUserManager
+from django.contrib.postgres.indexes import OpClass
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.db.models.functions import Upper
 from django.utils import timezone
 
-from utils.models.base import TimeStampedModel
+from utils.ids import uuid7
+from utils.models.base import LoadedValuesModel, TimeStampedModel
+
+from .hashers import schedule_rehash
+from .roles import validate_role
 
 
 class UserManager(BaseUserManager):
@@ -31,7 +39,7 @@ class UserManager(BaseUserManager):
 
 
 class Tenant(TimeStampedModel):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     name = models.CharField(max_length=100)
     domain = models.CharField(max_length=100, unique=True)
     currency = models.CharField(max_length=10)
@@ -63,45 +71,88 @@ class Tenant(TimeStampedModel):
 
 
 class Branch(TimeStampedModel):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     name = models.CharField(max_length=100)
     tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE)
     is_active = models.BooleanField(default=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["tenant", "updated_at", "id"],
+                name="accounts_branch_sync_idx",
+            ),
+        ]
+
 
-class User(AbstractUser, TimeStampedModel):
-    ROLE_CHOICES = (
-        ("owner", "Owner"),
-        ("admin", "Admin"),
-        ("staff", "Staff"),
-        ("sales", "Sales"),
-        ("purchase", "Purchase"),
-        ("accountant", "Accountant"),
-    )
+class Role(TimeStampedModel):
+    """
+    A tenant-specific role, such as cashier or supervisor. ``permissions``
+    is a bitmask of ``accounts.roles.Perm`` flags.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE, related_name="roles")
+    name = models.CharField(max_length=20)
+    permissions = models.BigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("tenant", "name")
 
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    def __str__(self):
+        return self.name
+
+
+class User(AbstractUser, TimeStampedModel, LoadedValuesModel):
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     tenant = models.ForeignKey(
         Tenant, on_delete=models.CASCADE, null=True, related_name="users"
     )
     branch = models.ForeignKey(Branch, on_delete=models.CASCADE, null=True)
     username = None
     email = models.EmailField("email address", unique=True)
-    password = models.CharField(max_length=100)
+    # Room for any hasher in PASSWORD_HASHERS: a scrypt hash alone is 128
+    # characters.
+    password = models.CharField(max_length=255)
     is_active = models.BooleanField(default=True)
     is_deleted = models.BooleanField(default=False, null=True)
-    role = models.CharField(choices=ROLE_CHOICES, max_length=100, default="owner")
+    # A built-in role or one of the tenant's custom roles, see clean().
+    role = models.CharField(max_length=100, default="owner")
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = []
 
     class Meta:
         unique_together = ("email", "tenant")
+        indexes = [
+            models.Index(
+                fields=["tenant", "updated_at", "id"],
+                name="accounts_user_sync_idx",
+            ),
+            # Case-insensitive exact and prefix search, as the admin does.
+            models.Index(
+                OpClass(Upper("email"), name="text_pattern_ops"),
+                name="accounts_user_email_upper_idx",
+            ),
+        ]
 
     objects = UserManager()
 
     def __str__(self):
         return self.email
 
+    def check_password(self, raw_password):
+        # Unlike AbstractBaseUser, don't re-hash and save an outdated hash on
+        # the request path; accounts.hashers does it in the background.
+        def setter(raw_password):
+            schedule_rehash(self.pk, self.password, raw_password)
+
+        return check_password(raw_password, self.password, setter)
+
+    def clean(self):
+        super().clean()
+        validate_role(self.role, self.tenant_id)
+
     def get_full_name(self):
         return f"{self.first_name} {self.last_name}"
 
@@ -109,16 +160,170 @@ class User(AbstractUser, TimeStampedModel):
         return self.first_name
 
 
-class Invitation(TimeStampedModel):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+class Invitation(TimeStampedModel, LoadedValuesModel):
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     email = models.EmailField()
+    # Sent in invitation links, so it stays fully random rather than
+    # time-ordered.
     token = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
     tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE)
-    role = models.CharField(max_length=20, choices=User.ROLE_CHOICES)
+    role = models.CharField(max_length=100)
     branch = models.ForeignKey(Branch, on_delete=models.CASCADE, null=True)
     invited_by = models.ForeignKey(User, on_delete=models.CASCADE)
     is_accepted = models.BooleanField(default=False)
     expires_at = models.DateTimeField()
 
+    class Meta:
+        indexes = [
+            models.Index(
+                OpClass(Upper("email"), name="text_pattern_ops"),
+                name="accounts_invitation_email_idx",
+            ),
+        ]
+
+    def clean(self):
+        super().clean()
+        validate_role(self.role, self.tenant_id)
+
     def is_expired(self):
         return timezone.now() > self.expires_at
+
+
+class TenantCounter(TimeStampedModel):
+    """
+    One dashboard counter for a tenant, kept current by accounts.counters
+    and repaired by the reconcile_tenant_counters task.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    tenant = models.ForeignKey(
+        Tenant, on_delete=models.CASCADE, related_name="counters"
+    )
+    key = models.CharField(max_length=100)
+    value = models.BigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("tenant", "key")
+
+    def __str__(self):
+        return f"{self.key}={self.value}"
+
+
+class TenantDeletion(TimeStampedModel):
+    """
+    Progress of a tenant being torn down by accounts.offboarding. The
+    tenant is a plain id so the record outlives it.
+    """
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    tenant_id = models.UUIDField(unique=True)
+    tenant_name = models.CharField(max_length=100)
+    requested_by_id = models.UUIDField(null=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    step = models.CharField(max_length=50, blank=True)
+    deleted = models.JSONField(default=dict)
+    last_error = models.TextField(blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.tenant_name} ({self.status})"
+
+
+class OutboxMessage(TimeStampedModel):
+    """
+    A Celery task publish recorded in the same transaction as the write
+    that caused it, and sent to the broker later by the outbox relay.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    task_name = models.CharField(max_length=255)
+    args = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+    kwargs = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    tenant = models.ForeignKey(
+        Tenant, on_delete=models.CASCADE, null=True, related_name="+"
+    )
+    interactive = models.BooleanField(default=False)
+    # The W3C trace context of the enqueuing request, sent as a header.
+    traceparent = models.CharField(max_length=55, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    available_at = models.DateTimeField(default=timezone.now)
+    dispatched_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["available_at"],
+                condition=models.Q(dispatched_at__isnull=True),
+                name="accounts_outbox_pending_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.task_name} ({self.id})"
+
+
+class SyncTombstone(TimeStampedModel):
+    """
+    A row that left a tenant's delta sync, by being hard-deleted or moved to
+    another tenant, so terminals holding it know to drop it. The tenant is a
+    plain id so the record outlives a move.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    tenant_id = models.UUIDField()
+    resource = models.CharField(max_length=20)
+    object_id = models.UUIDField()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["tenant_id", "updated_at", "id"],
+                name="accounts_tombstone_sync_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.resource}:{self.object_id}"
+
+
+class AuditEvent(models.Model):
+    """
+    An append-only record of a change to an account. On Postgres the table
+    is partitioned by month on ``created_at``, which is why it is part of
+    the primary key. Tenant and actor are plain ids so the trail outlives
+    them.
+    """
+
+    pk = models.CompositePrimaryKey("id", "created_at")
+    id = models.UUIDField(default=uuid7, editable=False)
+    created_at = models.DateTimeField(default=timezone.now)
+    tenant_id = models.UUIDField(null=True)
+    actor_id = models.UUIDField(null=True)
+    actor_email = models.EmailField(blank=True)
+    action = models.CharField(max_length=50)
+    target_type = models.CharField(max_length=50)
+    target_id = models.CharField(max_length=64)
+    changes = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["tenant_id", "-created_at", "-id"],
+                name="accounts_audit_tenant_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.action} {self.target_type}:{self.target_id}"
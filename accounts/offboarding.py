@@ -0,0 +1,166 @@
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from loguru import logger
+
+from utils import cache
+
+from . import audit, bootstrap, branches, outbox, roles
+from .models import (
+    Branch,
+    Invitation,
+    OutboxMessage,
+    Role,
+    SyncTombstone,
+    Tenant,
+    TenantCounter,
+    TenantDeletion,
+    User,
+)
+
+_purging = ContextVar("purging_tenant", default=None)
+
+# Children before parents, so no batch cascades into an unbounded set of
+# rows: users reference branches, invitations reference both.
+STEPS = (
+    ("invitations", Invitation),
+    ("users", User),
+    ("branches", Branch),
+    ("roles", Role),
+    ("outbox", OutboxMessage),
+    ("counters", TenantCounter),
+    ("tombstones", SyncTombstone),
+)
+
+
+def purging(tenant_id):
+    """Whether ``tenant_id``'s rows are being deleted by this context."""
+    return tenant_id is not None and _purging.get() == tenant_id
+
+
+def start(tenant, actor=None):
+    """
+    Deactivate ``tenant`` now and queue the deletion of its rows. Its users
+    are locked out through the tenant (see
+    accounts.authentication.user_authentication_rule), so this stays one
+    row update however many users it has. Calling it again for the same
+    tenant returns the existing record.
+    """
+    from .tasks import purge_tenant
+
+    with transaction.atomic():
+        deletion, created = TenantDeletion.objects.get_or_create(
+            tenant_id=tenant.pk,
+            defaults={
+                "tenant_name": tenant.name,
+                "requested_by_id": actor.pk if actor else None,
+            },
+        )
+        if not created:
+            return deletion
+        # A plain update: caches are dropped below, once committed.
+        Tenant.objects.filter(pk=tenant.pk).update(
+            is_active=False, updated_at=timezone.now()
+        )
+        audit.record(
+            "tenant.deletion_requested", tenant, actor=actor, tenant_id=tenant.pk
+        )
+        outbox.enqueue(purge_tenant, deletion.pk)
+        transaction.on_commit(lambda: _invalidate(tenant.pk))
+    return deletion
+
+
+def _invalidate(tenant_id):
+    cache.invalidate(cache.GLOBAL)
+    cache.invalidate(tenant_id)
+    bootstrap.invalidate(tenant_id)
+    branches.invalidate(tenant_id)
+    roles.invalidate(tenant_id)
+
+
+def _claim(deletion_id):
+    # A run that died leaves the record "running"; take it over once it
+    # has gone quiet for longer than a batch could take.
+    now = timezone.now()
+    stalled = now - settings.TENANT_PURGE_STALL_AFTER
+    claimed = (
+        TenantDeletion.objects.filter(pk=deletion_id)
+        .filter(
+            Q(status__in=[TenantDeletion.PENDING, TenantDeletion.FAILED])
+            | Q(status=TenantDeletion.RUNNING, updated_at__lt=stalled)
+        )
+        .update(status=TenantDeletion.RUNNING, updated_at=now)
+    )
+    return TenantDeletion.objects.get(pk=deletion_id) if claimed else None
+
+
+def run(deletion_id, batch_size=None, time_limit=None):
+    """
+    Delete the tenant's rows ``batch_size`` at a time, each batch in its own
+    transaction, recording progress as it goes. Stops once ``time_limit``
+    seconds have passed.
+
+    Returns True when the tenant is gone, False when there is more to do
+    and None when another run holds the record or it is already done.
+    Every step only looks at the rows still there, so an interrupted run
+    picks up where it stopped.
+    """
+    batch_size = batch_size or settings.TENANT_PURGE_BATCH_SIZE
+    time_limit = time_limit or settings.TENANT_PURGE_TIME_LIMIT
+    deletion = _claim(deletion_id)
+    if deletion is None:
+        return None
+    deadline = time.monotonic() + time_limit
+    tenant_id = deletion.tenant_id
+    token = _purging.set(tenant_id)
+    try:
+        for step, model in STEPS:
+            deletion.step = step
+            rows = model.objects.filter(tenant_id=tenant_id)
+            while ids := list(rows.values_list("pk", flat=True)[:batch_size]):
+                if time.monotonic() > deadline:
+                    deletion.status = TenantDeletion.PENDING
+                    deletion.save(update_fields=["status", "step", "updated_at"])
+                    return False
+                with transaction.atomic():
+                    _, per_model = model.objects.filter(pk__in=ids).delete()
+                for label, count in per_model.items():
+                    deletion.deleted[label] = deletion.deleted.get(label, 0) + count
+                deletion.save(update_fields=["step", "deleted", "updated_at"])
+        with transaction.atomic():
+            Tenant.objects.filter(pk=tenant_id).delete()
+            deletion.status = TenantDeletion.DONE
+            deletion.step = ""
+            deletion.last_error = ""
+            deletion.finished_at = timezone.now()
+            deletion.save()
+            audit.record(
+                "tenant.deleted",
+                deletion,
+                tenant_id=tenant_id,
+                changes={"deleted": deletion.deleted},
+            )
+        logger.info("Tenant {} deleted: {}", tenant_id, deletion.deleted)
+        return True
+    except Exception as e:
+        deletion.status = TenantDeletion.FAILED
+        deletion.last_error = str(e)
+        deletion.save(update_fields=["status", "step", "last_error", "updated_at"])
+        raise
+    finally:
+        _purging.reset(token)
+        _invalidate(tenant_id)
+
+
+def stalled():
+    """Ids of deletions that stopped without finishing."""
+    cutoff = timezone.now() - settings.TENANT_PURGE_STALL_AFTER
+    return list(
+        TenantDeletion.objects.exclude(status=TenantDeletion.DONE)
+        .filter(updated_at__lt=cutoff)
+        .values_list("pk", flat=True)
+    )
@@ -0,0 +1,10 @@
+from rest_framework.pagination import CursorPagination
+
+
+class AuditCursorPagination(CursorPagination):
+    """Keyset pagination over the audit index, newest first."""
+
+    ordering = ("-created_at", "-id")
+    page_size = 50
+    max_page_size = 500
+    page_size_query_param = "page_size"
@@ -0,0 +1,20 @@
+from rest_framework import permissions
+
+from .roles import NO_PERMS, has_perms
+
+
+class RolePermission(permissions.BasePermission):
+    """
+    Check ``view.required_permissions`` against the user's role.
+
+    ``required_permissions`` is a ``Perm`` or a ``{method: Perm}`` dict;
+    methods missing from the dict need no permissions.
+    """
+
+    message = "You don't have permission to perform this action."
+
+    def has_permission(self, request, view):
+        required = getattr(view, "required_permissions", NO_PERMS)
+        if isinstance(required, dict):
+            required = required.get(request.method, NO_PERMS)
+        return has_perms(request.user, required)
@@ -0,0 +1,137 @@
+import enum
+import json
+import time
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from loguru import logger
+
+from utils.redis_client import get_redis
+
+
+class Perm(enum.IntFlag):
+    MANAGE_TENANT = enum.auto()
+    MANAGE_ROLES = enum.auto()
+    MANAGE_BRANCHES = enum.auto()
+    MANAGE_USERS = enum.auto()
+    INVITE_USERS = enum.auto()
+    VIEW_DASHBOARD = enum.auto()
+    VIEW_AUDIT = enum.auto()
+    VIEW_REPORTS = enum.auto()
+    SELL = enum.auto()
+    PURCHASE = enum.auto()
+
+
+NO_PERMS = Perm(0)
+ALL_PERMS = Perm(sum(Perm))
+
+BUILTIN_ROLES = {
+    "owner": ALL_PERMS,
+    "admin": ALL_PERMS & ~(Perm.MANAGE_TENANT | Perm.MANAGE_ROLES),
+    "staff": Perm.SELL,
+    "sales": Perm.SELL,
+    "purchase": Perm.PURCHASE,
+    "accountant": Perm.VIEW_REPORTS | Perm.VIEW_DASHBOARD,
+}
+
+# tenant id -> (expiry, {role name: Perm})
+_local = {}
+
+
+def _redis_key(tenant_id):
+    return f"roles:{tenant_id}"
+
+
+def _load(tenant_id):
+    from .models import Role
+
+    try:
+        cached = get_redis().get(_redis_key(tenant_id))
+    except Exception as e:
+        logger.warning("Role cache read failed: {}", e)
+        cached = None
+    if cached is not None:
+        return json.loads(cached)
+
+    custom = dict(
+        Role.objects.filter(tenant_id=tenant_id).values_list("name", "permissions")
+    )
+    try:
+        get_redis().set(
+            _redis_key(tenant_id), json.dumps(custom), ex=settings.ROLE_CACHE_TTL
+        )
+    except Exception as e:
+        logger.warning("Role cache write failed: {}", e)
+    return custom
+
+
+def role_matrix(tenant_id, local=True):
+    """
+    Return ``{role name: Perm}`` for a tenant: the built-in roles plus the
+    tenant's custom roles.
+
+    Compiled matrices are kept in process for ``ROLE_LOCAL_CACHE_TTL``
+    seconds and in Redis until a role changes, so a permission check
+    normally costs a dict lookup. ``local=False`` skips the in-process copy
+    for results that are themselves cached, so they don't stack the TTLs.
+    """
+    if tenant_id is None:
+        return BUILTIN_ROLES
+    entry = _local.get(tenant_id)
+    now = time.monotonic()
+    if local and entry is not None and entry[0] > now:
+        return entry[1]
+
+    matrix = {name: Perm(mask) for name, mask in _load(tenant_id).items()}
+    matrix.update(BUILTIN_ROLES)
+    _local[tenant_id] = (now + settings.ROLE_LOCAL_CACHE_TTL, matrix)
+    return matrix
+
+
+def validate_role(role, tenant_id):
+    """Raise ValidationError unless ``role`` is one of the tenant's roles."""
+    if role not in role_matrix(tenant_id):
+        raise ValidationError({"role": f'"{role}" is not a valid role.'})
+
+
+def invalidate(tenant_id):
+    """Drop a tenant's compiled roles; other processes catch up within the TTL."""
+    _local.pop(tenant_id, None)
+    try:
+        get_redis().delete(_redis_key(tenant_id))
+    except Exception as e:
+        logger.warning("Role cache invalidation failed: {}", e)
+
+
+def effective_permissions(user, matrix=None):
+    """
+    ``user``'s permissions, from ``matrix`` when the caller already holds
+    the tenant's role matrix, else from ``role_matrix()``.
+    """
+    if not user.is_authenticated:
+        return NO_PERMS
+    if user.is_superuser:
+        return ALL_PERMS
+    if matrix is not None:
+        return matrix.get(user.role, NO_PERMS)
+    perms = getattr(user, "_effective_permissions", None)
+    if perms is None:
+        perms = role_matrix(user.tenant_id).get(user.role, NO_PERMS)
+        user._effective_permissions = perms
+    return perms
+
+
+def has_perms(user, required):
+    return required & ~effective_permissions(user) == NO_PERMS
+
+
+def can_grant(user, role):
+    """
+    Whether ``user`` may give ``role`` to someone else: any role with
+    MANAGE_ROLES, otherwise only roles strictly weaker than their own.
+    """
+    perms = effective_permissions(user)
+    if Perm.MANAGE_ROLES in perms:
+        return True
+    target = role_matrix(user.tenant_id).get(role)
+    return target is not None and target != perms and target & ~perms == NO_PERMS
@@ -2,12 +2,61 @@ from django.contrib.auth import get_user_model
 from rest_framework import serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
-from .models import Branch, Invitation, Tenant
+from .models import AuditEvent, Branch, Invitation, Role, Tenant
+from .roles import BUILTIN_ROLES, NO_PERMS, Perm, role_matrix
 
 User = get_user_model()
 
 
-class UserSerializer(serializers.ModelSerializer):
+class RoleFieldMixin:
+    """Validate ``role`` against the requesting user's tenant roles."""
+
+    def validate_role(self, value):
+        request = self.context.get("request")
+        tenant_id = (
+            request.user.tenant_id
+            if request and request.user.is_authenticated
+            else None
+        )
+        if value not in role_matrix(tenant_id):
+            raise serializers.ValidationError(f'"{value}" is not a valid role.')
+        return value
+
+
+class SparseFieldsSerializerMixin:
+    """Only render the ``fields`` passed to the constructor, if given."""
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class PermissionsField(serializers.Field):
+    """A ``Perm`` bitmask exposed as a list of permission names."""
+
+    def to_representation(self, value):
+        return [perm.name for perm in Perm if perm in Perm(value)]
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list):
+            raise serializers.ValidationError("Expected a list of permission names.")
+        perms = NO_PERMS
+        for name in data:
+            if name not in Perm.__members__:
+                raise serializers.ValidationError(
+                    f'"{name}" is not a valid permission.'
+                )
+            perms |= Perm[name]
+        return int(perms)
+
+
+class UserSerializer(
+    SparseFieldsSerializerMixin, RoleFieldMixin, serializers.ModelSerializer
+):
+    role = serializers.CharField(max_length=100, required=False)
+
     class Meta:
         model = User
         fields = (
@@ -63,10 +112,44 @@ class BranchSerializer(serializers.ModelSerializer):
     class Meta:
         model = Branch
         fields = ["id", "name", "tenant", "is_active"]
-        read_only_fields = ["is_active"]
+        read_only_fields = ["tenant", "is_active"]
+
 
+class BranchSummarySerializer(BranchSerializer):
+    """A branch with the counts annotated by ``branches.branch_summaries``."""
+
+    user_count = serializers.IntegerField(read_only=True)
+    users_by_role = serializers.DictField(
+        child=serializers.IntegerField(), read_only=True
+    )
+
+    class Meta(BranchSerializer.Meta):
+        fields = BranchSerializer.Meta.fields + ["user_count", "users_by_role"]
+
+
+class RoleSerializer(serializers.ModelSerializer):
+    permissions = PermissionsField()
+
+    class Meta:
+        model = Role
+        fields = ["id", "name", "permissions"]
+
+    def validate_name(self, value):
+        if value in BUILTIN_ROLES:
+            raise serializers.ValidationError("Built-in roles cannot be redefined.")
+        roles = Role.objects.filter(
+            tenant=self.context["request"].user.tenant, name=value
+        )
+        if self.instance is not None:
+            roles = roles.exclude(pk=self.instance.pk)
+        if roles.exists():
+            raise serializers.ValidationError("A role with this name already exists.")
+        return value
+
+
+class InvitationSerializer(RoleFieldMixin, serializers.ModelSerializer):
+    role = serializers.CharField(max_length=20)
 
-class InvitationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Invitation
         fields = ["email", "role", "branch"]
@@ -82,3 +165,18 @@ class AcceptInvitationSerializer(serializers.Serializer):
     password = serializers.CharField(write_only=True, required=True)
     first_name = serializers.CharField(required=True)
     last_name = serializers.CharField(required=True)
+
+
+class AuditEventSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AuditEvent
+        fields = [
+            "id",
+            "created_at",
+            "actor_id",
+            "actor_email",
+            "action",
+            "target_type",
+            "target_id",
+            "changes",
+        ]
@@ -0,0 +1,140 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from utils import cache
+
+from . import bootstrap, branches, counters, offboarding, roles, sync
+from .models import Branch, Invitation, Role, Tenant, User
+
+# User fields that show up in the branch listing counts.
+BRANCH_LISTING_FIELDS = {"tenant", "branch", "role", "is_active", "is_deleted"}
+# User fields that show up in, or filter, the cached user listing.
+USER_LISTING_FIELDS = {
+    "email",
+    "first_name",
+    "last_name",
+    "role",
+    "tenant",
+    "is_deleted",
+}
+# User fields that show up in the terminal bootstrap payload.
+BOOTSTRAP_FIELDS = {
+    "email",
+    "first_name",
+    "last_name",
+    "role",
+    "tenant",
+    "branch",
+    "is_superuser",
+}
+
+
+def _purging(instance):
+    # Rows of a tenant being torn down go in batches; its caches are dropped
+    # once per batch and its counters with the tenant, not once per row.
+    return offboarding.purging(instance.tenant_id)
+
+
+@receiver(post_save, sender=Role)
+@receiver(post_delete, sender=Role)
+def invalidate_roles(sender, instance, **kwargs):
+    if _purging(instance):
+        return
+    transaction.on_commit(lambda: roles.invalidate(instance.tenant_id))
+    transaction.on_commit(lambda: bootstrap.invalidate(instance.tenant_id))
+
+
+@receiver(post_save, sender=Branch)
+@receiver(post_delete, sender=Branch)
+def invalidate_branches(sender, instance, **kwargs):
+    if _purging(instance):
+        return
+    transaction.on_commit(lambda: branches.invalidate(instance.tenant_id))
+    transaction.on_commit(lambda: bootstrap.invalidate(instance.tenant_id))
+
+
+@receiver(post_save, sender=Tenant)
+def invalidate_bootstrap_for_tenant(sender, instance, **kwargs):
+    transaction.on_commit(lambda: bootstrap.invalidate(instance.pk))
+
+
+@receiver(post_save, sender=Tenant)
+@receiver(post_delete, sender=Tenant)
+def invalidate_tenant_cache(sender, instance, **kwargs):
+    transaction.on_commit(lambda: cache.invalidate(cache.GLOBAL))
+    transaction.on_commit(lambda: cache.invalidate(instance.pk))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_listing(sender, instance, update_fields=None, **kwargs):
+    if _purging(instance):
+        return
+    if update_fields is not None and not USER_LISTING_FIELDS & set(update_fields):
+        return
+    tenant_ids = {
+        instance.tenant_id,
+        getattr(instance, "_loaded_values", {}).get("tenant_id"),
+    }
+    for tenant_id in tenant_ids - {None}:
+        transaction.on_commit(lambda tenant_id=tenant_id: cache.invalidate(tenant_id))
+
+
+# Connected before update_counters, which moves _loaded_values on to the
+# saved state; until then it still holds the tenant the user came from.
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_caches(sender, instance, update_fields=None, **kwargs):
+    if _purging(instance):
+        return
+    fields = set(update_fields) if update_fields is not None else None
+    tenant_ids = {
+        instance.tenant_id,
+        getattr(instance, "_loaded_values", {}).get("tenant_id"),
+    }
+    for tenant_id in tenant_ids:
+        if tenant_id and (fields is None or BRANCH_LISTING_FIELDS & fields):
+            transaction.on_commit(
+                lambda tenant_id=tenant_id: branches.invalidate(tenant_id)
+            )
+        if fields is None or BOOTSTRAP_FIELDS & fields:
+            transaction.on_commit(
+                lambda tenant_id=tenant_id: bootstrap.invalidate(tenant_id, instance.pk)
+            )
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Branch)
+def record_sync_deletion(sender, instance, **kwargs):
+    if _purging(instance):
+        return
+    sync.tombstone(instance, instance.tenant_id)
+
+
+# Also needs the tenant the user came from, so it runs before update_counters.
+@receiver(post_save, sender=User)
+def record_sync_move(sender, instance, created, **kwargs):
+    previous = getattr(instance, "_loaded_values", {}).get("tenant_id")
+    if not created and previous and previous != instance.tenant_id:
+        sync.tombstone(instance, previous)
+
+
+@receiver(pre_save, sender=User)
+@receiver(pre_save, sender=Invitation)
+def capture_counted_fields(sender, instance, **kwargs):
+    counters.capture(instance)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Invitation)
+def update_counters(sender, instance, created, update_fields=None, **kwargs):
+    counters.saved(instance, created, update_fields)
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Invitation)
+def update_counters_on_delete(sender, instance, origin=None, **kwargs):
+    if _purging(instance):
+        return
+    counters.deleted(instance, origin)
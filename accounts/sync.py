@@ -0,0 +1,167 @@
+import base64
+import binascii
+import json
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Branch, SyncTombstone, User
+
+USER_FIELDS = (
+    "id",
+    "email",
+    "first_name",
+    "last_name",
+    "role",
+    "branch_id",
+    "is_active",
+    "is_deleted",
+    "updated_at",
+)
+BRANCH_FIELDS = ("id", "name", "is_active", "updated_at")
+TOMBSTONE_FIELDS = ("id", "resource", "object_id", "updated_at")
+RESOURCES = {User: "users", Branch: "branches"}
+
+
+class InvalidWatermark(ValueError):
+    pass
+
+
+def decode_watermark(token):
+    """Turn a watermark token into ``{resource: (updated_at, id)}``."""
+    if not token:
+        return {}
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(token.encode()))
+        if not isinstance(raw, dict):
+            raise ValueError(raw)
+        positions = {}
+        for resource, (updated_at, pk) in raw.items():
+            updated_at = parse_datetime(updated_at)
+            if updated_at is None or timezone.is_naive(updated_at):
+                raise ValueError(updated_at)
+            positions[resource] = (updated_at, uuid.UUID(pk))
+    except (binascii.Error, AttributeError, ValueError, TypeError) as e:
+        raise InvalidWatermark("Invalid watermark.") from e
+    return positions
+
+
+def encode_watermark(positions):
+    raw = {
+        resource: [updated_at.isoformat(), str(pk)]
+        for resource, (updated_at, pk) in positions.items()
+    }
+    return base64.urlsafe_b64encode(json.dumps(raw).encode()).decode()
+
+
+def _changes(queryset, fields, position, horizon, limit):
+    """
+    Rows changed after ``position`` in ``(updated_at, id)`` order, served by
+    the ``(tenant, updated_at, id)`` index. Rows newer than ``horizon`` are
+    left for the next call so a slow transaction that commits an older
+    ``updated_at`` after a newer one is never skipped.
+    """
+    queryset = queryset.filter(updated_at__lt=horizon)
+    if position is not None:
+        updated_at, pk = position
+        queryset = queryset.filter(
+            Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, id__gt=pk)
+        )
+    rows = list(queryset.order_by("updated_at", "id").values(*fields)[: limit + 1])
+    return rows[:limit], len(rows) > limit
+
+
+def tombstone(instance, tenant_id):
+    """Record that ``instance`` left ``tenant_id``'s sync."""
+    if tenant_id is not None:
+        SyncTombstone.objects.create(
+            tenant_id=tenant_id,
+            resource=RESOURCES[type(instance)],
+            object_id=instance.pk,
+        )
+
+
+def purge(older_than=None):
+    """Delete tombstones older than ``SYNC_TOMBSTONE_RETENTION``."""
+    cutoff = timezone.now() - (older_than or settings.SYNC_TOMBSTONE_RETENTION)
+    deleted, _ = SyncTombstone.objects.filter(updated_at__lt=cutoff).delete()
+    return deleted
+
+
+def _tombstones(tenant_id, position, horizon, limit):
+    if position is None:
+        # A first sync holds nothing to drop.
+        return [], False
+    if position[0] < timezone.now() - settings.SYNC_TOMBSTONE_RETENTION:
+        raise InvalidWatermark("Watermark expired, sync again without since.")
+    # A user that moved away and back is sent as a change instead.
+    queryset = SyncTombstone.objects.filter(tenant_id=tenant_id).exclude(
+        resource="users",
+        object_id__in=User.objects.filter(tenant_id=tenant_id).values("id"),
+    )
+    return _changes(queryset, TOMBSTONE_FIELDS, position, horizon, limit)
+
+
+def _user_row(row):
+    if row["is_deleted"]:
+        return {"id": row["id"], "deleted": True}
+    return {key: value for key, value in row.items() if key != "is_deleted"}
+
+
+def delta(tenant_id, token, limit=None):
+    """
+    Return users and branches changed since ``token`` along with the next
+    watermark. Soft-deleted users, and users and branches that were
+    hard-deleted or moved to another tenant, come back as ``{"id": ...,
+    "deleted": true}`` tombstones. Call again with the new watermark while
+    ``has_more`` is true.
+
+    Tombstones are kept for ``SYNC_TOMBSTONE_RETENTION``; a watermark that
+    has not been used for longer is rejected and the terminal must sync
+    again from scratch.
+    """
+    limit = min(limit or settings.SYNC_PAGE_SIZE, settings.SYNC_MAX_PAGE_SIZE)
+    positions = decode_watermark(token)
+    horizon = timezone.now() - timedelta(seconds=settings.SYNC_SAFETY_LAG)
+
+    users, more_users = _changes(
+        User.objects.filter(tenant_id=tenant_id),
+        USER_FIELDS,
+        positions.get("users"),
+        horizon,
+        limit,
+    )
+    branches, more_branches = _changes(
+        Branch.objects.filter(tenant_id=tenant_id),
+        BRANCH_FIELDS,
+        positions.get("branches"),
+        horizon,
+        limit,
+    )
+    tombstones, more_tombstones = _tombstones(
+        tenant_id, positions.get("tombstones"), horizon, limit
+    )
+    if users:
+        positions["users"] = (users[-1]["updated_at"], users[-1]["id"])
+    if branches:
+        positions["branches"] = (branches[-1]["updated_at"], branches[-1]["id"])
+    if more_tombstones:
+        positions["tombstones"] = (tombstones[-1]["updated_at"], tombstones[-1]["id"])
+    else:
+        # Everything before the horizon has been seen, which also keeps the
+        # position of a quiet tenant from expiring.
+        positions["tombstones"] = (horizon, uuid.UUID(int=0))
+
+    gone = {"users": [], "branches": []}
+    for row in tombstones:
+        gone[row["resource"]].append({"id": row["object_id"], "deleted": True})
+    return {
+        "users": [_user_row(row) for row in users] + gone["users"],
+        "branches": branches + gone["branches"],
+        "watermark": encode_watermark(positions),
+        "has_more": more_users or more_branches or more_tombstones,
+    }
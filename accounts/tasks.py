@@ -6,7 +6,9 @@ from django.utils import timezone
 
 from utils.email import send_tenant_email
 
-from .models import Invitation
+from . import audit, counters, offboarding, sync
+from .models import Invitation, Tenant
+from .outbox import purge, relay
 
 
 @shared_task
@@ -24,3 +26,58 @@ def send_invitation_email(invitation_id):
             "expiry_date": (timezone.now() + timedelta(days=7)).strftime("%B %d, %Y"),
         },
     )
+
+
+@shared_task
+def relay_outbox():
+    total = 0
+    while sent := relay():
+        total += sent
+    return total
+
+
+@shared_task
+def purge_outbox():
+    return purge()
+
+
+@shared_task
+def purge_sync_tombstones():
+    return sync.purge()
+
+
+@shared_task
+def reconcile_tenant_counters(tenant_id=None):
+    if tenant_id is not None:
+        return counters.reconcile(tenant_id)
+    return sum(
+        counters.reconcile(pk) for pk in Tenant.objects.values_list("pk", flat=True)
+    )
+
+
+@shared_task
+def flush_audit_events():
+    total = 0
+    while written := audit.flush():
+        total += written
+    return total
+
+
+@shared_task
+def maintain_audit_partitions():
+    return audit.ensure_partitions()
+
+
+@shared_task
+def purge_tenant(deletion_id):
+    # Hand the worker back between slices; the next one resumes the purge.
+    if offboarding.run(deletion_id) is False:
+        purge_tenant.delay(deletion_id)
+
+
+@shared_task
+def purge_stalled_tenants():
+    stalled = offboarding.stalled()
+    for deletion_id in stalled:
+        purge_tenant.delay(deletion_id)
+    return len(stalled)
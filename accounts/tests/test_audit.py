@@ -0,0 +1,35 @@
+from datetime import datetime, time
+
+from django.db import connection
+from django.utils import timezone
+
+from accounts import audit
+from accounts.models import AuditEvent
+
+
+def _partition_of(event):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT tableoid::regclass::text FROM {AuditEvent._meta.db_table} "
+            "WHERE id = %s",
+            [event.id],
+        )
+        return cursor.fetchone()[0]
+
+
+def test_ensure_partitions_moves_events_out_of_the_default_partition(db):
+    # Past the partitions the migration and the daily task have created.
+    month = audit._month_start(timezone.localdate(), 6)
+    event = AuditEvent.objects.create(
+        created_at=timezone.make_aware(datetime.combine(month, time(12))),
+        action="user.created",
+        target_type="user",
+        target_id="1",
+    )
+    table = AuditEvent._meta.db_table
+    assert _partition_of(event) == f"{table}_default"
+
+    audit.ensure_partitions(months_ahead=6)
+
+    assert _partition_of(event) == f"{table}_p{month:%Y%m}"
+    assert AuditEvent.objects.filter(id=event.id).count() == 1
@@ -0,0 +1,90 @@
+import pytest
+
+from accounts.models import Role, User
+from accounts.roles import Perm
+
+URL = "/api/auth/bootstrap/"
+
+
+@pytest.fixture
+def cashier(tenant, branch):
+    Role.objects.create(tenant=tenant, name="cashier", permissions=Perm.SELL)
+    return User.objects.create_user(
+        email="till@harare.example.com",
+        tenant=tenant,
+        branch=branch,
+        role="cashier",
+    )
+
+
+def test_payload_is_built_and_cached_per_user(api_client, cashier, tenant, redis):
+    response = api_client(cashier).get(URL)
+
+    assert response.status_code == 200
+    assert response.data["user"]["email"] == cashier.email
+    assert response.data["tenant"]["domain"] == tenant.domain
+    assert response.data["branch"]["name"] == "Main"
+    assert response.data["permissions"] == ["SELL"]
+    assert redis.hget(f"bootstrap:{tenant.pk}", str(cashier.pk)) is not None
+
+
+def test_unchanged_payload_is_not_modified(api_client, cashier):
+    client = api_client(cashier)
+    etag = client.get(URL)["ETag"]
+
+    assert client.get(URL, HTTP_IF_NONE_MATCH=etag).status_code == 304
+    assert client.get(URL, HTTP_IF_NONE_MATCH=f"W/{etag}").status_code == 304
+    assert client.get(URL, HTTP_IF_NONE_MATCH='"stale"').status_code == 200
+
+
+def test_etag_depends_on_the_representation(api_client, cashier):
+    client = api_client(cashier)
+
+    json_etag = client.get(URL)["ETag"]
+    msgpack_etag = client.get(URL, HTTP_ACCEPT="application/msgpack")["ETag"]
+
+    assert json_etag != msgpack_etag
+
+
+def test_role_change_reaches_the_payload(
+    api_client, cashier, tenant, django_capture_on_commit_callbacks
+):
+    client = api_client(cashier)
+    etag = client.get(URL)["ETag"]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        role = Role.objects.get(tenant=tenant, name="cashier")
+        role.permissions = Perm.SELL | Perm.PURCHASE
+        role.save()
+
+    response = client.get(URL, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response.data["permissions"] == ["SELL", "PURCHASE"]
+
+
+def test_branch_change_reaches_the_payload(
+    api_client, cashier, branch, django_capture_on_commit_callbacks
+):
+    client = api_client(cashier)
+    client.get(URL)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        branch.name = "Head office"
+        branch.save()
+
+    assert client.get(URL).data["branch"]["name"] == "Head office"
+
+
+def test_user_change_only_drops_that_user(
+    api_client, cashier, owner, tenant, redis, django_capture_on_commit_callbacks
+):
+    api_client(cashier).get(URL)
+    api_client(owner).get(URL)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        cashier.first_name = "Rudo"
+        cashier.save()
+
+    cached = redis.hkeys(f"bootstrap:{tenant.pk}")
+    assert cached == [str(owner.pk).encode()]
+    assert api_client(cashier).get(URL).data["user"]["first_name"] == "Rudo"
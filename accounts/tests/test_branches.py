@@ -0,0 +1,123 @@
+import pytest
+
+from accounts.models import Branch, Tenant, User
+
+URL = "/api/auth/branches"
+
+
+@pytest.fixture
+def other_branch(db):
+    other = Tenant.objects.create(name="Bulawayo", domain="byo.example.com")
+    return Branch.objects.create(name="Byo Main", tenant=other)
+
+
+def _staff(tenant, branch, role, index):
+    return User.objects.create_user(
+        email=f"{role}{index}@harare.example.com",
+        tenant=tenant,
+        branch=branch,
+        role=role,
+    )
+
+
+def test_create_uses_the_requesters_tenant(
+    api_client, owner, tenant, other_branch, django_capture_on_commit_callbacks
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        response = api_client(owner).post(
+            URL, {"name": "Depot", "tenant": str(other_branch.tenant_id)}, format="json"
+        )
+
+    assert response.status_code == 201
+    assert Branch.objects.get(pk=response.data["id"]).tenant_id == tenant.pk
+
+
+def test_create_needs_manage_branches(api_client, tenant, branch):
+    cashier = _staff(tenant, branch, "sales", 0)
+
+    response = api_client(cashier).post(URL, {"name": "Depot"}, format="json")
+
+    assert response.status_code == 403
+    assert not Branch.objects.filter(name="Depot").exists()
+
+
+def test_list_counts_active_staff_per_role(
+    api_client, owner, tenant, branch, other_branch, django_capture_on_commit_callbacks
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        _staff(tenant, branch, "sales", 0)
+        _staff(tenant, branch, "sales", 1)
+        _staff(tenant, branch, "purchase", 0)
+        gone = _staff(tenant, branch, "sales", 2)
+        gone.is_active = False
+        gone.save()
+        Branch.objects.create(name="Depot", tenant=tenant)
+        _staff(other_branch.tenant, other_branch, "sales", 9)
+
+    response = api_client(owner).get(URL)
+
+    assert response.status_code == 200
+    listed = {item["name"]: item for item in response.data}
+    assert set(listed) == {"Main", "Depot"}
+    assert listed["Main"]["user_count"] == 3
+    assert listed["Main"]["users_by_role"] == {"sales": 2, "purchase": 1}
+    assert listed["Depot"]["user_count"] == 0
+
+
+def test_list_reflects_new_branches(
+    api_client, owner, branch, django_capture_on_commit_callbacks
+):
+    client = api_client(owner)
+    assert [item["name"] for item in client.get(URL).data] == ["Main"]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        client.post(URL, {"name": "Depot"}, format="json")
+
+    assert [item["name"] for item in client.get(URL).data] == ["Depot", "Main"]
+
+
+@pytest.mark.parametrize(
+    "method, body",
+    [("get", None), ("patch", {"name": "Mine"}), ("delete", None)],
+)
+def test_other_tenants_branches_are_not_found(
+    api_client, owner, other_branch, method, body
+):
+    client = api_client(owner)
+
+    response = getattr(client, method)(f"{URL}/{other_branch.pk}", body, format="json")
+
+    assert response.status_code == 404
+    other_branch.refresh_from_db()
+    assert other_branch.name == "Byo Main" and other_branch.is_active
+
+
+def test_update_renames_the_branch(api_client, owner, branch):
+    response = api_client(owner).patch(
+        f"{URL}/{branch.pk}", {"name": "Head office"}, format="json"
+    )
+
+    assert response.status_code == 200
+    branch.refresh_from_db()
+    assert branch.name == "Head office"
+
+
+def test_delete_deactivates_and_keeps_staff(api_client, owner, tenant, branch):
+    cashier = _staff(tenant, branch, "sales", 0)
+
+    response = api_client(owner).delete(f"{URL}/{branch.pk}")
+
+    assert response.status_code == 204
+    branch.refresh_from_db()
+    assert branch.is_active is False
+    assert User.objects.filter(pk=cashier.pk, branch=branch).exists()
+
+
+def test_delete_needs_manage_branches(api_client, tenant, branch):
+    cashier = _staff(tenant, branch, "sales", 0)
+
+    response = api_client(cashier).delete(f"{URL}/{branch.pk}")
+
+    assert response.status_code == 403
+    branch.refresh_from_db()
+    assert branch.is_active
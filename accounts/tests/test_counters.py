@@ -0,0 +1,180 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from accounts import counters
+from accounts.models import Branch, Invitation, Tenant, TenantCounter, User
+
+
+@pytest.fixture
+def other_tenant(db):
+    return Tenant.objects.create(name="Bulawayo", domain="byo.example.com")
+
+
+def _stored(tenant):
+    return {
+        key: value
+        for key, value in TenantCounter.objects.filter(tenant=tenant).values_list(
+            "key", "value"
+        )
+        if value
+    }
+
+
+def _assert_in_step(*tenants):
+    # Reconciling may only drop buckets that have fallen to zero.
+    for tenant in tenants:
+        stored = _stored(tenant)
+        assert stored == dict(counters.actual_counts(tenant.pk))
+        counters.reconcile(tenant.pk)
+        assert _stored(tenant) == stored
+
+
+def _user(tenant, branch=None, role="sales", index=0, **extra):
+    return User.objects.create_user(
+        email=f"{role}{index}@{tenant.domain}",
+        tenant=tenant,
+        branch=branch,
+        role=role,
+        **extra,
+    )
+
+
+def _invitation(tenant, owner, days=7, index=0):
+    return Invitation.objects.create(
+        email=f"invited{index}@{tenant.domain}",
+        tenant=tenant,
+        role="sales",
+        invited_by=owner,
+        expires_at=timezone.now() + timedelta(days=days),
+    )
+
+
+def test_creates_are_counted(tenant, branch, owner):
+    _user(tenant, branch)
+    _user(tenant, branch, index=1)
+    _user(tenant, role="purchase")
+    _user(tenant, index=2, is_active=False)
+    _invitation(tenant, owner)
+    _invitation(tenant, owner, days=1, index=1)
+
+    assert _stored(tenant)["users:role:sales"] == 2
+    assert _stored(tenant)[f"users:branch:{branch.pk}"] == 2
+    _assert_in_step(tenant)
+
+
+def test_updates_move_counts_between_buckets(tenant, branch, owner):
+    user = _user(tenant)
+    other = Branch.objects.create(name="Depot", tenant=tenant)
+
+    user.role = "purchase"
+    user.branch = other
+    user.save()
+    assert _stored(tenant)["users:role:purchase"] == 1
+    assert "users:role:sales" not in _stored(tenant)
+    _assert_in_step(tenant)
+
+    user.is_active = False
+    user.save(update_fields=["is_active"])
+    assert "users:role:purchase" not in _stored(tenant)
+    _assert_in_step(tenant)
+
+    user.is_active = True
+    user.save()
+    user.is_deleted = True
+    user.save()
+    _assert_in_step(tenant)
+
+
+def test_instances_not_loaded_with_the_counted_fields(tenant, branch, owner):
+    _user(tenant, branch)
+    user = User.objects.only("id", "email").get(email=f"sales0@{tenant.domain}")
+
+    user.role = "accountant"
+    user.save()
+
+    assert _stored(tenant)["users:role:accountant"] == 1
+    _assert_in_step(tenant)
+
+
+def test_saves_of_other_fields_leave_counters_alone(tenant, owner):
+    user = _user(tenant)
+    before = _stored(tenant)
+
+    user.first_name = "Rudo"
+    user.save(update_fields=["first_name"])
+
+    assert _stored(tenant) == before
+    _assert_in_step(tenant)
+
+
+def test_moving_a_user_between_tenants(tenant, other_tenant, owner):
+    user = _user(tenant)
+
+    user.tenant = other_tenant
+    user.save()
+
+    assert "users:role:sales" not in _stored(tenant)
+    assert _stored(other_tenant)["users:role:sales"] == 1
+    _assert_in_step(tenant, other_tenant)
+
+
+def test_deletes_and_acceptances(tenant, branch, owner):
+    user = _user(tenant, branch)
+    invitation = _invitation(tenant, owner)
+    _invitation(tenant, owner, index=1)
+
+    user.delete()
+    invitation.is_accepted = True
+    invitation.save()
+
+    assert f"users:branch:{branch.pk}" not in _stored(tenant)
+    assert (
+        sum(
+            value
+            for key, value in _stored(tenant).items()
+            if key.startswith(counters.PENDING_PREFIX)
+        )
+        == 1
+    )
+    _assert_in_step(tenant)
+
+
+@pytest.mark.parametrize("via_queryset", [False, True])
+def test_deleting_a_tenant_skips_its_counters(tenant, owner, via_queryset):
+    _user(tenant)
+    _invitation(tenant, owner)
+
+    if via_queryset:
+        Tenant.objects.filter(pk=tenant.pk).delete()
+    else:
+        tenant.delete()
+
+    assert not TenantCounter.objects.filter(tenant_id=tenant.pk).exists()
+
+
+def test_reconcile_repairs_drift_and_drops_expired_buckets(tenant, owner):
+    user = _user(tenant)
+    invitation = _invitation(tenant, owner)
+    # Neither write sends signals, so the counters drift.
+    User.objects.filter(pk=user.pk).update(role="purchase")
+    Invitation.objects.filter(pk=invitation.pk).update(
+        expires_at=timezone.now() - timedelta(days=2)
+    )
+
+    assert counters.reconcile(tenant.pk) == 3
+
+    assert _stored(tenant) == {
+        "users:role:owner": 1,
+        "users:role:purchase": 1,
+        "users:branch:none": 2,
+    }
+    _assert_in_step(tenant)
+
+
+def test_concurrent_deltas_add_up(tenant):
+    counters.apply({(tenant.pk, "users:role:sales"): 2})
+    counters.apply({(tenant.pk, "users:role:sales"): -1})
+
+    assert _stored(tenant) == {"users:role:sales": 1}
@@ -0,0 +1,87 @@
+import threading
+
+import pytest
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from accounts import hashers
+from accounts.models import User
+
+
+@pytest.fixture
+def rehashes(settings, monkeypatch):
+    """Run rehashes on a fresh pool; yields the threads that closed connections."""
+    settings.PASSWORD_HASH_ITERATIONS = 1000
+    closed = []
+    close_all = hashers.connections.close_all
+
+    def record():
+        closed.append(threading.current_thread().name)
+        close_all()
+
+    monkeypatch.setattr(hashers.connections, "close_all", record)
+    hashers._reset_executor()
+    yield closed
+    if hashers._executor is not None:
+        hashers._executor.shutdown(wait=True)
+    hashers._reset_executor()
+
+
+def _wait():
+    hashers._executor.shutdown(wait=True)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_outdated_hash_is_upgraded_after_login(tenant, rehashes):
+    user = User.objects.create(
+        email="till@harare.example.com",
+        tenant=tenant,
+        password=make_password("pw12345", hasher="pbkdf2_sha1"),
+    )
+
+    assert user.check_password("pw12345")
+    _wait()
+
+    user.refresh_from_db()
+    assert user.password.startswith("pbkdf2_sha256$1000$")
+    assert user.check_password("pw12345")
+    assert rehashes and all(name.startswith("rehash") for name in rehashes)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_password_changed_meanwhile_is_kept(tenant, rehashes):
+    user = User.objects.create(
+        email="till@harare.example.com",
+        tenant=tenant,
+        password=make_password("pw12345", hasher="pbkdf2_sha1"),
+    )
+    encoded = user.password
+    User.objects.filter(pk=user.pk).update(password=make_password("new-pass"))
+
+    hashers._submit(user.pk, encoded, "pw12345")
+    _wait()
+
+    user.refresh_from_db()
+    assert user.check_password("new-pass")
+    assert rehashes
+
+
+@pytest.mark.parametrize("algorithm", ["pbkdf2_sha256", "pbkdf2_sha1", "scrypt"])
+def test_every_configured_hasher_fits_the_password_column(tenant, algorithm):
+    user = User.objects.create(
+        email="till@harare.example.com",
+        tenant=tenant,
+        password=make_password("pw12345", hasher=algorithm),
+    )
+
+    user.refresh_from_db()
+    assert user.password.startswith(f"{algorithm}$")
+    assert len(user.password) <= User._meta.get_field("password").max_length
+
+
+def test_calibrate_hasher_refuses_hashers_it_cannot_tune(settings):
+    settings.PASSWORD_HASHERS = ["django.contrib.auth.hashers.ScryptPasswordHasher"]
+
+    with pytest.raises(CommandError, match="scrypt"):
+        call_command("calibrate_hasher", rounds=1, probe_iterations=1000)
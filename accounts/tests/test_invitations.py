@@ -0,0 +1,68 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import Invitation, User
+
+
+@pytest.fixture
+def invitation(tenant, branch, owner):
+    return Invitation.objects.create(
+        email="cashier@harare.example.com",
+        tenant=tenant,
+        branch=branch,
+        role="staff",
+        invited_by=owner,
+        expires_at=timezone.now() + timedelta(days=7),
+    )
+
+
+def _accept(token):
+    return APIClient().post(
+        reverse("accounts:accept_invitaion"),
+        {
+            "token": str(token),
+            "password": "pw12345",
+            "first_name": "Rudo",
+            "last_name": "Chikomo",
+        },
+        format="json",
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_double_acceptance_creates_one_user(invitation):
+    barrier = threading.Barrier(2)
+
+    def accept(_):
+        barrier.wait()
+        try:
+            return _accept(invitation.token).status_code
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(2) as pool:
+        statuses = sorted(pool.map(accept, range(2)))
+
+    assert statuses[0] == 201
+    assert 400 <= statuses[1] < 500
+    assert User.objects.filter(email=invitation.email).count() == 1
+    invitation.refresh_from_db()
+    assert invitation.is_accepted
+
+
+def test_expired_invitation_is_rejected(invitation):
+    Invitation.objects.filter(pk=invitation.pk).update(
+        expires_at=timezone.now() - timedelta(minutes=1)
+    )
+
+    response = _accept(invitation.token)
+
+    assert response.status_code == 400
+    assert not User.objects.filter(email=invitation.email).exists()
@@ -0,0 +1,206 @@
+import itertools
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts import counters, offboarding, tasks
+from accounts.models import (
+    Branch,
+    Invitation,
+    OutboxMessage,
+    SyncTombstone,
+    Tenant,
+    TenantCounter,
+    TenantDeletion,
+    User,
+)
+
+
+@pytest.fixture
+def populated(tenant, branch, owner):
+    """A tenant with a few rows in every step, and a neighbour left alone."""
+    for index in range(5):
+        User.objects.create_user(
+            email=f"sales{index}@{tenant.domain}",
+            tenant=tenant,
+            branch=branch,
+            role="sales",
+        )
+        Invitation.objects.create(
+            email=f"invited{index}@{tenant.domain}",
+            tenant=tenant,
+            role="sales",
+            invited_by=owner,
+            expires_at=timezone.now() + timedelta(days=7),
+        )
+    other = Tenant.objects.create(name="Bulawayo", domain="byo.example.com")
+    User.objects.create_user(email="owner@byo.example.com", tenant=other)
+    return other
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Each read of the purge's clock is one second after the last."""
+    ticks = itertools.count()
+    monkeypatch.setattr(offboarding, "time", SimpleNamespace(monotonic=ticks.__next__))
+
+
+def _deletion(tenant, owner=None):
+    return offboarding.start(tenant, actor=owner)
+
+
+def test_start_deactivates_the_tenant_and_not_each_user(tenant, owner, populated):
+    deletion = _deletion(tenant, owner)
+
+    tenant.refresh_from_db()
+    assert not tenant.is_active
+    assert User.objects.filter(tenant=tenant, is_active=False).count() == 0
+    assert OutboxMessage.objects.filter(task_name=tasks.purge_tenant.name).count() == 1
+    assert _deletion(tenant, owner) == deletion
+    assert OutboxMessage.objects.count() == 1
+
+
+def test_users_of_an_inactive_tenant_are_locked_out(tenant, owner, api_client):
+    client = api_client(owner)
+    refresh = str(RefreshToken.for_user(owner))
+    assert client.get("/api/auth/bootstrap/").status_code == 200
+
+    _deletion(tenant, owner)
+
+    assert client.get("/api/auth/bootstrap/").status_code == 401
+    login = api_client().post(
+        "/api/auth/login/",
+        {"email": owner.email, "password": "pw12345"},
+        format="json",
+    )
+    assert login.status_code == 401
+    response = api_client().post(
+        "/api/auth/token/refresh/", {"refresh": refresh}, format="json"
+    )
+    assert response.status_code == 401
+
+
+def test_run_deletes_batch_by_batch(tenant, owner, populated):
+    deletion = _deletion(tenant, owner)
+
+    assert offboarding.run(deletion.pk, batch_size=2) is True
+
+    deletion.refresh_from_db()
+    assert deletion.status == TenantDeletion.DONE
+    assert deletion.deleted["accounts.Invitation"] == 5
+    assert deletion.deleted["accounts.User"] == 6
+    assert deletion.deleted["accounts.Branch"] == 1
+    assert not Tenant.objects.filter(pk=tenant.pk).exists()
+    assert not User.objects.filter(tenant_id=tenant.pk).exists()
+    assert User.objects.filter(tenant=populated).count() == 1
+
+
+def test_run_resumes_after_its_time_limit(tenant, owner, populated, clock):
+    deletion = _deletion(tenant, owner)
+
+    # The deadline is read at tick 0; batches start at ticks 1 and 2 and
+    # the check at tick 3 hands over.
+    assert offboarding.run(deletion.pk, batch_size=2, time_limit=2.5) is False
+
+    deletion.refresh_from_db()
+    assert deletion.status == TenantDeletion.PENDING
+    assert deletion.step == "invitations"
+    assert deletion.deleted == {"accounts.Invitation": 4}
+    assert Invitation.objects.filter(tenant_id=tenant.pk).count() == 1
+
+    assert offboarding.run(deletion.pk, batch_size=2, time_limit=1000) is True
+    deletion.refresh_from_db()
+    assert deletion.status == TenantDeletion.DONE
+    assert deletion.deleted["accounts.Invitation"] == 5
+
+
+def test_purge_tenant_requeues_until_done(tenant, owner, monkeypatch):
+    deletion = _deletion(tenant, owner)
+    results = iter([False, True])
+    monkeypatch.setattr(offboarding, "run", lambda deletion_id: next(results))
+    queued = []
+    monkeypatch.setattr(tasks.purge_tenant, "delay", queued.append)
+
+    tasks.purge_tenant(deletion.pk)
+    tasks.purge_tenant(deletion.pk)
+
+    assert queued == [deletion.pk]
+
+
+def test_a_running_purge_is_left_alone_until_it_stalls(settings, tenant, owner):
+    deletion = _deletion(tenant, owner)
+    TenantDeletion.objects.filter(pk=deletion.pk).update(
+        status=TenantDeletion.RUNNING, updated_at=timezone.now()
+    )
+
+    assert offboarding.run(deletion.pk) is None
+    assert offboarding.stalled() == []
+
+    TenantDeletion.objects.filter(pk=deletion.pk).update(
+        updated_at=timezone.now() - settings.TENANT_PURGE_STALL_AFTER * 2
+    )
+    assert offboarding.stalled() == [deletion.pk]
+    assert offboarding._claim(deletion.pk).status == TenantDeletion.RUNNING
+    # Claiming touched the record, so nobody else takes it over now.
+    assert offboarding._claim(deletion.pk) is None
+
+
+def test_failed_and_finished_purges(tenant, owner, monkeypatch):
+    deletion = _deletion(tenant, owner)
+    monkeypatch.setattr(offboarding, "STEPS", (("users", None),))
+
+    with pytest.raises(AttributeError):
+        offboarding.run(deletion.pk)
+
+    deletion.refresh_from_db()
+    assert deletion.status == TenantDeletion.FAILED
+    assert deletion.last_error
+    monkeypatch.undo()
+
+    assert offboarding.run(deletion.pk) is True
+    assert offboarding.run(deletion.pk) is None
+    assert offboarding.stalled() == []
+
+
+def test_purge_stalled_tenants_queues_each_stalled_deletion(
+    settings, tenant, owner, monkeypatch
+):
+    deletion = _deletion(tenant, owner)
+    TenantDeletion.objects.filter(pk=deletion.pk).update(
+        updated_at=timezone.now() - settings.TENANT_PURGE_STALL_AFTER * 2
+    )
+    queued = []
+    monkeypatch.setattr(tasks.purge_tenant, "delay", queued.append)
+
+    assert tasks.purge_stalled_tenants() == 1
+    assert queued == [deletion.pk]
+
+
+def test_purged_rows_skip_per_row_side_effects(
+    tenant, owner, populated, django_capture_on_commit_callbacks, monkeypatch
+):
+    deletion = _deletion(tenant, owner)
+    deltas = []
+    monkeypatch.setattr(counters, "apply", deltas.append)
+    neighbour = dict(
+        TenantCounter.objects.filter(tenant=populated).values_list("key", "value")
+    )
+
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        assert offboarding.run(deletion.pk, batch_size=2) is True
+
+    # No counter deltas, sync tombstones or per-row cache invalidations:
+    # the rows go with the tenant.
+    assert deltas == []
+    assert not SyncTombstone.objects.filter(tenant_id=tenant.pk).exists()
+    assert not TenantCounter.objects.filter(tenant_id=tenant.pk).exists()
+    assert not Branch.objects.filter(tenant_id=tenant.pk).exists()
+    assert len(callbacks) < 5
+    assert (
+        dict(TenantCounter.objects.filter(tenant=populated).values_list("key", "value"))
+        == neighbour
+    )
+    assert offboarding.purging(tenant.pk) is False
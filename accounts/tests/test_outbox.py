@@ -0,0 +1,110 @@
+from contextlib import nullcontext
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+from celery import current_app as celery_app
+from django.utils import timezone
+
+from accounts import outbox
+from accounts.models import OutboxMessage
+from accounts.tasks import purge_outbox, send_invitation_email
+from utils.queues import PRIORITY_DEFAULT, PRIORITY_INTERACTIVE
+
+
+@pytest.fixture
+def broker(monkeypatch):
+    """A stand-in Celery app; ``broker.sent`` holds each publish's kwargs."""
+    app = SimpleNamespace(sent=[], failures=[])
+
+    def send_task(name, **options):
+        if app.failures:
+            raise app.failures.pop()
+        app.sent.append({"name": name, **options})
+
+    app.send_task = send_task
+    app.producer_or_acquire = lambda: nullcontext()
+    monkeypatch.setattr(outbox, "current_app", app)
+    return app
+
+
+def _enqueue(tenant, count=1, **kwargs):
+    return [
+        outbox.enqueue(send_invitation_email, i, tenant_id=tenant.pk, **kwargs)
+        for i in range(count)
+    ]
+
+
+def test_relay_publishes_and_marks_messages(tenant, broker):
+    [message] = _enqueue(tenant, interactive=True)
+
+    assert outbox.relay() == 1
+    assert outbox.relay() == 0
+
+    [sent] = broker.sent
+    assert sent["name"] == send_invitation_email.name
+    assert sent["args"] == [0]
+    assert sent["task_id"] == str(message.pk)
+    assert sent["priority"] == PRIORITY_INTERACTIVE
+    message.refresh_from_db()
+    assert message.dispatched_at is not None
+
+
+def test_relay_looks_up_fair_shares_once_per_batch(settings, tenant, broker, redis):
+    settings.TASK_FAIR_SHARE_BUDGET = 1
+    _enqueue(tenant, count=3)
+    pipelines = []
+    pipeline = redis.pipeline
+
+    def counted(*args, **kwargs):
+        pipelines.append(1)
+        return pipeline(*args, **kwargs)
+
+    redis.pipeline = counted
+
+    assert outbox.relay() == 3
+
+    assert len(pipelines) == 1
+    priorities = [sent["priority"] for sent in broker.sent]
+    assert priorities == [PRIORITY_DEFAULT, PRIORITY_DEFAULT + 1, PRIORITY_DEFAULT + 2]
+
+
+def test_failed_publish_backs_off_and_keeps_the_rest(tenant, broker):
+    first, second = _enqueue(tenant, count=2)
+    broker.failures.append(ConnectionError("broker down"))
+
+    assert outbox.relay() == 0
+
+    first.refresh_from_db()
+    assert first.attempts == 1
+    assert first.last_error == "broker down"
+    assert first.available_at > timezone.now()
+    assert outbox.relay() == 1
+    assert [sent["task_id"] for sent in broker.sent] == [str(second.pk)]
+
+    OutboxMessage.objects.filter(pk=first.pk).update(available_at=timezone.now())
+    assert outbox.relay() == 1
+    assert OutboxMessage.objects.filter(dispatched_at__isnull=True).count() == 0
+
+
+def test_purge_only_drops_old_dispatched_messages(settings, tenant):
+    old, recent, pending = _enqueue(tenant, count=3)
+    now = timezone.now()
+    OutboxMessage.objects.filter(pk=old.pk).update(
+        dispatched_at=now - settings.OUTBOX_RETENTION - timedelta(minutes=1)
+    )
+    OutboxMessage.objects.filter(pk=recent.pk).update(dispatched_at=now)
+
+    assert purge_outbox() == 1
+
+    assert set(OutboxMessage.objects.values_list("pk", flat=True)) == {
+        recent.pk,
+        pending.pk,
+    }
+
+
+@pytest.mark.parametrize("task", ["relay_outbox", "flush_audit_events"])
+def test_housekeeping_tasks_use_the_maintenance_queue(task):
+    route = celery_app.amqp.router.route({}, f"accounts.tasks.{task}", (), {})
+
+    assert route["queue"].name == "maintenance"
@@ -0,0 +1,246 @@
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+from django.urls import resolve
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts import urls
+from accounts.models import AuditEvent, Branch, Invitation, Role, Tenant, User
+from accounts.roles import role_matrix
+from utils import profiling
+from utils.query_budget import budget_for, count_queries
+
+PASSWORD = "budget-pass"
+# Each route runs at these row counts per table; its query count must stay
+# within the view's budget and must not grow with the data.
+SIZES = (1, 10)
+
+
+def _data(size):
+    """A tenant with ``size`` staff users, branches, roles and invitations."""
+    prefix = f"budget{size}"
+    tenant = Tenant.objects.create(name=prefix, domain=f"{prefix}.example.com")
+    owner = User.objects.create_user(
+        email=f"{prefix}-owner@example.com",
+        password=PASSWORD,
+        tenant=tenant,
+        role="owner",
+        is_staff=True,
+    )
+    admin = User.objects.create_user(
+        email=f"{prefix}-admin@example.com", tenant=tenant, role="admin"
+    )
+    branches = Branch.objects.bulk_create(
+        Branch(name=f"Branch {i}", tenant=tenant) for i in range(size)
+    )
+    staff = User.objects.bulk_create(
+        User(
+            email=f"{prefix}-staff{i}@example.com",
+            password="!",
+            tenant=tenant,
+            branch=branches[i],
+            role="sales",
+        )
+        for i in range(size)
+    )
+    roles = Role.objects.bulk_create(
+        Role(name=f"role{i}", tenant=tenant, permissions=0) for i in range(size)
+    )
+    invitations = Invitation.objects.bulk_create(
+        Invitation(
+            email=f"{prefix}-invited{i}@example.com",
+            tenant=tenant,
+            role="sales",
+            invited_by=owner,
+            expires_at=timezone.now() + timedelta(days=7),
+        )
+        for i in range(size)
+    )
+    AuditEvent.objects.bulk_create(
+        AuditEvent(
+            tenant_id=tenant.id,
+            action="user.updated",
+            target_type="user",
+            target_id=str(owner.id),
+        )
+        for _ in range(size)
+    )
+    # Budgets are for the steady state, where the role matrix is cached.
+    role_matrix(tenant.pk)
+    # A stored profile, so the profile routes run past the lookup.
+    profile = profiling.Profile()
+    with profile.collect():
+        pass
+    profile.save(
+        SimpleNamespace(method="GET", get_full_path=lambda: "/", user=owner),
+        SimpleNamespace(status_code=200),
+    )
+    return SimpleNamespace(
+        prefix=prefix,
+        owner=owner,
+        admin=admin,
+        staff=staff,
+        branch=branches[0],
+        role=roles[0],
+        invitation=invitations[0],
+        profile_id=profile.id,
+    )
+
+
+# label: d -> (user, method, path, body)
+ROUTES = {
+    "register": lambda d: (
+        d.owner,
+        "post",
+        "/api/auth/register/",
+        {"email": f"{d.prefix}-new@example.com", "password": PASSWORD},
+    ),
+    "login": lambda d: (
+        None,
+        "post",
+        "/api/auth/login/",
+        {"email": d.owner.email, "password": PASSWORD},
+    ),
+    "token refresh": lambda d: (
+        None,
+        "post",
+        "/api/auth/token/refresh/",
+        {"refresh": str(RefreshToken.for_user(d.owner))},
+    ),
+    "profile": lambda d: (d.owner, "get", "/api/auth/profile/", None),
+    "bootstrap": lambda d: (d.owner, "get", "/api/auth/bootstrap/", None),
+    "sync": lambda d: (d.owner, "get", "/api/auth/sync/", None),
+    "list users": lambda d: (d.owner, "get", "/api/auth/list/users", None),
+    "list tenants": lambda d: (d.owner, "get", "/api/auth/list/tenants", None),
+    "update user": lambda d: (
+        d.owner,
+        "patch",
+        f"/api/auth/update/user/{d.staff[0].pk}",
+        {"email": d.staff[0].email, "password": PASSWORD, "first_name": "Rudo"},
+    ),
+    "delete user": lambda d: (
+        d.owner,
+        "delete",
+        f"/api/auth/delete/user/{d.staff[0].pk}",
+        None,
+    ),
+    "invite user": lambda d: (
+        d.owner,
+        "post",
+        "/api/auth/invite/user",
+        {
+            "email": f"{d.prefix}-invite@example.com",
+            "role": "sales",
+            "branch": str(d.branch.pk),
+        },
+    ),
+    "accept invitation": lambda d: (
+        None,
+        "post",
+        "/api/auth/accept/invitation",
+        {
+            "token": str(d.invitation.token),
+            "password": PASSWORD,
+            "first_name": "Chipo",
+            "last_name": "Banda",
+        },
+    ),
+    "list roles": lambda d: (d.owner, "get", "/api/auth/roles", None),
+    "create role": lambda d: (
+        d.owner,
+        "post",
+        "/api/auth/roles",
+        {"name": "cashier", "permissions": ["SELL"]},
+    ),
+    "get role": lambda d: (d.owner, "get", f"/api/auth/roles/{d.role.pk}", None),
+    "update role": lambda d: (
+        d.owner,
+        "patch",
+        f"/api/auth/roles/{d.role.pk}",
+        {"permissions": ["SELL", "PURCHASE"]},
+    ),
+    "delete role": lambda d: (
+        d.owner,
+        "delete",
+        f"/api/auth/roles/{d.role.pk}",
+        None,
+    ),
+    "list branches": lambda d: (d.owner, "get", "/api/auth/branches", None),
+    "create branch": lambda d: (
+        d.owner,
+        "post",
+        "/api/auth/branches",
+        {"name": "Depot"},
+    ),
+    "get branch": lambda d: (
+        d.owner,
+        "get",
+        f"/api/auth/branches/{d.branch.pk}",
+        None,
+    ),
+    "update branch": lambda d: (
+        d.owner,
+        "patch",
+        f"/api/auth/branches/{d.branch.pk}",
+        {"name": "Main"},
+    ),
+    "delete branch": lambda d: (
+        d.owner,
+        "delete",
+        f"/api/auth/branches/{d.branch.pk}",
+        None,
+    ),
+    "dashboard": lambda d: (d.owner, "get", "/api/auth/dashboard", None),
+    "audit": lambda d: (d.owner, "get", "/api/auth/audit", None),
+    "request profile": lambda d: (
+        d.owner,
+        "get",
+        f"/api/auth/request-profiles/{d.profile_id}",
+        None,
+    ),
+    "download profile": lambda d: (
+        d.owner,
+        "get",
+        f"/api/auth/request-profiles/{d.profile_id}/download",
+        None,
+    ),
+    "create tenant": lambda d: (
+        d.admin,
+        "post",
+        "/api/auth/create/tenant",
+        {"name": "Branch office", "domain": f"{d.prefix}-2.example.com"},
+    ),
+}
+
+
+def test_every_route_has_a_budget_check(db):
+    data = _data(1)
+    covered = {resolve(route(data)[2]).url_name for route in ROUTES.values()}
+
+    assert covered == {pattern.name for pattern in urls.urlpatterns}
+
+
+# Outside a test transaction, so atomic blocks cost no savepoint queries
+# and on-commit hooks run, as in production. The guard middleware counts
+# with the same rules the budgets were set by, without BEGIN and COMMIT.
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize("label", ROUTES)
+def test_route_stays_within_its_query_budget(settings, api_client, label):
+    settings.QUERY_BUDGET_MODE = "raise"
+    counts = []
+    for size in SIZES:
+        user, method, path, body = ROUTES[label](_data(size))
+        assert budget_for(
+            resolve(path).func.view_class, method.upper()
+        ), f"{label} has no query_budget"
+
+        client = api_client(user)
+        with count_queries() as queries:
+            response = getattr(client, method)(path, body, format="json")
+
+        assert response.status_code < 500
+        counts.append(queries.count)
+
+    assert len(set(counts)) == 1, f"{label} queries grow with data: {counts}"
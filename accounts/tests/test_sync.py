@@ -0,0 +1,79 @@
+import base64
+import json
+
+import pytest
+from django.urls import reverse
+
+from accounts.models import Tenant, User
+
+
+@pytest.fixture(autouse=True)
+def no_safety_lag(settings):
+    settings.SYNC_SAFETY_LAG = 0
+
+
+def _token(raw):
+    return base64.urlsafe_b64encode(json.dumps(raw).encode()).decode()
+
+
+def _sync(client, since=None):
+    params = {"since": since} if since else {}
+    return client.get(reverse("accounts:sync"), params)
+
+
+@pytest.mark.parametrize(
+    "since",
+    [
+        "not base64!",
+        _token(["users", "2026-01-01T00:00:00+00:00"]),
+        _token({"users": ["2026-01-01T00:00:00+00:00", "not-a-uuid"]}),
+        _token({"users": ["yesterday", "018f0000-0000-7000-8000-000000000000"]}),
+        _token(
+            {"users": ["2026-01-01T00:00:00", "018f0000-0000-7000-8000-000000000000"]}
+        ),
+        _token({"users": "2026-01-01T00:00:00+00:00"}),
+    ],
+)
+def test_tampered_watermark_is_a_bad_request(owner, api_client, since):
+    response = _sync(api_client(owner), since)
+
+    assert response.status_code == 400
+
+
+def test_hard_deleted_and_moved_users_come_back_as_tombstones(
+    tenant, owner, api_client
+):
+    client = api_client(owner)
+    gone = User.objects.create_user(email="gone@harare.example.com", tenant=tenant)
+    moved = User.objects.create_user(email="moved@harare.example.com", tenant=tenant)
+    first = _sync(client).json()
+    assert {row["id"] for row in first["users"]} >= {str(gone.pk), str(moved.pk)}
+
+    other = Tenant.objects.create(name="Bulawayo", domain="byo.example.com")
+    moved = User.objects.get(pk=moved.pk)
+    moved.tenant = other
+    moved.save()
+    gone_id = gone.pk
+    gone.delete()
+    second = _sync(client, first["watermark"]).json()
+
+    deleted = [row for row in second["users"] if row.get("deleted")]
+    assert sorted(row["id"] for row in deleted) == sorted([str(gone_id), str(moved.pk)])
+
+
+def test_user_moved_back_is_sent_as_a_change(tenant, owner, api_client):
+    client = api_client(owner)
+    user = User.objects.create_user(email="back@harare.example.com", tenant=tenant)
+    first = _sync(client).json()
+
+    other = Tenant.objects.create(name="Bulawayo", domain="byo.example.com")
+    user = User.objects.get(pk=user.pk)
+    user.tenant = other
+    user.save()
+    user = User.objects.get(pk=user.pk)
+    user.tenant = tenant
+    user.save()
+    second = _sync(client, first["watermark"]).json()
+
+    assert [row["id"] for row in second["users"]] == [str(user.pk)]
+    assert "deleted" not in second["users"][0]
@@ -0,0 +1,56 @@
+import time
+
+import pytest
+from django.utils import timezone
+
+from accounts.models import User
+from utils import cache
+
+
+@pytest.fixture
+def refreshes():
+    cache._reset_executor()
+    yield
+    if cache._executor is not None:
+        cache._executor.shutdown(wait=True)
+    cache._reset_executor()
+
+
+def _emails(response):
+    assert response.status_code == 200
+    return {user["email"] for user in response.data}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_stale_listing_is_rebuilt_after_the_request(
+    settings, api_client, owner, tenant, refreshes
+):
+    settings.TENANT_CACHE_TTL = 0.2
+    client = api_client(owner)
+    assert _emails(client.get("/api/auth/list/users?fields=email")) == {owner.email}
+
+    # Skips the signals, so only the stale refresh can pick the user up.
+    User.objects.bulk_create(
+        [User(email="till@harare.example.com", password="!", tenant=tenant)]
+    )
+    time.sleep(0.3)
+    stale = client.get("/api/auth/list/users?fields=email")
+    cache._executor.shutdown(wait=True)
+
+    assert _emails(stale) == {owner.email}
+    refreshed = client.get("/api/auth/list/users?fields=email")
+    assert _emails(refreshed) == {owner.email, "till@harare.example.com"}
+    assert set(refreshed.data[0]) == {"email"}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_saves_that_skip_listed_fields_keep_the_listing(owner, tenant):
+    before = cache.generation(tenant.pk)
+
+    owner.last_login = timezone.now()
+    owner.save(update_fields=["last_login"])
+    assert cache.generation(tenant.pk) == before
+
+    owner.first_name = "Tendai"
+    owner.save(update_fields=["first_name"])
+    assert cache.generation(tenant.pk) > before
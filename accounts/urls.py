@@ -1,15 +1,25 @@
 from django.urls import path
-from rest_framework_simplejwt.views import TokenRefreshView
 
 from .views import (
     AcceptInvitationView,
+    BootstrapView,
+    BranchDetailView,
     CreateTenantView,
     CustomTokenObtainPairView,
+    CustomTokenRefreshView,
+    DashboardView,
     DeleteUserView,
+    DownloadRequestProfileView,
     InviteUserView,
+    ListAuditEventsView,
+    ListCreateBranchesView,
+    ListCreateRolesView,
     ListTenantsView,
     ListUsersView,
     RegisterView,
+    RequestProfileView,
+    RoleDetailView,
+    SyncView,
     UpdateUserView,
     UserProfileView,
 )
@@ -19,8 +29,10 @@ app_name = "accounts"
 urlpatterns = [
     path("register/", RegisterView.as_view(), name="register"),
     path("login/", CustomTokenObtainPairView.as_view(), name="login"),
-    path("token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
+    path("token/refresh/", CustomTokenRefreshView.as_view(), name="token_refresh"),
     path("profile/", UserProfileView.as_view(), name="profile"),
+    path("bootstrap/", BootstrapView.as_view(), name="bootstrap"),
+    path("sync/", SyncView.as_view(), name="sync"),
     path("list/users", ListUsersView.as_view(), name="list_users"),
     path("create/tenant", CreateTenantView.as_view(), name="create_tenant"),
     path("update/user/<str:pk>", UpdateUserView.as_view(), name="update_user"),
@@ -28,4 +40,20 @@ urlpatterns = [
     path("list/tenants", ListTenantsView.as_view(), name="list_tenant"),
     path("invite/user", InviteUserView.as_view(), name="invite_user"),
     path("accept/invitation", AcceptInvitationView.as_view(), name="accept_invitaion"),
+    path("roles", ListCreateRolesView.as_view(), name="roles"),
+    path("roles/<str:pk>", RoleDetailView.as_view(), name="role_detail"),
+    path("branches", ListCreateBranchesView.as_view(), name="branches"),
+    path("branches/<str:pk>", BranchDetailView.as_view(), name="branch_detail"),
+    path("dashboard", DashboardView.as_view(), name="dashboard"),
+    path("audit", ListAuditEventsView.as_view(), name="audit"),
+    path(
+        "request-profiles/<str:pk>",
+        RequestProfileView.as_view(),
+        name="request_profile",
+    ),
+    path(
+        "request-profiles/<str:pk>/download",
+        DownloadRequestProfileView.as_view(),
+        name="download_request_profile",
+    ),
 ]
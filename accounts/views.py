@@ -1,17 +1,32 @@
+import json
 from datetime import timedelta
 
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse
 from django.utils import timezone
+from django.utils.cache import parse_etags
 from loguru import logger
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.views import TokenObtainPairView
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
-from .models import Invitation, Tenant, User
+from utils import cache, profiling
+
+from . import audit, bootstrap, branches, counters, outbox, sync
+from .mixins import CachedListMixin, SparseFieldsMixin
+from .models import AuditEvent, Branch, Invitation, Role, Tenant, User
+from .pagination import AuditCursorPagination
+from .permissions import RolePermission
+from .roles import Perm, can_grant, has_perms
 from .serializers import (
     AcceptInvitationSerializer,
+    AuditEventSerializer,
+    BranchSerializer,
+    BranchSummarySerializer,
     CustomTokenObtainPairSerializer,
     InvitationSerializer,
+    RoleSerializer,
     TenantSerializer,
     UserSerializer,
 )
@@ -20,30 +35,43 @@ from .tasks import send_invitation_email
 
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
+    query_budget = 1
+
+
+class CustomTokenRefreshView(TokenRefreshView):
+    # The user, then its tenant for user_authentication_rule.
+    query_budget = 2
 
 
 class CreateTenantView(generics.CreateAPIView):
     permission_classes = (permissions.IsAuthenticated,)
+    query_budget = 3
     serializer_class = TenantSerializer
 
     def perform_create(self, serializer):
         tenant = serializer.save()
         user = self.request.user
-        logger.info(f"user role: {user.role} {user}")
-        if user.is_authenticated and (user.is_superuser or user.role == "owner"):
+        logger.info("user role: {} {}", user.role, user)
+        if has_perms(user, Perm.MANAGE_TENANT):
             user.tenant = tenant
             user.save()
         return tenant
 
 
-class ListTenantsView(generics.ListAPIView):
+class ListTenantsView(CachedListMixin, generics.ListAPIView):
     permission_classes = (permissions.IsAuthenticated,)
+    query_budget = 2
     serializer_class = TenantSerializer
     queryset = Tenant.objects.all()
+    cache_name = "tenants"
+
+    def get_cache_namespace(self):
+        return cache.GLOBAL
 
 
 class InviteUserView(generics.CreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = 8
     serializer_class = InvitationSerializer
 
     def create(self, request, *args, **kwargs):
@@ -53,7 +81,7 @@ class InviteUserView(generics.CreateAPIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        if request.user.role not in ["owner", "admin"]:
+        if not has_perms(request.user, Perm.INVITE_USERS):
             return Response(
                 {"error": "You don't have permission to invite users."},
                 status=status.HTTP_403_FORBIDDEN,
@@ -62,73 +90,85 @@ class InviteUserView(generics.CreateAPIView):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        if request.user.role == "admin" and serializer.validated_data["role"] in [
-            "owner",
-            "admin",
-        ]:
+        if not can_grant(request.user, serializer.validated_data["role"]):
             return Response(
                 {"error": "You can only invite users with lower privileges."},
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        invitation = Invitation.objects.create(
-            **serializer.validated_data,
-            tenant=request.user.tenant,
-            invited_by=request.user,
-            expires_at=timezone.now() + timedelta(days=7),
-        )
-
-        try:
-            send_invitation_email.delay(invitation.id)
-            return Response(
-                {"message": "Invitation sent successfully."},
-                status=status.HTTP_201_CREATED,
+        with transaction.atomic():
+            invitation = Invitation.objects.create(
+                **serializer.validated_data,
+                tenant=request.user.tenant,
+                invited_by=request.user,
+                expires_at=timezone.now() + timedelta(days=7),
             )
-        except Exception as e:
-            logger.error(f"Failed to send invitation email: {str(e)}", exc_info=True)
-            return Response(
-                {"error": "Failed to send invitation email. Please try again later."},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            outbox.enqueue(
+                send_invitation_email,
+                invitation.id,
+                tenant_id=invitation.tenant_id,
+                interactive=True,
+            )
+            audit.record(
+                "invitation.sent",
+                invitation,
+                actor=request.user,
+                changes={"email": invitation.email, "role": invitation.role},
             )
 
+        return Response(
+            {"message": "Invitation sent successfully."},
+            status=status.HTTP_201_CREATED,
+        )
+
 
 class AcceptInvitationView(APIView):
     permission_classes = (permissions.AllowAny,)
+    query_budget = 6
 
     def post(self, request, *args, **kwargs):
         serializer = AcceptInvitationSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
 
         try:
-            invitation = Invitation.objects.get(
-                token=serializer.validated_data["token"], is_accepted=False
-            )
+            with transaction.atomic():
+                # Lock the invitation first: a double submit waits here and
+                # then finds it accepted, before spending time on hashing.
+                invitation = Invitation.objects.select_for_update().get(
+                    token=data["token"], is_accepted=False
+                )
+
+                if invitation.is_expired():
+                    return Response(
+                        {"error": "This invitation has expired."},
+                        status=status.HTTP_400_BAD_REQUEST,
+                    )
+
+                user = User.objects.create_user(
+                    email=invitation.email,
+                    password=data["password"],
+                    first_name=data["first_name"],
+                    last_name=data["last_name"],
+                    tenant_id=invitation.tenant_id,
+                    role=invitation.role,
+                    is_active=True,
+                )
+
+                invitation.is_accepted = True
+                invitation.save(update_fields=["is_accepted", "updated_at"])
+                audit.record("invitation.accepted", invitation, actor=user)
         except Invitation.DoesNotExist:
             return Response(
                 {"error": "Invalid or expired invitation."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-
-        if invitation.is_expired():
+        except IntegrityError:
             return Response(
-                {"error": "This invitation has expired."},
+                {"error": "An account with this email already exists."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # Create user
-        User.objects.create_user(
-            email=invitation.email,
-            password=serializer.validated_data["password"],
-            first_name=serializer.validated_data["first_name"],
-            last_name=serializer.validated_data["last_name"],
-            tenant=invitation.tenant,
-            role=invitation.role,
-            is_active=True,
-        )
-
-        invitation.is_accepted = True
-        invitation.save()
-
         return Response(
             {"message": "Account created successfully. You can now log in."},
             status=status.HTTP_201_CREATED,
@@ -138,6 +178,7 @@ class AcceptInvitationView(APIView):
 class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
     permission_classes = (permissions.AllowAny,)
+    query_budget = 8
     serializer_class = UserSerializer
 
     def create(self, request, *args, **kwargs):
@@ -145,11 +186,12 @@ class RegisterView(generics.CreateAPIView):
         serializer.is_valid(raise_exception=True)
         user = serializer.save()
 
-        if request.user.is_authenticated and (
-            request.user.role == "owner" or request.user.role == "admin"
-        ):
+        if has_perms(request.user, Perm.MANAGE_USERS):
             user.tenant = request.user.tenant
             user.save()
+        audit.record(
+            "user.created", user, actor=request.user, changes={"role": user.role}
+        )
 
         return Response(
             {
@@ -161,20 +203,30 @@ class RegisterView(generics.CreateAPIView):
         )
 
 
-class ListUsersView(generics.ListAPIView):
+class ListUsersView(CachedListMixin, SparseFieldsMixin, generics.ListAPIView):
     permission_classes = (permissions.IsAuthenticated,)
+    query_budget = 2
     serializer_class = UserSerializer
-    queryset = User.objects.filter(is_deleted=False).select_related("tenant")
+    queryset = User.objects.filter(is_deleted=False)
+    cache_name = "users"
+
+    def get_cache_namespace(self):
+        # Superusers see every tenant's users; that listing isn't cached.
+        if self.request.user.is_superuser:
+            return None
+        return self.request.user.tenant_id
 
     def get_queryset(self):
+        queryset = super().get_queryset()
         if self.request.user.is_superuser:
-            return self.queryset
+            return queryset
         else:
-            return self.queryset.filter(tenant=self.request.user.tenant)
+            return queryset.filter(tenant_id=self.request.user.tenant_id)
 
 
 class UpdateUserView(generics.UpdateAPIView):
     permission_classes = (permissions.IsAuthenticated,)
+    query_budget = 6
     serializer_class = UserSerializer
     queryset = User.objects.all().select_related("tenant")
     lookup_field = "pk"
@@ -188,9 +240,18 @@ class UpdateUserView(generics.UpdateAPIView):
     def patch(self, request, *args, **kwargs):
         return self.update(request, *args, **kwargs)
 
+    def perform_update(self, serializer):
+        user = serializer.save()
+        changes = {
+            field: "<redacted>" if field == "password" else value
+            for field, value in serializer.validated_data.items()
+        }
+        audit.record("user.updated", user, actor=self.request.user, changes=changes)
+
 
 class DeleteUserView(generics.DestroyAPIView):
     permission_classes = (permissions.IsAuthenticated,)
+    query_budget = 5
     queryset = User.objects.all().select_related("tenant")
     lookup_field = "pk"
 
@@ -198,21 +259,207 @@ class DeleteUserView(generics.DestroyAPIView):
         user = self.get_object()
         user.is_deleted = True
         user.save()
+        audit.record("user.deleted", user, actor=request.user)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class UserProfileView(APIView):
+class UserProfileView(SparseFieldsMixin, generics.RetrieveAPIView):
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = 1
+    serializer_class = UserSerializer
+
+    def get_object(self):
+        # Already loaded by authentication, so ?fields= only narrows the output.
+        return self.request.user
+
+
+class BootstrapView(APIView):
+    """
+    Everything a POS terminal needs at startup, in one response. A terminal
+    that sends back the ETag it last saw gets a bodiless 304 while nothing
+    has changed.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = 2
 
     def get(self, request):
-        user = request.user
-        return Response(
-            {
-                "id": user.id,
-                "email": user.email,
-                "first_name": user.first_name,
-                "last_name": user.last_name,
-                "role": user.role,
-                "tenant": str(user.tenant_id) if user.tenant_id else None,
-            }
-        )
+        data = bootstrap.cached_bootstrap(request.user)
+        etag = bootstrap.etag(data, request.accepted_renderer.media_type)
+        headers = {"ETag": etag, "Vary": "Accept"}
+        # Gzipped responses carry the weak form of the tag.
+        seen = parse_etags(request.headers.get("If-None-Match", ""))
+        if etag in {tag.removeprefix("W/") for tag in seen}:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(data, headers=headers)
+
+
+class SyncView(APIView):
+    """Users and branches changed since the ``since`` watermark."""
+
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = 4
+
+    def get(self, request):
+        if not request.user.tenant_id:
+            return Response(
+                {"error": "You must be part of a tenant to sync."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            limit = int(request.query_params.get("limit", 0)) or None
+            data = sync.delta(
+                request.user.tenant_id, request.query_params.get("since"), limit
+            )
+        except (ValueError, sync.InvalidWatermark) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(data)
+
+
+class ListCreateRolesView(generics.ListCreateAPIView):
+    permission_classes = (permissions.IsAuthenticated, RolePermission)
+    required_permissions = {"POST": Perm.MANAGE_ROLES}
+    query_budget = {"GET": 3, "POST": 4}
+    serializer_class = RoleSerializer
+
+    def get_queryset(self):
+        return Role.objects.filter(tenant=self.request.user.tenant)
+
+    def create(self, request, *args, **kwargs):
+        if not request.user.tenant:
+            return Response(
+                {"error": "You must be part of a tenant to create roles."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return super().create(request, *args, **kwargs)
+
+    def perform_create(self, serializer):
+        serializer.save(tenant=self.request.user.tenant)
+
+
+class RoleDetailView(generics.RetrieveUpdateDestroyAPIView):
+    permission_classes = (permissions.IsAuthenticated, RolePermission)
+    required_permissions = {
+        "PUT": Perm.MANAGE_ROLES,
+        "PATCH": Perm.MANAGE_ROLES,
+        "DELETE": Perm.MANAGE_ROLES,
+    }
+    query_budget = {"GET": 4, "PUT": 4, "PATCH": 4, "DELETE": 5}
+    serializer_class = RoleSerializer
+    lookup_field = "pk"
+
+    def get_queryset(self):
+        return Role.objects.filter(tenant=self.request.user.tenant)
+
+
+class ListCreateBranchesView(generics.ListCreateAPIView):
+    permission_classes = (permissions.IsAuthenticated, RolePermission)
+    required_permissions = {"POST": Perm.MANAGE_BRANCHES}
+    query_budget = {"GET": 3, "POST": 3}
+    serializer_class = BranchSerializer
+
+    def list(self, request, *args, **kwargs):
+        tenant_id = request.user.tenant_id
+
+        def build():
+            summaries = branches.branch_summaries(tenant_id)
+            return BranchSummarySerializer(summaries, many=True).data
+
+        return Response(branches.cached_branch_list(tenant_id, build))
+
+    def create(self, request, *args, **kwargs):
+        if not request.user.tenant:
+            return Response(
+                {"error": "You must be part of a tenant to create branches."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return super().create(request, *args, **kwargs)
+
+    def perform_create(self, serializer):
+        serializer.save(tenant=self.request.user.tenant)
+
+
+class BranchDetailView(generics.RetrieveUpdateDestroyAPIView):
+    permission_classes = (permissions.IsAuthenticated, RolePermission)
+    required_permissions = {
+        "PUT": Perm.MANAGE_BRANCHES,
+        "PATCH": Perm.MANAGE_BRANCHES,
+        "DELETE": Perm.MANAGE_BRANCHES,
+    }
+    query_budget = {"GET": 3, "PUT": 4, "PATCH": 4, "DELETE": 4}
+    serializer_class = BranchSerializer
+    lookup_field = "pk"
+
+    def get_queryset(self):
+        return Branch.objects.filter(tenant=self.request.user.tenant)
+
+    def delete(self, request, *args, **kwargs):
+        # Deactivate rather than delete: staff rows cascade from branches.
+        branch = self.get_object()
+        branch.is_active = False
+        branch.save()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class DashboardView(APIView):
+    permission_classes = (permissions.IsAuthenticated, RolePermission)
+    required_permissions = Perm.VIEW_DASHBOARD
+    query_budget = 2
+
+    def get(self, request):
+        if not request.user.tenant_id:
+            return Response(
+                {"error": "You must be part of a tenant to view the dashboard."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(counters.summary(request.user.tenant_id))
+
+
+class ListAuditEventsView(generics.ListAPIView):
+    permission_classes = (permissions.IsAuthenticated, RolePermission)
+    required_permissions = Perm.VIEW_AUDIT
+    query_budget = 2
+    serializer_class = AuditEventSerializer
+    pagination_class = AuditCursorPagination
+
+    def get_queryset(self):
+        queryset = AuditEvent.objects.filter(tenant_id=self.request.user.tenant_id)
+        for field in ("action", "target_type", "target_id", "actor_id"):
+            value = self.request.query_params.get(field)
+            if value:
+                queryset = queryset.filter(**{field: value})
+        return queryset
+
+
+class RequestProfileView(APIView):
+    """Timings, SQL trace and top functions of a profiled request."""
+
+    permission_classes = (permissions.IsAdminUser,)
+    query_budget = 1
+
+    def get(self, request, pk):
+        meta = profiling.load(pk, "meta", request.user)
+        if meta is None:
+            return Response(
+                {"error": "Profile not found or expired."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        return Response(json.loads(meta))
+
+
+class DownloadRequestProfileView(APIView):
+    """The raw cProfile stats, for ``pstats`` or snakeviz."""
+
+    permission_classes = (permissions.IsAdminUser,)
+    query_budget = 1
+
+    def get(self, request, pk):
+        stats = profiling.load(pk, "stats", request.user)
+        if stats is None:
+            return Response(
+                {"error": "Profile not found or expired."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        response = HttpResponse(stats, content_type="application/octet-stream")
+        response["Content-Disposition"] = f'attachment; filename="{pk}.prof"'
+        return response
@@ -0,0 +1,17 @@
+"""
+Benchmarks run through ``python manage.py benchmark <name>``.
+
+Each module exposes ``help``, ``add_arguments(parser)`` and
+``run(stdout, **options)``.
+"""
+
+BENCHMARKS = (
+    "admin_changelist",
+    "bulk_writes",
+    "email_delivery",
+    "logging_overhead",
+    "renderers",
+    "sparse_fields",
+    "startup",
+    "uuid_keys",
+)
@@ -0,0 +1,102 @@
+import time
+
+from django.contrib import admin
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from accounts.models import Branch, Tenant, User
+
+help = "Latency and queries of the user admin pages on a large user table."
+
+
+class PlainUserAdmin(admin.ModelAdmin):
+    """The user admin as it was: defaults plus the same columns."""
+
+    list_display = ("email", "tenant", "branch", "role", "is_active", "is_staff")
+    search_fields = ("email",)
+
+
+def add_arguments(parser):
+    parser.add_argument("--users", type=int, default=200000)
+    parser.add_argument("--tenants", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--budget-ms", type=float, default=300, help="Latency budget per page."
+    )
+
+
+def _seed(users, tenants):
+    tenant_ids = [
+        tenant.pk
+        for tenant in Tenant.objects.bulk_create(
+            Tenant(name=f"Benchmark {i}", domain=f"bench{i}.example.com")
+            for i in range(tenants)
+        )
+    ]
+    branch_ids = [
+        branch.pk
+        for branch in Branch.objects.bulk_create(
+            Branch(name="Main", tenant_id=tenant_id) for tenant_id in tenant_ids
+        )
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO accounts_user (id, password, is_superuser, first_name, "
+            "last_name, is_staff, date_joined, created_at, updated_at, tenant_id, "
+            "branch_id, email, is_active, is_deleted, role) "
+            "SELECT gen_random_uuid(), '!', false, 'Tendai', 'Moyo' || i, false, "
+            "now(), now(), now(), (%s::uuid[])[i %% %s + 1], "
+            "(%s::uuid[])[i %% %s + 1], 'bench' || i || '@example.com', true, "
+            "false, 'sales' FROM generate_series(1, %s) AS i",
+            [tenant_ids, tenants, branch_ids, tenants, users],
+        )
+        cursor.execute("ANALYZE accounts_user")
+
+
+def _measure(view, superuser, path, repeat, *args):
+    factory = RequestFactory()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        request = factory.get(path)
+        request.user = superuser
+        with CaptureQueriesContext(connection) as queries:
+            response = view(request, *args)
+            response.render()
+    return len(queries), (time.perf_counter() - start) / repeat * 1000
+
+
+def run(stdout, users, tenants, repeat, budget_ms, **options):
+    if connection.vendor != "postgresql":
+        stdout.write("This benchmark needs Postgres.")
+        return
+    with transaction.atomic():
+        stdout.write(f"Seeding {users} users across {tenants} tenants...")
+        _seed(users, tenants)
+        superuser = User.objects.create_superuser(
+            email="benchmark-admin@example.com", password="!"
+        )
+        target = str(User.objects.filter(is_superuser=False).first().pk)
+        admins = (
+            ("before", PlainUserAdmin(User, admin.site)),
+            ("after", admin.site._registry[User]),
+        )
+        pages = (
+            ("changelist", "changelist_view", "/admin/accounts/user/", ()),
+            ("search", "changelist_view", "/admin/accounts/user/?q=bench1234", ()),
+            (
+                "change",
+                "change_view",
+                f"/admin/accounts/user/{target}/change/",
+                (target,),
+            ),
+        )
+        stdout.write(f"{'page':>12} {'admin':>8} {'queries':>8} {'ms':>9}")
+        for page, method, path, args in pages:
+            for label, model_admin in admins:
+                count, elapsed = _measure(
+                    getattr(model_admin, method), superuser, path, repeat, *args
+                )
+                flag = "  over budget" if elapsed > budget_ms else ""
+                stdout.write(f"{page:>12} {label:>8} {count:>8} {elapsed:>9.1f}{flag}")
+        transaction.set_rollback(True)
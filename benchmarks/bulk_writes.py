@@ -0,0 +1,118 @@
+import time
+from datetime import timedelta
+from itertools import islice
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from accounts.models import Branch, Invitation, Tenant, User
+from utils.bulk import bulk_write
+
+help = "Rows per second for bulk_create versus utils.bulk.bulk_write (COPY)."
+
+
+def add_arguments(parser):
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+
+
+def _users(rows, tenant, branch):
+    for i in range(rows):
+        yield User(
+            email=f"bulk{i}@example.com",
+            first_name="Tendai",
+            last_name=f"Moyo{i}",
+            role="sales",
+            tenant=tenant,
+            branch=branch,
+            password="!",
+        )
+
+
+def _user_dicts(rows, tenant, branch):
+    for i in range(rows):
+        yield {
+            "email": f"bulk{i}@example.com",
+            "first_name": "Tendai",
+            "last_name": f"Moyo{i}",
+            "role": "sales",
+            "tenant_id": tenant.pk,
+            "branch_id": branch.pk,
+            "password": "!",
+        }
+
+
+def _invitations(rows, tenant, branch, inviter):
+    expires_at = timezone.now() + timedelta(days=7)
+    for i in range(rows):
+        yield Invitation(
+            email=f"invite{i}@example.com",
+            tenant=tenant,
+            branch=branch,
+            role="staff",
+            invited_by=inviter,
+            expires_at=expires_at,
+        )
+
+
+def _bulk_create(model, rows, batch_size):
+    while batch := list(islice(rows, batch_size)):
+        model.objects.bulk_create(batch)
+
+
+def _case(stdout, label, rows, write, seed=None):
+    # Each case runs on its own data and is rolled back afterwards. ``seed``
+    # runs first, untimed.
+    with transaction.atomic():
+        tenant = Tenant.objects.create(name="Bulk", domain="bulk.example.com")
+        branch = Branch.objects.create(name="Main", tenant=tenant)
+        inviter = User.objects.create_user(
+            email="bulk-owner@example.com", tenant=tenant
+        )
+        if seed is not None:
+            seed(tenant, branch, inviter)
+        start = time.perf_counter()
+        write(tenant, branch, inviter)
+        elapsed = time.perf_counter() - start
+        stdout.write(f"{label:>32} {elapsed:>8.1f} s {rows / elapsed:>10,.0f} rows/s")
+        transaction.set_rollback(True)
+
+
+def run(stdout, rows, batch_size, **options):
+    if connection.vendor != "postgresql":
+        stdout.write("bulk_write only differs from bulk_create on Postgres.")
+    cases = (
+        (
+            "User bulk_create",
+            lambda t, b, i: _bulk_create(User, _users(rows, t, b), batch_size),
+        ),
+        ("User bulk_write", lambda t, b, i: bulk_write(User, _users(rows, t, b))),
+        (
+            "User bulk_write (dicts)",
+            lambda t, b, i: bulk_write(User, _user_dicts(rows, t, b)),
+        ),
+        (
+            "User bulk_write upsert",
+            lambda t, b, i: bulk_write(
+                User,
+                _user_dicts(rows, t, b),
+                conflict="update",
+                unique_fields=["email"],
+                update_fields=["first_name", "last_name"],
+            ),
+            # Every row conflicts, so each one is an update.
+            lambda t, b, i: bulk_write(User, _user_dicts(rows, t, b)),
+        ),
+        (
+            "Invitation bulk_create",
+            lambda t, b, i: _bulk_create(
+                Invitation, _invitations(rows, t, b, i), batch_size
+            ),
+        ),
+        (
+            "Invitation bulk_write",
+            lambda t, b, i: bulk_write(Invitation, _invitations(rows, t, b, i)),
+        ),
+    )
+    for label, write, *seed in cases:
+        _case(stdout, label, rows, write, *seed)
@@ -0,0 +1,135 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.mail import EmailMessage, get_connection
+
+help = (
+    "Throughput of the SMTP and async SMTP email backends against local SMTP "
+    "stand-ins, one per tenant."
+)
+
+BACKENDS = {
+    "smtp": "django.core.mail.backends.smtp.EmailBackend",
+    "async": "utils.email_backends.AsyncSMTPBackend",
+}
+
+
+def add_arguments(parser):
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--tenants", type=int, default=4)
+    parser.add_argument(
+        "--latency-ms",
+        type=float,
+        default=20,
+        help="Delay the stand-in adds to every SMTP reply, like a network hop.",
+    )
+    parser.add_argument(
+        "--threads", type=int, default=8, help="Callers sending in parallel."
+    )
+
+
+class StandIn:
+    """A minimal SMTP server that accepts and discards everything."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.received = 0
+        self.loop = asyncio.new_event_loop()
+        self.server = self.loop.run_until_complete(
+            asyncio.start_server(self._session, "127.0.0.1", 0, backlog=1024)
+        )
+        self.port = self.server.sockets[0].getsockname()[1]
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+
+    async def _reply(self, writer, line):
+        await asyncio.sleep(self.latency)
+        writer.write(line)
+        await writer.drain()
+
+    async def _session(self, reader, writer):
+        await self._reply(writer, b"220 stand-in ESMTP\r\n")
+        while line := await reader.readline():
+            command = line[:4].upper()
+            if command == b"EHLO":
+                await self._reply(writer, b"250-stand-in\r\n250 8BITMIME\r\n")
+            elif command == b"DATA":
+                await self._reply(writer, b"354 go ahead\r\n")
+                while (await reader.readline()) != b".\r\n":
+                    pass
+                self.received += 1
+                await self._reply(writer, b"250 queued\r\n")
+            elif command == b"QUIT":
+                await self._reply(writer, b"221 bye\r\n")
+                break
+            else:
+                await self._reply(writer, b"250 ok\r\n")
+        writer.close()
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.server.close)
+
+
+def _message(index, port, backend):
+    return EmailMessage(
+        subject=f"Invitation {index}",
+        body="You have been invited.",
+        from_email="noreply@example.com",
+        to=[f"user{index}@example.com"],
+        # One connection per message, as utils.email.send_tenant_email does.
+        connection=get_connection(backend, host="127.0.0.1", port=port),
+    )
+
+
+def _per_task(backend, ports, messages, threads):
+    """Each caller sends one message at a time, like an email task."""
+    with ThreadPoolExecutor(threads) as pool:
+        list(
+            pool.map(
+                lambda i: _message(i, ports[i % len(ports)], backend).send(),
+                range(messages),
+            )
+        )
+
+
+def _batch(backend, ports, messages, threads):
+    """A single caller hands every tenant's messages over in one call."""
+    connections = [get_connection(backend, host="127.0.0.1", port=p) for p in ports]
+    batches = [[] for _ in ports]
+    for i in range(messages):
+        batches[i % len(ports)].append(_message(i, ports[i % len(ports)], backend))
+    with ThreadPoolExecutor(len(ports)) as pool:
+        list(
+            pool.map(
+                lambda pair: pair[0].send_messages(pair[1]), zip(connections, batches)
+            )
+        )
+
+
+def run(stdout, messages, tenants, latency_ms, threads, **options):
+    cases = (
+        ("smtp, 1 caller", BACKENDS["smtp"], _per_task, 1),
+        (f"smtp, {threads} callers", BACKENDS["smtp"], _per_task, threads),
+        (f"async, {threads} callers", BACKENDS["async"], _per_task, threads),
+        ("async, batched", BACKENDS["async"], _batch, 1),
+    )
+    stand_ins = [StandIn(latency_ms / 1000) for _ in range(tenants)]
+    ports = [stand_in.port for stand_in in stand_ins]
+    stdout.write(
+        f"{messages} messages to {tenants} tenants, {latency_ms:g} ms per SMTP reply"
+    )
+    try:
+        for label, backend, send, callers in cases:
+            before = sum(stand_in.received for stand_in in stand_ins)
+            start = time.perf_counter()
+            send(backend, ports, messages, callers)
+            elapsed = time.perf_counter() - start
+            received = sum(stand_in.received for stand_in in stand_ins) - before
+            stdout.write(
+                f"{label:>18}: {messages / elapsed:8.1f} messages/s "
+                f"({received}/{messages} delivered)"
+            )
+    finally:
+        for stand_in in stand_ins:
+            stand_in.close()
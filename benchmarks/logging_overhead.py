@@ -0,0 +1,85 @@
+import copy
+import logging
+import logging.config
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from loguru import logger
+
+from utils.log import configure
+
+help = "Per-request logging cost on the request thread, synchronous vs queued."
+
+
+def add_arguments(parser):
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument(
+        "--queries", type=int, default=10, help="SQL debug records per request."
+    )
+
+
+def _config(log_dir, queued):
+    config = copy.deepcopy(settings.LOGGING)
+    for name, handler in config["handlers"].items():
+        if "filename" in handler:
+            handler["filename"] = str(Path(log_dir) / Path(handler["filename"]).name)
+        if not name.startswith("queue_"):
+            # Benchmark the write path regardless of DEBUG.
+            handler.pop("filters", None)
+        if name == "console":
+            handler["stream"] = "ext://sys.stderr"
+            handler["level"] = "CRITICAL"
+    if not queued:
+        sinks = {
+            name: handler["handlers"]
+            for name, handler in config["handlers"].items()
+            if name.startswith("queue_")
+        }
+        for name in sinks:
+            del config["handlers"][name]
+        for logger_config in config["loggers"].values():
+            logger_config["handlers"] = [
+                sink
+                for handler in logger_config["handlers"]
+                for sink in sinks.get(handler, [handler])
+            ]
+    return config
+
+
+def _request(std_logger, sql_logger, queries):
+    logger.info("user role: {} {}", "owner", "owner@example.com")
+    std_logger.info("GET /api/auth/list/users 200")
+    for i in range(queries):
+        sql_logger.debug(
+            "(%.3f) %s; args=%s; alias=%s",
+            0.001,
+            'SELECT "accounts_user"."id" FROM "accounts_user" WHERE "id" = %s',
+            (i,),
+            "default",
+            extra={"duration": 0.001, "sql": "SELECT 1", "params": (i,)},
+        )
+
+
+def run(stdout, requests, queries, **options):
+    std_logger = logging.getLogger("django.request")
+    sql_logger = logging.getLogger("django.db.backends")
+    try:
+        with tempfile.TemporaryDirectory() as log_dir:
+            for label, queued in (("synchronous", False), ("queued", True)):
+                configure(_config(log_dir, queued))
+                start = time.perf_counter()
+                for _ in range(requests):
+                    _request(std_logger, sql_logger, queries)
+                elapsed = time.perf_counter() - start
+                # Drain the queues so queued writes don't skew the next run.
+                logging.config.dictConfig(
+                    {"version": 1, "disable_existing_loggers": False}
+                )
+                stdout.write(
+                    f"{label:>12}: {elapsed / requests * 1e6:8.1f} us/request "
+                    f"({requests} requests, {queries} SQL records each)"
+                )
+    finally:
+        configure(settings.LOGGING)
@@ -0,0 +1,49 @@
+import gzip
+import time
+import uuid
+
+from rest_framework.renderers import JSONRenderer
+
+from accounts.models import User
+from accounts.serializers import UserSerializer
+from utils.renderers import MessagePackRenderer
+
+help = "Bytes on the wire and render time for list/users, JSON vs MessagePack."
+
+
+def add_arguments(parser):
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 50, 1000])
+    parser.add_argument("--repeat", type=int, default=200)
+
+
+def _payload(count):
+    tenant_id = uuid.uuid4()
+    users = [
+        User(
+            email=f"cashier{i}@example.com",
+            first_name="Tendai",
+            last_name=f"Moyo{i}",
+            role="sales",
+            tenant_id=tenant_id,
+        )
+        for i in range(count)
+    ]
+    return UserSerializer(users, many=True).data
+
+
+def run(stdout, users, repeat, **options):
+    renderers = (("json", JSONRenderer()), ("msgpack", MessagePackRenderer()))
+    stdout.write(
+        f"{'users':>6} {'format':>8} {'bytes':>9} {'gzip':>9} {'render us':>10}"
+    )
+    for count in users:
+        data = _payload(count)
+        for name, renderer in renderers:
+            start = time.perf_counter()
+            for _ in range(repeat):
+                body = renderer.render(data)
+            elapsed = (time.perf_counter() - start) / repeat
+            stdout.write(
+                f"{count:>6} {name:>8} {len(body):>9} {len(gzip.compress(body)):>9} "
+                f"{elapsed * 1e6:>10.1f}"
+            )
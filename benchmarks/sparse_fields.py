@@ -0,0 +1,100 @@
+import time
+import uuid
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from accounts.models import Tenant, User
+from accounts.views import ListUsersView
+from utils.renderers import MessagePackRenderer
+
+help = "Queries, selected columns and payload size for list/users with ?fields=."
+
+
+class UncachedListUsersView(ListUsersView):
+    """The list view without the tenant cache, which would hide the queries."""
+
+    def get_cache_namespace(self):
+        return None
+
+
+class LegacyListUsersView(UncachedListUsersView):
+    """The list view as it was before sparse fieldsets."""
+
+    def get_queryset(self):
+        return User.objects.filter(
+            is_deleted=False, tenant=self.request.user.tenant
+        ).select_related("tenant")
+
+    def get_serializer(self, *args, **kwargs):
+        serializer_class = self.get_serializer_class()
+        kwargs.setdefault("context", self.get_serializer_context())
+        return serializer_class(*args, **kwargs)
+
+
+def add_arguments(parser):
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+
+
+def _columns(queries):
+    if not queries:
+        return "-"
+    sql = queries[-1]["sql"]
+    return sql.split(" FROM ")[0].count(",") + 1
+
+
+def _measure(view, user, query, repeat):
+    factory = APIRequestFactory()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        request = factory.get("/api/auth/list/users", query)
+        force_authenticate(request, user=User.objects.get(pk=user.pk))
+        with CaptureQueriesContext(connection) as queries:
+            response = view(request)
+            response.render()
+    elapsed = (time.perf_counter() - start) / repeat
+    body = MessagePackRenderer().render(response.data)
+    return len(queries), _columns(queries), len(response.content), len(body), elapsed
+
+
+def run(stdout, users, repeat, **options):
+    cases = (
+        ("before", LegacyListUsersView.as_view(), {}),
+        ("default", UncachedListUsersView.as_view(), {}),
+        ("id,email", UncachedListUsersView.as_view(), {"fields": "id,email"}),
+        ("id,role", UncachedListUsersView.as_view(), {"fields": "id,role"}),
+    )
+    # Rolled back at the end, but named per run so nothing in the database,
+    # or a run that died, can collide with it.
+    run_id = uuid.uuid4().hex[:8]
+    with transaction.atomic():
+        tenant = Tenant.objects.create(
+            name="Benchmark", domain=f"benchmark-{run_id}.example.com"
+        )
+        User.objects.bulk_create(
+            User(
+                email=f"benchmark{i}-{run_id}@example.com",
+                first_name="Tendai",
+                last_name=f"Moyo{i}",
+                role="sales",
+                tenant=tenant,
+                password="!",
+            )
+            for i in range(users)
+        )
+        owner = User.objects.filter(tenant=tenant).first()
+        stdout.write(
+            f"{'fields':>10} {'queries':>8} {'columns':>8} {'json':>9} "
+            f"{'msgpack':>9} {'ms':>8}"
+        )
+        for label, view, query in cases:
+            count, columns, json_size, msgpack_size, elapsed = _measure(
+                view, owner, query, repeat
+            )
+            stdout.write(
+                f"{label:>10} {count:>8} {columns:>8} {json_size:>9} "
+                f"{msgpack_size:>9} {elapsed * 1000:>8.1f}"
+            )
+        transaction.set_rollback(True)
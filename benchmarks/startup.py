@@ -0,0 +1,67 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+
+help = "Worker start-up time and first-request latency, with and without warm-up."
+
+# Loads the WSGI app in a fresh interpreter and times two requests that go
+# through the middleware, URL resolver, DRF and simplejwt without a database.
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+from pos_back.wsgi import application
+loaded = time.perf_counter() - start
+environ = {
+    "REQUEST_METHOD": "GET",
+    "PATH_INFO": sys.argv[1],
+    "SERVER_NAME": sys.argv[2],
+    "SERVER_PORT": "80",
+    "HTTP_HOST": sys.argv[2],
+    "HTTP_AUTHORIZATION": "Bearer not-a-token",
+    "wsgi.url_scheme": "http",
+    "wsgi.input": __import__("io").BytesIO(),
+    "wsgi.errors": sys.stderr,
+}
+timings = []
+for _ in range(2):
+    start = time.perf_counter()
+    b"".join(application(dict(environ), lambda status, headers: None))
+    timings.append(time.perf_counter() - start)
+print(json.dumps({"load": loaded, "first": timings[0], "second": timings[1]}))
+"""
+
+
+def add_arguments(parser):
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--path", default="/api/auth/list/users")
+
+
+def _probe(path, warmup):
+    host = next((h for h in settings.ALLOWED_HOSTS if "*" not in h), "localhost")
+    env = {**os.environ, "WARMUP": str(warmup)}
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE, path, host],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def run(stdout, runs, path, **options):
+    stdout.write(f"{'warm-up':>8} {'load ms':>9} {'first ms':>9} {'second ms':>10}")
+    for warmup in (False, True):
+        samples = [_probe(path, warmup) for _ in range(runs)]
+        load, first, second = (
+            statistics.median(sample[key] for sample in samples) * 1000
+            for key in ("load", "first", "second")
+        )
+        stdout.write(
+            f"{'on' if warmup else 'off':>8} {load:>9.1f} {first:>9.1f} "
+            f"{second:>10.1f}"
+        )
@@ -0,0 +1,52 @@
+import time
+import uuid
+
+from django.db import connection, transaction
+
+from utils.ids import uuid7
+
+help = "Insert throughput and primary key index size, uuid4 vs uuid7 keys."
+
+
+def add_arguments(parser):
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--batch", type=int, default=1000)
+
+
+def _index_size(cursor, table):
+    if connection.vendor != "postgresql":
+        return None
+    cursor.execute("SELECT pg_relation_size(%s)", [f"{table}_pkey"])
+    return cursor.fetchone()[0]
+
+
+def run(stdout, rows, batch, **options):
+    for name, generate in (("uuid4", uuid.uuid4), ("uuid7", uuid7)):
+        table = f"benchmark_{name}_keys"
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+            cursor.execute(
+                f"CREATE TABLE {table} "
+                f"(id uuid NOT NULL CONSTRAINT {table}_pkey PRIMARY KEY, "
+                f"name varchar(100) NOT NULL)"
+            )
+            try:
+                start = time.perf_counter()
+                for offset in range(0, rows, batch):
+                    with transaction.atomic():
+                        cursor.executemany(
+                            f"INSERT INTO {table} (id, name) VALUES (%s, %s)",
+                            [
+                                (str(generate()), f"row {i}")
+                                for i in range(offset, min(offset + batch, rows))
+                            ],
+                        )
+                elapsed = time.perf_counter() - start
+                size = _index_size(cursor, table)
+            finally:
+                cursor.execute(f"DROP TABLE {table}")
+        size = f"{size / 2**20:7.1f} MiB" if size is not None else "n/a"
+        stdout.write(
+            f"{name}: {rows / elapsed:9.0f} rows/s, primary key index {size} "
+            f"({rows} rows, batches of {batch})"
+        )
@@ -0,0 +1,67 @@
+import fakeredis
+import pytest
+from django.core.cache import caches
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from utils import redis_client
+
+
+@pytest.fixture(autouse=True)
+def redis(monkeypatch):
+    """Point ``get_redis()`` at an in-process fake for every test."""
+    fake = fakeredis.FakeRedis()
+    redis_client.get_redis.cache_clear()
+    monkeypatch.setattr(redis_client.redis.Redis, "from_url", lambda *a, **k: fake)
+    yield fake
+    redis_client.get_redis.cache_clear()
+
+
+@pytest.fixture(autouse=True)
+def local_cache(settings):
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    }
+    yield
+    caches["default"].clear()
+
+
+@pytest.fixture
+def tenant(db):
+    from accounts.models import Tenant
+
+    return Tenant.objects.create(name="Harare", domain="harare.example.com")
+
+
+@pytest.fixture
+def branch(tenant):
+    from accounts.models import Branch
+
+    return Branch.objects.create(name="Main", tenant=tenant)
+
+
+@pytest.fixture
+def owner(tenant):
+    from accounts.models import User
+
+    return User.objects.create_user(
+        email="owner@harare.example.com",
+        password="pw12345",
+        tenant=tenant,
+        role="owner",
+    )
+
+
+@pytest.fixture
+def api_client():
+    """``api_client(user)``: a DRF client authenticated as ``user``."""
+
+    def make(user=None):
+        client = APIClient()
+        if user is not None:
+            client.credentials(
+                HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}"
+            )
+        return client
+
+    return make
@@ -3,6 +3,8 @@ from datetime import timedelta
 from pathlib import Path
 
 from decouple import config
+from django.core.exceptions import ImproperlyConfigured
+from kombu import Queue
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -21,6 +23,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "rest_framework_simplejwt",
     "corsheaders",
@@ -29,7 +32,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "utils.middleware.TracingMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "utils.middleware.ProfilingMiddleware",
+    "utils.middleware.QueryBudgetMiddleware",
+    "utils.middleware.ThresholdGZipMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -45,7 +52,7 @@ AUTH_USER_MODEL = "accounts.User"
 
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "BACKEND": "utils.tracing.TracedDjangoTemplates",
         "DIRS": [],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -78,6 +85,27 @@ DATABASES = {
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
+# The first hasher hashes new passwords; the rest only verify old ones.
+# PASSWORD_HASHER may pick any of them: they need nothing outside the
+# standard library. Argon2 and bcrypt would need argon2-cffi / bcrypt.
+# Run "manage.py calibrate_hasher" to pick PASSWORD_HASH_ITERATIONS for
+# this hardware (empty means Django's default).
+_password_hashers = [
+    "accounts.hashers.TunablePBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+_password_hasher = config("PASSWORD_HASHER", default=_password_hashers[0])
+if _password_hasher not in _password_hashers:
+    raise ImproperlyConfigured(
+        f"PASSWORD_HASHER must be one of {', '.join(_password_hashers)}; "
+        f"got {_password_hasher!r}"
+    )
+PASSWORD_HASHERS = list(dict.fromkeys([_password_hasher, *_password_hashers]))
+PASSWORD_HASH_ITERATIONS = config("PASSWORD_HASH_ITERATIONS", default=0, cast=int)
+# Threads per process that upgrade outdated hashes after login.
+PASSWORD_REHASH_WORKERS = 2
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -113,10 +141,25 @@ MEDIA_ROOT = BASE_DIR / "media"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 # Email settings
-EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+# Set to "utils.email_backends.AsyncSMTPBackend" to deliver through one
+# asyncio loop per process; pair it with an email worker on --pool threads
+# so many tasks can wait on SMTP at once.
+EMAIL_BACKEND = config(
+    "EMAIL_BACKEND", default="django.core.mail.backends.smtp.EmailBackend"
+)
+# AsyncSMTPBackend limits: sessions per process, sessions per SMTP account
+# (tenant), and messages waiting before senders block.
+EMAIL_ASYNC_MAX_IN_FLIGHT = 100
+EMAIL_ASYNC_ACCOUNT_CONCURRENCY = 5
+EMAIL_ASYNC_MAX_PENDING = 1000
 EMAIL_HOST = "localhost"
 EMAIL_PORT = 1025
 
+# Handlers write from a background thread; request threads only enqueue records.
+LOGGING_CONFIG = "utils.log.configure"
+SQL_LOG_SAMPLE_RATE = config("SQL_LOG_SAMPLE_RATE", default=0.1, cast=float)
+SQL_LOG_SLOW_MS = config("SQL_LOG_SLOW_MS", default=200, cast=int)
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
@@ -127,6 +170,11 @@ LOGGING = {
         "production_only": {
             "()": "django.utils.log.RequireDebugFalse",
         },
+        "sql_sample": {
+            "()": "utils.log.SampleFilter",
+            "rate": SQL_LOG_SAMPLE_RATE,
+            "slow_ms": SQL_LOG_SLOW_MS,
+        },
     },
     "formatters": {
         "verbose": {
@@ -184,24 +232,38 @@ LOGGING = {
             "formatter": "simple",
             "filters": ["production_only"],
         },
+        # Queue handlers must sort after the handlers they feed.
+        "queue_app": {
+            "()": "utils.log.QueueListenerHandler",
+            "handlers": ["app_file", "error_file", "console"],
+        },
+        "queue_celery": {
+            "()": "utils.log.QueueListenerHandler",
+            "handlers": ["celery_file", "console"],
+        },
+        "queue_db": {
+            "()": "utils.log.QueueListenerHandler",
+            "handlers": ["db_file"],
+            "filters": ["sql_sample"],
+        },
     },
     "loggers": {
         "django": {
-            "handlers": ["app_file", "error_file", "console"],
+            "handlers": ["queue_app"],
             "level": "INFO",
-            "propagate": True,
+            "propagate": False,
         },
         "": {
-            "handlers": ["app_file", "error_file", "console"],
+            "handlers": ["queue_app"],
             "level": "DEBUG",
         },
         "django.db.backends": {
-            "handlers": ["db_file"],
+            "handlers": ["queue_db"],
             "level": "DEBUG",
             "propagate": False,
         },
         "celery": {
-            "handlers": ["celery_file", "console"],
+            "handlers": ["queue_celery"],
             "level": "INFO",
             "propagate": False,
         },
@@ -213,6 +275,124 @@ LOGGING = {
 CELERY_BROKER_URL = "redis://127.0.0.1:6379/0"
 CELERY_RESULT_BACKEND = "redis://127.0.0.1:6379/1"
 
+# Compiled role matrices: seconds in Redis and in each process.
+ROLE_CACHE_TTL = 3600
+ROLE_LOCAL_CACHE_TTL = 30
+BRANCH_CACHE_TTL = 300
+BOOTSTRAP_CACHE_TTL = 300
+
+# Delta sync: rows changed within SYNC_SAFETY_LAG seconds wait for the next
+# call, which must be longer than any transaction that writes them.
+SYNC_PAGE_SIZE = 500
+SYNC_MAX_PAGE_SIZE = 5000
+SYNC_SAFETY_LAG = 5
+# Deletions are kept this long; terminals offline for longer sync from scratch.
+SYNC_TOMBSTONE_RETENTION = timedelta(days=30)
+# Pending invitations expiring within this many days count as expiring soon.
+DASHBOARD_EXPIRING_DAYS = 2
+
+REDIS_SOCKET_TIMEOUT = config("REDIS_SOCKET_TIMEOUT", default=0.5, cast=float)
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": config("CACHE_URL", default="redis://127.0.0.1:6379/2"),
+        "KEY_PREFIX": "pos",
+        "OPTIONS": {
+            "socket_timeout": REDIS_SOCKET_TIMEOUT,
+            "socket_connect_timeout": REDIS_SOCKET_TIMEOUT,
+        },
+    },
+}
+# Tenant-scoped response cache, see utils.cache: entries are fresh for
+# TENANT_CACHE_TTL seconds and then served stale for up to
+# TENANT_CACHE_STALE_TTL more while one worker thread recomputes them.
+TENANT_CACHE_ALIAS = "default"
+TENANT_CACHE_TTL = 60
+TENANT_CACHE_STALE_TTL = 300
+TENANT_CACHE_LOCK_TIMEOUT = 5
+TENANT_CACHE_REFRESH_WORKERS = 2
+
+# Readiness probes: seconds each dependency gets to answer, and how long a
+# result is reused before probing again.
+HEALTH_PROBE_TIMEOUT = config("HEALTH_PROBE_TIMEOUT", default=0.5, cast=float)
+HEALTH_CACHE_SECONDS = 2
+
+# Admin changelists count exactly up to this many rows, and estimate above.
+ADMIN_EXACT_COUNT_LIMIT = 10000
+
+# Build URL, serializer, JWT and template state when wsgi.py / asgi.py is
+# loaded rather than on the first requests; see utils.warmup. Run gunicorn
+# with --preload to do it once and share it with every worker.
+WARMUP_ENABLED = config("WARMUP", default=True, cast=bool)
+WARMUP_GC_FREEZE = True
+WARMUP_TEMPLATES = (
+    "rest_framework/api.html",
+    "admin/index.html",
+    "admin/change_list.html",
+    "admin/change_form.html",
+    "drf-yasg/swagger-ui.html",
+)
+
+# Request and task tracing, see utils.tracing. TRACING_EXPORTER is a class
+# path such as utils.tracing.ConsoleExporter or utils.tracing.FileExporter;
+# empty turns tracing off. New traces are sampled at TRACING_SAMPLE_RATE;
+# traces started upstream keep the caller's decision.
+TRACING_EXPORTER = config("TRACING_EXPORTER", default="")
+TRACING_SAMPLE_RATE = config("TRACING_SAMPLE_RATE", default=0.01, cast=float)
+TRACING_FILE = config("TRACING_FILE", default=os.path.join(LOG_DIR, "traces.jsonl"))
+TRACING_MAX_QUEUE = 10000
+TRACING_MAX_STATEMENT_LENGTH = 1000
+
+# Rows per COPY / bulk_create round in utils.bulk.
+BULK_WRITE_BATCH_SIZE = 50000
+
+# Email and maintenance work get their own queues so a worker pool can be
+# sized for each; see starts.md. Tasks are published through
+# accounts.outbox.enqueue(); within a queue, the relay lowers the priority
+# of tenants publishing past their fair share (utils.queues).
+CELERY_TASK_DEFAULT_QUEUE = "default"
+CELERY_TASK_QUEUES = (
+    Queue("default"),
+    Queue("email"),
+    Queue("maintenance"),
+)
+CELERY_TASK_ROUTES = {
+    "accounts.tasks.send_*": {"queue": "email"},
+    "accounts.tasks.purge_*": {"queue": "maintenance"},
+    "accounts.tasks.reconcile_*": {"queue": "maintenance"},
+    "accounts.tasks.maintain_*": {"queue": "maintenance"},
+    "accounts.tasks.relay_outbox": {"queue": "maintenance"},
+    "accounts.tasks.flush_audit_events": {"queue": "maintenance"},
+}
+CELERY_TASK_DEFAULT_PRIORITY = 3
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    "priority_steps": list(range(10)),
+    "sep": ":",
+    "queue_order_strategy": "priority",
+}
+# Priorities only work if workers don't hoard messages.
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+
+# Workers started with --autoscale=max,min size their pool from the Redis
+# backlog of their queues; see utils.autoscale.
+CELERY_WORKER_AUTOSCALER = "utils.autoscale:QueueDepthAutoscaler"
+AUTOSCALE_INTERVAL = 5
+# Waiting messages per process above which to grow, and below which to shrink.
+AUTOSCALE_BACKLOG_HIGH = 10
+AUTOSCALE_BACKLOG_LOW = 2
+# Seconds the oldest message may wait before growing / to allow shrinking.
+AUTOSCALE_LATENCY_HIGH = 30
+AUTOSCALE_LATENCY_LOW = 5
+AUTOSCALE_COOLDOWN = 120
+# Serve Prometheus metrics from each worker on this port; 0 disables.
+AUTOSCALE_METRICS_PORT = config("AUTOSCALE_METRICS_PORT", default=0, cast=int)
+
+TASK_FAIR_SHARE_WINDOW = 60
+TASK_FAIR_SHARE_BUDGET = 50
+# Optional per-tenant weights, keyed by tenant id.
+TENANT_QUEUE_WEIGHTS = {}
+
 CELERY_TIMEZONE = "Africa/Harare"
 CELERY_ENABLE_UTC = False
 
@@ -222,8 +402,49 @@ CELERY_BEAT_SCHEDULE = {
         "schedule": timedelta(seconds=10),
         "args": ("Celery is working",),
     },
+    # Fallback for when the relay_outbox command isn't running.
+    "relay-outbox": {
+        "task": "accounts.tasks.relay_outbox",
+        "schedule": timedelta(seconds=10),
+    },
+    "purge-outbox": {
+        "task": "accounts.tasks.purge_outbox",
+        "schedule": timedelta(hours=1),
+    },
+    "purge-sync-tombstones": {
+        "task": "accounts.tasks.purge_sync_tombstones",
+        "schedule": timedelta(days=1),
+    },
+    "flush-audit-events": {
+        "task": "accounts.tasks.flush_audit_events",
+        "schedule": timedelta(seconds=5),
+    },
+    "maintain-audit-partitions": {
+        "task": "accounts.tasks.maintain_audit_partitions",
+        "schedule": timedelta(days=1),
+    },
+    "reconcile-tenant-counters": {
+        "task": "accounts.tasks.reconcile_tenant_counters",
+        "schedule": timedelta(hours=6),
+    },
+    "purge-stalled-tenants": {
+        "task": "accounts.tasks.purge_stalled_tenants",
+        "schedule": timedelta(minutes=15),
+    },
 }
 
+OUTBOX_BATCH_SIZE = 500
+OUTBOX_RETENTION = timedelta(days=1)
+
+AUDIT_FLUSH_BATCH_SIZE = 1000
+AUDIT_PARTITION_MONTHS_AHEAD = 2
+
+# Tenant deletion runs in batches of this many rows, in slices of at most
+# TENANT_PURGE_TIME_LIMIT seconds per task.
+TENANT_PURGE_BATCH_SIZE = 1000
+TENANT_PURGE_TIME_LIMIT = 60
+TENANT_PURGE_STALL_AFTER = timedelta(minutes=15)
+
 AUTHENTICATION_BACKENDS = [
     "accounts.backends.EmailBackend",
     "django.contrib.auth.backends.ModelBackend",
@@ -234,14 +455,38 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.IsAuthenticated",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "accounts.authentication.JWTAuthentication",
+    ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "rest_framework.renderers.JSONRenderer",
+        "utils.renderers.MessagePackRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "rest_framework.parsers.JSONParser",
+        "utils.parsers.MessagePackParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
     ],
     "DEFAULT_SCHEMA_CLASS": "rest_framework.schemas.coreapi.AutoSchema",
 }
 
+# Responses smaller than this are sent uncompressed.
+RESPONSE_COMPRESSION_MIN_SIZE = 1024
+
+# Staff requests carrying this header are profiled (see ProfilingMiddleware).
+PROFILING_HEADER = "X-Profile"
+PROFILING_TTL = 24 * 60 * 60
+PROFILING_MAX_QUERIES = 1000
+
+# What to do when a request runs more queries than its view's query_budget:
+# "off", "warn" (log) or "raise" (for benchmark and test runs).
+QUERY_BUDGET_MODE = config("QUERY_BUDGET_MODE", default="warn")
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=1),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
+    "USER_AUTHENTICATION_RULE": "accounts.authentication.user_authentication_rule",
 }
 
 
@@ -6,6 +6,8 @@ from drf_yasg import openapi
 from drf_yasg.views import get_schema_view
 from rest_framework import permissions
 
+from utils import health
+
 schema_view = get_schema_view(
     openapi.Info(
         title="POS API",
@@ -20,6 +22,8 @@ schema_view = get_schema_view(
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("healthz/live", health.liveness, name="health-liveness"),
+    path("healthz/ready", health.readiness, name="health-readiness"),
     path(
         "api/",
         include(
@@ -1,7 +1,13 @@
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "pos_back.settings")
 
 application = get_wsgi_application()
+
+if settings.WARMUP_ENABLED:
+    from utils.warmup import warm_up
+
+    warm_up()
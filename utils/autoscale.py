@@ -0,0 +1,149 @@
+import json
+import math
+import time
+from time import monotonic
+
+from celery.worker.autoscale import Autoscaler
+from django.conf import settings
+from loguru import logger
+from prometheus_client import Counter, Gauge, start_http_server
+
+from .redis_client import get_redis
+
+QUEUE_DEPTH = Gauge("celery_queue_depth", "Messages waiting in the queue.", ["queues"])
+QUEUE_LATENCY = Gauge(
+    "celery_queue_latency_seconds",
+    "Age of the oldest waiting message.",
+    ["queues"],
+)
+POOL_PROCESSES = Gauge(
+    "celery_pool_processes", "Worker pool processes.", ["queues", "hostname"]
+)
+SCALING_DECISIONS = Counter(
+    "celery_autoscale_decisions_total",
+    "Pool resizes made by the autoscaler.",
+    ["queues", "direction"],
+)
+
+
+def queue_keys(queue):
+    """The Redis lists kombu uses for ``queue``, one per priority step."""
+    options = settings.CELERY_BROKER_TRANSPORT_OPTIONS
+    sep = options.get("sep", "\x06\x16")
+    steps = options.get("priority_steps", [0, 3, 6, 9])
+    return [f"{queue}{sep}{step}" if step else queue for step in steps]
+
+
+def queue_stats(queues):
+    """
+    Return ``(depth, latency)`` for ``queues``: the number of waiting
+    messages and the age in seconds of the oldest one, taken from the
+    ``published_at`` header stamped by utils.queues.
+    """
+    keys = [key for queue in queues for key in queue_keys(queue)]
+    pipe = get_redis().pipeline(transaction=False)
+    for key in keys:
+        pipe.llen(key)
+        # kombu pushes on the left and pops on the right.
+        pipe.lindex(key, -1)
+    results = pipe.execute()
+    published = [
+        json.loads(raw).get("headers", {}).get("published_at")
+        for raw in results[1::2]
+        if raw
+    ]
+    oldest = min(filter(None, published), default=None)
+    return sum(results[0::2]), time.time() - oldest if oldest else 0.0
+
+
+class QueueDepthAutoscaler(Autoscaler):
+    """
+    Size the pool from the backlog of the queues this worker consumes
+    rather than from its own reserved messages, which prefetch limits to
+    one per process.
+
+    Scales up as soon as the backlog per process or the oldest message's
+    wait passes the high marks. Scales down one process at a time, and
+    only after both have stayed under the low marks for
+    ``AUTOSCALE_COOLDOWN`` seconds. Bounds come from ``--autoscale=max,min``.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs["keepalive"] = settings.AUTOSCALE_INTERVAL
+        super().__init__(*args, **kwargs)
+        app = self.worker.app if self.worker else None
+        self.queues = (
+            sorted(app.amqp.queues.consume_from)
+            if app and app.amqp.queues.consume_from
+            else [settings.CELERY_TASK_DEFAULT_QUEUE]
+        )
+        self.label = ",".join(self.queues)
+        self.hostname = getattr(self.worker, "hostname", "")
+        self.depth, self.latency = 0, 0.0
+        self._checked_at = None
+        self._changed_at = monotonic()
+        self._calm_since = None
+        if settings.AUTOSCALE_METRICS_PORT:
+            start_http_server(settings.AUTOSCALE_METRICS_PORT)
+
+    def _wanted(self, procs, now):
+        if procs < self.min_concurrency:
+            return self.min_concurrency
+        high = settings.AUTOSCALE_BACKLOG_HIGH
+        if self.depth > procs * high or self.latency > settings.AUTOSCALE_LATENCY_HIGH:
+            self._calm_since = None
+            wanted = max(procs + 1, math.ceil(self.depth / high))
+            return min(wanted, self.max_concurrency)
+        # Calm only if one process fewer would still be under the low mark.
+        calm = (
+            self.depth <= (procs - 1) * settings.AUTOSCALE_BACKLOG_LOW
+            and self.latency < settings.AUTOSCALE_LATENCY_LOW
+        )
+        if not calm or procs <= self.min_concurrency:
+            self._calm_since = None
+            return procs
+        self._calm_since = self._calm_since or now
+        cooldown = settings.AUTOSCALE_COOLDOWN
+        if now - self._calm_since >= cooldown and now - self._changed_at >= cooldown:
+            return procs - 1
+        return procs
+
+    def _maybe_scale(self, req=None):
+        # Also called for every incoming task; poll Redis once per interval.
+        now = monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.keepalive:
+            return False
+        self._checked_at = now
+        try:
+            self.depth, self.latency = queue_stats(self.queues)
+        except Exception as e:
+            logger.warning("Autoscaler could not read {} depth: {}", self.label, e)
+            return False
+        procs = self.processes
+        QUEUE_DEPTH.labels(self.label).set(self.depth)
+        QUEUE_LATENCY.labels(self.label).set(self.latency)
+        POOL_PROCESSES.labels(self.label, self.hostname).set(procs)
+        target = self._wanted(procs, now)
+        if target == procs:
+            return False
+        direction = "up" if target > procs else "down"
+        logger.info(
+            "Autoscaling {} {}: {} -> {} processes (depth {}, latency {:.1f}s)",
+            self.label,
+            direction,
+            procs,
+            target,
+            self.depth,
+            self.latency,
+        )
+        if target > procs:
+            self.scale_up(target - procs)
+        else:
+            self._shrink(procs - target)
+        self._changed_at, self._calm_since = now, None
+        SCALING_DECISIONS.labels(self.label, direction).inc()
+        POOL_PROCESSES.labels(self.label, self.hostname).set(self.processes)
+        return True
+
+    def info(self):
+        return {**super().info(), "depth": self.depth, "latency": self.latency}
@@ -0,0 +1,237 @@
+import datetime
+import json
+import uuid
+from decimal import Decimal
+from itertools import islice
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import JSONField, Model
+from django.utils import timezone
+
+_MISSING = object()
+_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+_PLAIN = frozenset({str, int, float, bool, Decimal, uuid.UUID, type(None)})
+
+
+def _chunks(rows, size):
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def _text(value):
+    # One value in COPY's text format.
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return "\\\\x" + bytes(value).hex()
+    if isinstance(value, (int, float, Decimal, uuid.UUID)):
+        return str(value)
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return str(value).translate(_ESCAPES)
+
+
+def _prepare(field, connection):
+    """A function turning one Python value of ``field`` into COPY text."""
+    if isinstance(field, JSONField):
+        encoder = field.encoder
+
+        def prepare(value):
+            return _text(None if value is None else json.dumps(value, cls=encoder))
+
+        return prepare
+
+    def prepare(value):
+        # Postgres parses these from their text as-is, so they skip the
+        # field's get_db_prep_save(), which dominates the cost per value.
+        if type(value) in _PLAIN or (
+            type(value) is datetime.datetime and value.tzinfo is not None
+        ):
+            return _text(value)
+        return _text(field.get_db_prep_save(value, connection))
+
+    return prepare
+
+
+def _getter(field, now):
+    """
+    A function reading ``field``'s value from a model instance or a dict.
+
+    Dicts may be keyed by name or attname, and a relation given by name may
+    hold the related instance; missing values get the field's default, and
+    auto_now fields the current time.
+    """
+    attname, name = field.attname, field.name
+    auto_now = getattr(field, "auto_now", False)
+    auto_now_add = getattr(field, "auto_now_add", False)
+    target = field.target_field.attname if field.is_relation else None
+
+    def get(row):
+        if isinstance(row, dict):
+            value = row.get(attname, _MISSING)
+            if value is _MISSING:
+                value = row.get(name, _MISSING)
+                if target and isinstance(value, Model):
+                    return getattr(value, target)
+            if value is not _MISSING:
+                return value
+            return now if auto_now or auto_now_add else field.get_default()
+        if auto_now or (auto_now_add and getattr(row, attname) is None):
+            setattr(row, attname, now)
+        return getattr(row, attname)
+
+    return get
+
+
+class _CopySource:
+    """
+    A file-like object reading COPY text from an iterator of rows, so only
+    one read buffer's worth of rows is ever held in memory.
+    """
+
+    def __init__(self, rows, fields, prepare):
+        now = timezone.now()
+        columns = [(_getter(f, now), prep) for f, prep in zip(fields, prepare)]
+        self.lines = (
+            "\t".join([prep(get(row)) for get, prep in columns]) + "\n" for row in rows
+        )
+        self.buffer = b""
+        self.count = 0
+
+    def read(self, size=-1):
+        chunks, length = [self.buffer], len(self.buffer)
+        while size < 0 or length < size:
+            line = next(self.lines, None)
+            if line is None:
+                break
+            line = line.encode()
+            chunks.append(line)
+            length += len(line)
+            self.count += 1
+        data = b"".join(chunks)
+        if size < 0:
+            size = len(data)
+        data, self.buffer = data[:size], data[size:]
+        return data
+
+
+def _write_postgres(connection, model, rows, fields, conflict, unique, update):
+    qn = connection.ops.quote_name
+    table = qn(model._meta.db_table)
+    columns = ", ".join(qn(field.column) for field in fields)
+    prepare = [_prepare(field, connection) for field in fields]
+    written = 0
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        raw = cursor.cursor
+        if conflict is None:
+            source = _CopySource(rows, fields, prepare)
+            # The raw cursor bypasses Django's wrapper, which maps driver
+            # errors onto django.db's, e.g. IntegrityError on duplicates.
+            with connection.wrap_database_errors:
+                raw.copy_expert(f"COPY {table} ({columns}) FROM STDIN", source)
+            return source.count
+        # COPY has no ON CONFLICT, so stage each batch in a temporary table
+        # and move it across with INSERT ... SELECT.
+        stage = qn(f"bulk_{model._meta.db_table}")
+        cursor.execute(
+            f"CREATE TEMPORARY TABLE IF NOT EXISTS {stage} "
+            f"(LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP"
+        )
+        cursor.execute(f"TRUNCATE {stage}")
+        if conflict == "ignore":
+            select = f"SELECT {columns} FROM {stage}"
+            action = "DO NOTHING"
+        else:
+            keys = ", ".join(qn(field.column) for field in unique)
+            # A batch may hold the same key twice; the last one wins.
+            select = (
+                f"SELECT DISTINCT ON ({keys}) {columns} FROM {stage} "
+                f"ORDER BY {keys}, ctid DESC"
+            )
+            assignments = ", ".join(
+                f"{qn(field.column)} = EXCLUDED.{qn(field.column)}" for field in update
+            )
+            action = f"({keys}) DO UPDATE SET {assignments}"
+        for batch in _chunks(rows, settings.BULK_WRITE_BATCH_SIZE):
+            with connection.wrap_database_errors:
+                raw.copy_expert(
+                    f"COPY {stage} ({columns}) FROM STDIN",
+                    _CopySource(batch, fields, prepare),
+                )
+            cursor.execute(
+                f"INSERT INTO {table} ({columns}) {select} ON CONFLICT {action}"
+            )
+            written += cursor.rowcount
+            cursor.execute(f"TRUNCATE {stage}")
+    return written
+
+
+def _write_orm(model, rows, using, conflict, unique, update):
+    written = 0
+    for batch in _chunks(rows, settings.BULK_WRITE_BATCH_SIZE):
+        objs = [model(**row) if isinstance(row, dict) else row for row in batch]
+        model._base_manager.using(using).bulk_create(
+            objs,
+            batch_size=1000,
+            ignore_conflicts=conflict == "ignore",
+            update_conflicts=conflict == "update",
+            unique_fields=[field.name for field in unique] or None,
+            update_fields=[field.name for field in update] or None,
+        )
+        written += len(objs)
+    return written
+
+
+def bulk_write(
+    model,
+    rows,
+    conflict=None,
+    unique_fields=None,
+    update_fields=None,
+    using=None,
+):
+    """
+    Insert ``rows``, model instances or dicts, into ``model``'s table and
+    return the number of rows written.
+
+    On Postgres the rows are streamed through COPY without ever being held
+    in memory all at once; elsewhere they go through ``bulk_create`` in
+    batches of ``BULK_WRITE_BATCH_SIZE``. ``conflict`` is None to fail on
+    duplicates, "ignore" to skip them, or "update" to overwrite
+    ``update_fields`` (default: every other field) of the rows matching
+    ``unique_fields``.
+
+    Like ``bulk_create``, this skips ``save()`` and model signals, so
+    derived state such as tenant counters must be reconciled afterwards.
+    """
+    if conflict not in (None, "ignore", "update"):
+        raise ValueError(f"Unknown conflict handling {conflict!r}.")
+    if conflict == "update" and not unique_fields:
+        raise ValueError("Upserts need unique_fields.")
+    opts = model._meta
+    fields = [field for field in opts.concrete_fields if not field.generated]
+    unique = [opts.get_field(name) for name in unique_fields or ()]
+    update = []
+    if conflict == "update":
+        update = [
+            opts.get_field(name)
+            for name in update_fields
+            or [
+                f.name
+                for f in fields
+                if f not in unique
+                and not f.primary_key
+                and not getattr(f, "auto_now_add", False)
+            ]
+        ]
+    using = using or router.db_for_write(model)
+    connection = connections[using]
+    if connection.vendor == "postgresql":
+        return _write_postgres(
+            connection, model, rows, fields, conflict, unique, update
+        )
+    return _write_orm(model, rows, using, conflict, unique, update)
@@ -0,0 +1,170 @@
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from loguru import logger
+from prometheus_client import Counter
+
+# Namespace for entries that don't belong to one tenant.
+GLOBAL = "global"
+
+_requests = Counter(
+    "cache_requests_total",
+    "Tenant cache lookups by cache name and result.",
+    ["name", "result"],
+)
+
+_executor = None
+_lock = threading.Lock()
+
+
+def _cache():
+    return caches[settings.TENANT_CACHE_ALIAS]
+
+
+def _generation_key(namespace):
+    return f"gen:{namespace}"
+
+
+def generation(namespace):
+    """
+    Return the current generation of ``namespace``, starting one if needed.
+
+    A new generation starts from the clock rather than 0, so a counter
+    evicted from Redis can't bring back entries from before it.
+    """
+    key = _generation_key(namespace)
+    value = _cache().get(key)
+    if value is None:
+        _cache().add(key, time.time_ns(), timeout=None)
+        value = _cache().get(key)
+    return value
+
+
+def invalidate(namespace):
+    """Drop every entry in ``namespace`` by moving it to a new generation."""
+    key = _generation_key(namespace)
+    try:
+        try:
+            _cache().incr(key)
+        except ValueError:
+            _cache().add(key, time.time_ns(), timeout=None)
+    except Exception as e:
+        logger.warning("Cache invalidation for {} failed: {}", namespace, e)
+
+
+def _entry_key(name, namespace, vary):
+    digest = hashlib.sha1(repr(vary).encode()).hexdigest()
+    return f"{name}:{namespace}:{generation(namespace)}:{digest}"
+
+
+def _store(key, value, ttl, stale_ttl):
+    _cache().set(key, (time.time() + ttl, value), timeout=ttl + stale_ttl)
+
+
+def _safely(action, *args):
+    try:
+        action(*args)
+    except Exception as e:
+        logger.warning("Cache write failed: {}", e)
+
+
+def _refresh(name, key, compute, ttl, stale_ttl):
+    try:
+        _store(key, compute(), ttl, stale_ttl)
+    except Exception as e:
+        logger.warning("Background refresh of {} failed: {}", name, e)
+    finally:
+        _safely(_cache().delete, f"lock:{key}")
+        connections.close_all()
+
+
+def _refresh_later(name, key, compute, ttl, stale_ttl):
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                settings.TENANT_CACHE_REFRESH_WORKERS, thread_name_prefix="cache"
+            )
+    _executor.submit(_refresh, name, key, compute, ttl, stale_ttl)
+
+
+def _compute_once(name, key, compute, ttl, stale_ttl):
+    # One caller computes; the rest wait for its result rather than all
+    # hitting the database at once. A caller that waits too long gives up
+    # and computes it too.
+    lock = f"lock:{key}"
+    timeout = settings.TENANT_CACHE_LOCK_TIMEOUT
+    deadline = time.monotonic() + timeout
+    try:
+        while not (locked := _cache().add(lock, 1, timeout=timeout)):
+            if time.monotonic() > deadline:
+                break
+            time.sleep(0.05)
+            if (entry := _cache().get(key)) is not None:
+                return entry[1]
+    except Exception as e:
+        logger.warning("Cache lock for {} failed: {}", name, e)
+        return compute()
+    try:
+        value = compute()
+        _safely(_store, key, value, ttl, stale_ttl)
+        return value
+    finally:
+        # A caller that gave up waiting leaves the lock to its holder.
+        if locked:
+            _safely(_cache().delete, lock)
+
+
+def get_or_set(name, compute, namespace=GLOBAL, vary=(), ttl=None, stale_ttl=None):
+    """
+    Return ``compute()`` for ``name`` in ``namespace`` (usually a tenant id),
+    cached for ``ttl`` seconds.
+
+    ``vary`` is anything with a stable repr that the result depends on,
+    e.g. query parameters. For ``stale_ttl`` seconds after an entry
+    expires it is still served while a background thread recomputes it.
+    Concurrent misses on a key share a single computation. When the cache
+    is unavailable ``compute()`` is called directly.
+    """
+    ttl = ttl or settings.TENANT_CACHE_TTL
+    if stale_ttl is None:
+        stale_ttl = settings.TENANT_CACHE_STALE_TTL
+    try:
+        key = _entry_key(name, namespace, vary)
+        entry = _cache().get(key)
+    except Exception as e:
+        logger.warning("Cache lookup for {} failed: {}", name, e)
+        _requests.labels(name, "error").inc()
+        return compute()
+    if entry is None:
+        _requests.labels(name, "miss").inc()
+        return _compute_once(name, key, compute, ttl, stale_ttl)
+    fresh_until, value = entry
+    if time.time() < fresh_until:
+        _requests.labels(name, "hit").inc()
+        return value
+    _requests.labels(name, "stale").inc()
+    lock_timeout = settings.TENANT_CACHE_LOCK_TIMEOUT
+    try:
+        # Only the caller that takes the lock refreshes, in any process.
+        if _cache().add(f"lock:{key}", 1, timeout=lock_timeout):
+            _refresh_later(name, key, compute, ttl, stale_ttl)
+    except Exception as e:
+        logger.warning("Cache lock for {} failed: {}", name, e)
+    return value
+
+
+def _reset_executor():
+    # Executor threads don't survive fork(), e.g. gunicorn --preload.
+    global _executor, _lock
+    _executor, _lock = None, threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_executor)
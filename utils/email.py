@@ -2,6 +2,8 @@ from django.core.mail import EmailMultiAlternatives
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 
+from utils import tracing
+
 
 def send_tenant_email(
     tenant, subject, to_email, template_name, context=None, from_email=None
@@ -26,4 +28,5 @@ def send_tenant_email(
     )
     email.attach_alternative(html_message, "text/html")
 
-    return email.send(fail_silently=False)
+    with tracing.span("smtp.send", "client", {"smtp.host": tenant.email_host}):
+        return email.send(fail_silently=False)
@@ -0,0 +1,161 @@
+import asyncio
+import os
+import threading
+
+import aiosmtplib
+from django.conf import settings
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.mail.message import sanitize_address
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+class AsyncSMTPEngine:
+    """
+    One asyncio loop, on its own thread, that keeps many SMTP sessions in
+    flight for the whole process.
+
+    At most ``max_in_flight`` sessions run at once, and at most
+    ``per_account`` per SMTP account (host, port and username, i.e. per
+    tenant), so one tenant's burst can't take every slot or trip its
+    provider's limits. ``submit()`` blocks once ``max_pending`` messages
+    are waiting, pushing back on the callers instead of queueing without
+    bound.
+    """
+
+    def __init__(self, max_in_flight, per_account, max_pending):
+        self.per_account = per_account
+        self._pending = threading.BoundedSemaphore(max_pending)
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+        # account -> [semaphore, messages holding or waiting for it]. Only
+        # touched on the loop thread; entries go once their last message
+        # does, so the dict never outgrows the accounts with mail pending.
+        self._accounts = {}
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(
+            target=self.loop.run_forever, name="smtp-engine", daemon=True
+        )
+        self.thread.start()
+
+    def submit(self, message, **params):
+        """
+        Send ``message`` (bytes) with ``aiosmtplib.send(**params)``.
+        Returns a ``concurrent.futures.Future``.
+        """
+        self._pending.acquire()
+        future = asyncio.run_coroutine_threadsafe(
+            self._send(message, params), self.loop
+        )
+        future.add_done_callback(lambda _: self._pending.release())
+        return future
+
+    async def _send(self, message, params):
+        account = (params.get("hostname"), params.get("port"), params.get("username"))
+        entry = self._accounts.get(account)
+        if entry is None:
+            entry = self._accounts[account] = [asyncio.Semaphore(self.per_account), 0]
+        entry[1] += 1
+        try:
+            # Wait for the account's slot first, so a throttled tenant doesn't
+            # hold global slots while it waits.
+            async with entry[0], self._in_flight:
+                return await aiosmtplib.send(message, **params)
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._accounts[account]
+
+
+def get_engine():
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = AsyncSMTPEngine(
+                settings.EMAIL_ASYNC_MAX_IN_FLIGHT,
+                settings.EMAIL_ASYNC_ACCOUNT_CONCURRENCY,
+                settings.EMAIL_ASYNC_MAX_PENDING,
+            )
+        return _engine
+
+
+def _reset_engine():
+    # The loop thread doesn't survive fork(), e.g. in the celery prefork pool.
+    global _engine, _engine_lock
+    _engine, _engine_lock = None, threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_engine)
+
+
+class AsyncSMTPBackend(BaseEmailBackend):
+    """
+    A drop-in for Django's SMTP backend that delivers through the shared
+    ``AsyncSMTPEngine``. Messages passed to one ``send_messages()`` call go
+    out concurrently, and so do calls from different threads, e.g. a
+    ``--pool threads`` email worker.
+    """
+
+    def __init__(
+        self,
+        host=None,
+        port=None,
+        username=None,
+        password=None,
+        use_tls=None,
+        use_ssl=None,
+        timeout=None,
+        fail_silently=False,
+        **kwargs,
+    ):
+        super().__init__(fail_silently=fail_silently)
+        self.host = host or settings.EMAIL_HOST
+        self.port = port or settings.EMAIL_PORT
+        self.username = settings.EMAIL_HOST_USER if username is None else username
+        self.password = settings.EMAIL_HOST_PASSWORD if password is None else password
+        self.use_tls = settings.EMAIL_USE_TLS if use_tls is None else use_tls
+        self.use_ssl = settings.EMAIL_USE_SSL if use_ssl is None else use_ssl
+        self.timeout = settings.EMAIL_TIMEOUT if timeout is None else timeout
+        if self.use_ssl and self.use_tls:
+            raise ValueError(
+                "EMAIL_USE_TLS/EMAIL_USE_SSL are mutually exclusive, so only set "
+                "one of those settings to True."
+            )
+
+    def _submit(self, engine, message):
+        encoding = message.encoding or settings.DEFAULT_CHARSET
+        return engine.submit(
+            message.message().as_bytes(linesep="\r\n"),
+            sender=sanitize_address(message.from_email, encoding),
+            recipients=[
+                sanitize_address(addr, encoding) for addr in message.recipients()
+            ],
+            hostname=self.host,
+            port=self.port,
+            username=self.username or None,
+            password=self.password or None,
+            use_tls=self.use_ssl,
+            start_tls=self.use_tls,
+            timeout=self.timeout or 60,
+        )
+
+    def send_messages(self, email_messages):
+        if not email_messages:
+            return 0
+        engine = get_engine()
+        futures = [
+            self._submit(engine, message)
+            for message in email_messages
+            if message.recipients()
+        ]
+        sent = 0
+        for future in futures:
+            try:
+                future.result()
+            except Exception:
+                if not self.fail_silently:
+                    raise
+            else:
+                sent += 1
+        return sent
@@ -0,0 +1,155 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections, transaction
+from django.http import JsonResponse
+from django.views.decorators.cache import never_cache
+from loguru import logger
+from prometheus_client import Gauge, Histogram
+
+from utils.redis_client import get_redis
+
+_latency = Histogram(
+    "health_probe_seconds",
+    "Readiness probe latency by dependency.",
+    ["dependency"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+_up = Gauge(
+    "health_probe_up", "Whether the last readiness probe passed.", ["dependency"]
+)
+
+_executor = None
+# name -> the probe's last future. A probe still running from an earlier
+# round isn't submitted again, so each dependency holds at most one thread.
+_running = {}
+_lock = threading.Lock()
+_last = (0.0, None)
+
+
+def _database():
+    connection = connections["default"]
+    try:
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                if connection.vendor == "postgresql":
+                    timeout = int(settings.HEALTH_PROBE_TIMEOUT * 1000)
+                    cursor.execute(f"SET LOCAL statement_timeout = {timeout}")
+                cursor.execute("SELECT 1")
+    except Exception:
+        # Don't keep a broken connection in the probe thread.
+        connection.close()
+        raise
+
+
+def _broker():
+    get_redis().ping()
+
+
+def _cache():
+    caches[settings.TENANT_CACHE_ALIAS].get("health:probe")
+
+
+PROBES = {
+    "database": _database,
+    "broker": _broker,
+    "cache": _cache,
+}
+
+
+def _timed(probe):
+    start = time.perf_counter()
+    probe()
+    return time.perf_counter() - start
+
+
+def probe():
+    """
+    Run every dependency probe concurrently, each bounded by
+    ``HEALTH_PROBE_TIMEOUT`` seconds, and return ``{name: result}``.
+    A probe that is still running from an earlier call counts as timed
+    out. Callers serialize through ``cached_probe()``.
+    """
+    global _executor
+    timeout = settings.HEALTH_PROBE_TIMEOUT
+    start = time.perf_counter()
+    if _executor is None:
+        # One thread per dependency, and at most one probe per dependency in
+        # flight, so a hung probe can't hold up the others.
+        _executor = ThreadPoolExecutor(len(PROBES), thread_name_prefix="health")
+    hung = {name for name, future in _running.items() if not future.done()}
+    for name, check in PROBES.items():
+        if name not in hung:
+            _running[name] = _executor.submit(_timed, check)
+    results = {}
+    for name, future in _running.items():
+        remaining = max(0.0, start + timeout - time.perf_counter())
+        try:
+            if name in hung:
+                raise FutureTimeout
+            elapsed = future.result(timeout=remaining)
+            results[name] = {"ok": True, "latency_ms": round(elapsed * 1000, 2)}
+        except FutureTimeout:
+            elapsed = timeout
+            results[name] = {"ok": False, "error": f"timed out after {timeout}s"}
+        except Exception as e:
+            elapsed = time.perf_counter() - start
+            results[name] = {"ok": False, "error": str(e) or type(e).__name__}
+        _latency.labels(name).observe(elapsed)
+        _up.labels(name).set(results[name]["ok"])
+        if not results[name]["ok"]:
+            logger.warning(
+                "Readiness probe {} failed: {}", name, results[name]["error"]
+            )
+    return results
+
+
+def cached_probe():
+    """
+    ``probe()``, reusing the last result for ``HEALTH_CACHE_SECONDS`` so a
+    burst of load balancer checks costs one round of probes.
+    """
+    global _last
+    with _lock:
+        checked_at, results = _last
+        if (
+            results is None
+            or time.monotonic() - checked_at > settings.HEALTH_CACHE_SECONDS
+        ):
+            results = probe()
+            _last = (time.monotonic(), results)
+        return results
+
+
+@never_cache
+def liveness(request):
+    """The process is up and serving requests; dependencies aren't checked."""
+    return JsonResponse({"status": "ok"})
+
+
+@never_cache
+def readiness(request):
+    """200 when the database, broker and cache all answer in time, else 503."""
+    checks = cached_probe()
+    ready = all(check["ok"] for check in checks.values())
+    return JsonResponse(
+        {"status": "ok" if ready else "unavailable", "checks": checks},
+        status=200 if ready else 503,
+    )
+
+
+def _reset():
+    # Probe threads don't survive fork(), e.g. gunicorn --preload.
+    global _executor, _lock, _last
+    _executor = None
+    _running.clear()
+    _lock, _last = threading.Lock(), (0.0, None)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset)
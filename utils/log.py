@@ -0,0 +1,112 @@
+import logging
+import logging.config
+import os
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener
+
+from loguru import logger as loguru_logger
+
+_queue_handlers = []
+
+
+def _get_handler(name):
+    # logging.getHandlerByName() only exists on Python 3.12+.
+    handler = logging._handlers.get(name)
+    if handler is None:
+        raise ValueError(
+            f"Handler {name!r} is not configured yet; queue handlers must sort "
+            "after the handlers they feed in LOGGING['handlers']."
+        )
+    return handler
+
+
+class QueueListenerHandler(QueueHandler):
+    """
+    Enqueue records on the calling thread and hand them to the real
+    handlers from a background listener thread.
+
+    ``handlers`` is a list of handler names from the same ``LOGGING``
+    dict. dictConfig configures handlers in sorted order, so queue
+    handlers are named ``queue_*`` to be built after their targets.
+    """
+
+    def __init__(self, handlers, respect_handler_level=True):
+        super().__init__(queue.SimpleQueue())
+        self.listener = QueueListener(
+            self.queue,
+            *[_get_handler(name) for name in handlers],
+            respect_handler_level=respect_handler_level,
+        )
+        self.listener.start()
+        _queue_handlers.append(self)
+
+    def prepare(self, record):
+        # Records never leave the process, so skip the eager formatting the
+        # stdlib does for pickling and only merge the arguments, which may be
+        # mutated by the caller once we return.
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def close(self):
+        # logging.shutdown() closes handlers newest first, so the queue is
+        # drained into its targets before they are closed.
+        if self in _queue_handlers:
+            _queue_handlers.remove(self)
+            self.listener.stop()
+        super().close()
+
+
+class SampleFilter(logging.Filter):
+    """
+    Let through a ``rate`` fraction of records below ``level``.
+
+    Records at or above ``level`` always pass, as do SQL records from
+    ``django.db.backends`` slower than ``slow_ms``.
+    """
+
+    def __init__(self, rate=1.0, level="INFO", slow_ms=None):
+        super().__init__()
+        self.rate = float(rate)
+        self.level = logging._checkLevel(level)
+        self.slow = slow_ms / 1000 if slow_ms is not None else None
+
+    def filter(self, record):
+        if record.levelno >= self.level:
+            return True
+        if self.slow is not None and getattr(record, "duration", 0) >= self.slow:
+            return True
+        return random.random() < self.rate
+
+
+class LoguruHandler(logging.Handler):
+    """Forward loguru records into the stdlib logger of the same name."""
+
+    def emit(self, record):
+        std_logger = logging.getLogger(record.name)
+        if std_logger.isEnabledFor(record.levelno):
+            std_logger.handle(record)
+
+
+def configure(config):
+    """
+    ``LOGGING_CONFIG`` entry point: apply ``config`` with dictConfig and
+    send loguru output through the same stdlib handlers.
+    """
+    logging.config.dictConfig(config)
+    loguru_logger.remove()
+    loguru_logger.add(LoguruHandler(), format="{message}", level="DEBUG")
+
+
+def _restart_listeners():
+    # Listener threads do not survive fork(), e.g. gunicorn --preload or the
+    # celery prefork pool, so each child starts its own on a fresh queue.
+    for handler in _queue_handlers:
+        handler.queue = handler.listener.queue = queue.SimpleQueue()
+        handler.listener._thread = None
+        handler.listener.start()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_listeners)
@@ -0,0 +1,126 @@
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.middleware.gzip import GZipMiddleware
+from loguru import logger
+from rest_framework.exceptions import APIException
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from utils import query_budget, tracing
+from utils.profiling import Profile
+
+
+class ThresholdGZipMiddleware(GZipMiddleware):
+    """
+    Compress only responses of at least ``RESPONSE_COMPRESSION_MIN_SIZE``
+    bytes. Small payloads gain little and cost CPU on both ends.
+    """
+
+    def process_response(self, request, response):
+        if (
+            not response.streaming
+            and len(response.content) < settings.RESPONSE_COMPRESSION_MIN_SIZE
+        ):
+            return response
+        return super().process_response(request, response)
+
+
+class ProfilingMiddleware:
+    """
+    Profile a request when the ``PROFILING_HEADER`` header is sent with a
+    staff user's token.
+
+    The response gets a ``Server-Timing`` breakdown and an ``X-Profile-Id``.
+    The cProfile stats and SQL trace stay downloadable for
+    ``PROFILING_TTL`` seconds. Requests without the header only pay for one
+    ``request.META`` lookup.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.header = "HTTP_" + settings.PROFILING_HEADER.upper().replace("-", "_")
+
+    def __call__(self, request):
+        if self.header not in request.META or not self._is_staff(request):
+            return self.get_response(request)
+        profile = request._profile = Profile()
+        with profile.collect():
+            response = self.get_response(request)
+        response["Server-Timing"] = profile.server_timing()
+        try:
+            profile.save(request, response)
+            response["X-Profile-Id"] = profile.id
+        except Exception as e:
+            logger.warning("Storing profile {} failed: {}", profile.id, e)
+        return response
+
+    def _is_staff(self, request):
+        # DRF authenticates inside the view, too late to start profiling.
+        try:
+            result = JWTAuthentication().authenticate(request)
+        except APIException:
+            return False
+        return result is not None and result[0].is_staff
+
+    def process_template_response(self, request, response):
+        profile = getattr(request, "_profile", None)
+        if profile is not None:
+            start = time.perf_counter()
+
+            def rendered(response):
+                profile.timings["serialize"] += time.perf_counter() - start
+
+            response.add_post_render_callback(rendered)
+        return response
+
+
+class QueryBudgetMiddleware:
+    """
+    Count each request's queries and check them against the view's
+    ``query_budget``. ``QUERY_BUDGET_MODE`` is "off", "warn" or "raise".
+    """
+
+    def __init__(self, get_response):
+        if settings.QUERY_BUDGET_MODE == "off":
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with query_budget.count_queries() as queries:
+            response = self.get_response(request)
+        query_budget.check(request, queries.count)
+        return response
+
+
+class TracingMiddleware:
+    """
+    Trace each request in a server span, continuing the caller's trace
+    when it sends a ``traceparent`` header, with a child span per query.
+    Not installed unless ``TRACING_EXPORTER`` is set.
+    """
+
+    def __init__(self, get_response):
+        if not tracing.enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        attributes = {"http.method": request.method, "http.target": request.path}
+        with tracing.span(
+            request.method,
+            "server",
+            attributes,
+            parent=request.headers.get("traceparent"),
+        ) as span:
+            with tracing.trace_queries():
+                response = self.get_response(request)
+            match = request.resolver_match
+            if match is not None:
+                span.name = f"{request.method} /{match.route}"
+                attributes["http.route"] = match.route
+                attributes["code.function"] = match.view_name
+            attributes["http.status_code"] = response.status_code
+            if response.status_code >= 500:
+                span.error = response.reason_phrase
+        return response
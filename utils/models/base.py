@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import DEFERRED
 
 
 class TimeStampedModel(models.Model):
@@ -12,3 +13,23 @@ class TimeStampedModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class LoadedValuesModel(models.Model):
+    """
+    An abstract base model that remembers the field values an instance
+    was loaded with in '_loaded_values', keyed by attname.
+    """
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            name: value
+            for name, value in zip(field_names, values)
+            if value is not DEFERRED
+        }
+        return instance
@@ -0,0 +1,203 @@
+import cProfile
+import functools
+import io
+import json
+import marshal
+import pstats
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from celery.signals import after_task_publish, before_task_publish
+from django.conf import settings
+from django.db import connections
+from loguru import logger
+from rest_framework.serializers import BaseSerializer
+
+from utils.redis_client import get_redis
+
+KEY_PREFIX = "profiling:"
+# Buckets reported in Server-Timing, in order. "total" is added last.
+# "serialize" covers building serializer data and rendering the response.
+BUCKETS = ("auth", "db", "broker", "serialize")
+
+_timings = ContextVar("profiling_timings", default=None)
+_publish_started = ContextVar("profiling_publish_started", default=None)
+
+
+@contextmanager
+def timer(name):
+    """
+    Add the time spent in the block to bucket ``name`` of the request being
+    profiled, less what nested timers and queries already counted. Outside
+    a profiled request this costs one context lookup.
+    """
+    timings = _timings.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    counted = sum(timings.values())
+    try:
+        yield
+    finally:
+        nested = sum(timings.values()) - counted
+        timings[name] += time.perf_counter() - start - nested
+
+
+def _timed_data(prop):
+    @functools.wraps(prop.fget)
+    def data(self):
+        with timer("serialize"):
+            return prop.fget(self)
+
+    return property(data)
+
+
+_untimed_data = BaseSerializer.data
+_timed_serializers = 0
+_patch_lock = threading.Lock()
+
+
+@contextmanager
+def _time_serializers():
+    # Views evaluate their serializers through ``.data``, so time it there;
+    # querysets it evaluates still count as "db". The patch is only in
+    # place while some request is being profiled, so others don't pay for it.
+    global _timed_serializers
+    with _patch_lock:
+        if not _timed_serializers:
+            BaseSerializer.data = _timed_data(_untimed_data)
+        _timed_serializers += 1
+    try:
+        yield
+    finally:
+        with _patch_lock:
+            _timed_serializers -= 1
+            if not _timed_serializers:
+                BaseSerializer.data = _untimed_data
+
+
+@before_task_publish.connect
+def _publish_start(**kwargs):
+    if _timings.get() is not None:
+        _publish_started.set(time.perf_counter())
+
+
+@after_task_publish.connect
+def _publish_end(**kwargs):
+    timings, start = _timings.get(), _publish_started.get()
+    if timings is not None and start is not None:
+        timings["broker"] += time.perf_counter() - start
+        _publish_started.set(None)
+
+
+class Profile:
+    """cProfile, a SQL trace and per-bucket timings for one request."""
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.timings = defaultdict(float)
+        self.queries = []
+        self.profiler = cProfile.Profile()
+        self.total = 0.0
+
+    def _trace_sql(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.timings["db"] += duration
+            if len(self.queries) < settings.PROFILING_MAX_QUERIES:
+                # Params are left out: they hold emails, password hashes
+                # and tokens, and profiles are readable by the tenant's
+                # staff.
+                self.queries.append(
+                    {
+                        "alias": context["connection"].alias,
+                        "sql": sql,
+                        "ms": round(duration * 1000, 3),
+                    }
+                )
+
+    @contextmanager
+    def collect(self):
+        token = _timings.set(self.timings)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                stack.enter_context(_time_serializers())
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(self._trace_sql))
+                self.profiler.enable()
+                try:
+                    yield self
+                finally:
+                    self.profiler.disable()
+        finally:
+            self.total = time.perf_counter() - start
+            _timings.reset(token)
+
+    def server_timing(self):
+        entries = [f"{name};dur={self.timings[name] * 1000:.1f}" for name in BUCKETS]
+        entries[1] += f';desc="{len(self.queries)} queries"'
+        entries.append(f"total;dur={self.total * 1000:.1f}")
+        return ", ".join(entries)
+
+    @staticmethod
+    def _top(stats, limit=30):
+        out = io.StringIO()
+        stats.stream = out
+        stats.sort_stats("cumulative").print_stats(limit)
+        return out.getvalue()
+
+    def save(self, request, response):
+        """Store the profile in Redis for ``PROFILING_TTL`` seconds."""
+        stats = pstats.Stats(self.profiler)
+        meta = {
+            "id": self.id,
+            "method": request.method,
+            "path": request.get_full_path(),
+            "status": response.status_code,
+            "user": str(request.user.pk),
+            "tenant": str(request.user.tenant_id),
+            "timings_ms": {
+                name: round(self.timings[name] * 1000, 3) for name in BUCKETS
+            },
+            "total_ms": round(self.total * 1000, 3),
+            "queries": self.queries,
+            "top": self._top(stats),
+        }
+        key = f"{KEY_PREFIX}{self.id}"
+        redis = get_redis()
+        redis.hset(
+            key,
+            mapping={
+                "tenant": meta["tenant"],
+                "meta": json.dumps(meta, default=str),
+                "stats": marshal.dumps(stats.stats),
+            },
+        )
+        redis.expire(key, settings.PROFILING_TTL)
+
+
+def load(profile_id, field, user):
+    """
+    Return a stored profile field ("meta" or "stats"), or ``None`` when it
+    is missing or was recorded in another tenant than ``user``'s.
+    Superusers can read every tenant's profiles.
+    """
+    try:
+        tenant, value = get_redis().hmget(
+            f"{KEY_PREFIX}{profile_id}", ["tenant", field]
+        )
+    except Exception as e:
+        logger.warning("Loading profile {} failed: {}", profile_id, e)
+        return None
+    if not user.is_superuser and tenant != str(user.tenant_id).encode():
+        return None
+    return value
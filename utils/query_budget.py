@@ -0,0 +1,60 @@
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from loguru import logger
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryCounter:
+    """A ``connection.execute_wrapper`` that counts queries."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def count_queries():
+    counter = QueryCounter()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(counter))
+        yield counter
+
+
+def budget_for(view_class, method):
+    """
+    The ``query_budget`` a view declares for ``method``: an int, or a
+    ``{method: int}`` dict. ``None`` means unchecked.
+    """
+    budget = getattr(view_class, "query_budget", None)
+    if isinstance(budget, dict):
+        budget = budget.get(method)
+    return budget
+
+
+def check(request, count, mode=None):
+    """
+    Compare ``count`` against the budget of the view ``request`` resolved
+    to. Over budget, log a warning or, in ``"raise"`` mode, raise
+    ``QueryBudgetExceeded``.
+    """
+    match = request.resolver_match
+    view_class = getattr(match.func, "view_class", None) if match else None
+    budget = budget_for(view_class, request.method)
+    if budget is None or count <= budget:
+        return
+    message = (
+        f"{request.method} {request.path} ran {count} queries, over the "
+        f"{view_class.__name__} budget of {budget}"
+    )
+    if (mode or settings.QUERY_BUDGET_MODE) == "raise":
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
@@ -0,0 +1,18 @@
+from functools import lru_cache
+
+import redis
+from django.conf import settings
+
+
+@lru_cache(maxsize=None)
+def get_redis(url=None):
+    """
+    Return a shared client for ``url``, defaulting to the Celery broker.
+
+    Timeouts are short because callers treat Redis as best effort.
+    """
+    return redis.Redis.from_url(
+        url or settings.CELERY_BROKER_URL,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+    )
@@ -0,0 +1,21 @@
+import msgpack
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# Reuse DRF's conversions for dates, UUIDs, decimals and lazy strings so both
+# formats carry the same values.
+_encoder = JSONEncoder()
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Compact binary responses for clients that send ``Accept: application/msgpack``."""
+
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=_encoder.default, use_bin_type=True)
@@ -0,0 +1,184 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from utils import autoscale
+
+NOW = 1_000_000.0
+
+
+class StubPool:
+    """Just the pool surface the autoscaler drives."""
+
+    def __init__(self, processes):
+        self.num_processes = processes
+        self.resizes = []
+
+    def grow(self, n):
+        self.num_processes += n
+        self.resizes.append(n)
+
+    def shrink(self, n):
+        self.num_processes -= n
+        self.resizes.append(-n)
+
+    def maintain_pool(self):
+        pass
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """The autoscaler's monotonic clock and wall clock, moved by hand."""
+    now = SimpleNamespace(value=0.0)
+    monkeypatch.setattr(autoscale, "monotonic", lambda: now.value)
+    monkeypatch.setattr(autoscale, "time", SimpleNamespace(time=lambda: NOW))
+    return now
+
+
+@pytest.fixture
+def scaler(settings, clock):
+    settings.AUTOSCALE_METRICS_PORT = 0
+
+    def make(processes=2, max_concurrency=8, min_concurrency=1):
+        pool = StubPool(processes)
+        return pool, autoscale.QueueDepthAutoscaler(
+            pool, max_concurrency, min_concurrency
+        )
+
+    return make
+
+
+def _publish(redis, key, count=1, waited=0.0):
+    for _ in range(count):
+        body = {"headers": {"published_at": NOW - waited}} if waited else {}
+        # kombu pushes on the left and consumes from the right.
+        redis.lpush(key, json.dumps(body))
+
+
+def _tick(clock, scaler, seconds):
+    clock.value += seconds
+    return scaler._maybe_scale()
+
+
+def test_queue_keys_cover_every_priority_step():
+    assert autoscale.queue_keys("default") == ["default"] + [
+        f"default:{step}" for step in range(1, 10)
+    ]
+
+
+def test_queue_stats_reads_every_priority_sub_queue(redis, clock):
+    _publish(redis, "default", 2, waited=5)
+    _publish(redis, "default:6", 3, waited=40)
+    _publish(redis, "default:9", 1)
+    _publish(redis, "maintenance:3", 4, waited=90)
+    # Newer messages go on the left, so the tail is what waited longest.
+    _publish(redis, "default:6", 1, waited=1)
+
+    assert autoscale.queue_stats(["default"]) == (7, 40.0)
+    assert autoscale.queue_stats(["default", "maintenance"]) == (11, 90.0)
+    assert autoscale.queue_stats(["reports"]) == (0, 0.0)
+
+
+def test_backlog_grows_the_pool_in_one_step(redis, scaler, clock):
+    pool, autoscaler = scaler(processes=2)
+    _publish(redis, "default:3", 50)
+
+    autoscaler.maybe_scale()
+
+    # 50 waiting at 10 per process.
+    assert pool.resizes == [3]
+    assert (autoscaler.depth, autoscaler.latency) == (50, 0.0)
+
+
+def test_growth_stops_at_max_concurrency(redis, scaler):
+    pool, autoscaler = scaler(processes=2, max_concurrency=4)
+    _publish(redis, "default", 500)
+
+    autoscaler.maybe_scale()
+
+    assert pool.num_processes == 4
+
+
+def test_old_messages_grow_the_pool_one_process_at_a_time(redis, scaler, clock):
+    pool, autoscaler = scaler(processes=2)
+    _publish(redis, "default:9", 1, waited=60)
+
+    autoscaler.maybe_scale()
+    assert pool.resizes == [1]
+    # Redis is read once per interval, however many tasks arrive.
+    assert _tick(clock, autoscaler, 1) is False
+    assert pool.resizes == [1]
+
+
+def test_backlog_between_the_marks_keeps_the_pool(redis, scaler, clock):
+    pool, autoscaler = scaler(processes=4)
+    _publish(redis, "default", 20, waited=10)
+
+    for _ in range(100):
+        _tick(clock, autoscaler, 5)
+
+    assert pool.resizes == []
+
+
+def test_shrinks_one_process_per_cooldown_once_calm(settings, redis, scaler, clock):
+    pool, autoscaler = scaler(processes=4, min_concurrency=2)
+    cooldown = settings.AUTOSCALE_COOLDOWN
+
+    # Calm, but the pool was (as far as it knows) just sized.
+    _tick(clock, autoscaler, 5)
+    _tick(clock, autoscaler, cooldown - 10)
+    assert pool.resizes == []
+    _tick(clock, autoscaler, 10)
+    assert pool.resizes == [-1]
+
+    # The calm spell restarts after each resize.
+    _tick(clock, autoscaler, 5)
+    _tick(clock, autoscaler, cooldown - 10)
+    assert pool.resizes == [-1]
+    _tick(clock, autoscaler, 10)
+    assert pool.resizes == [-1, -1]
+
+    # Never below --autoscale's minimum.
+    for _ in range(10):
+        _tick(clock, autoscaler, cooldown)
+    assert pool.num_processes == 2
+
+
+def test_a_burst_resets_the_calm_spell(settings, redis, scaler, clock):
+    pool, autoscaler = scaler(processes=4)
+    cooldown = settings.AUTOSCALE_COOLDOWN
+    _tick(clock, autoscaler, cooldown)
+    _tick(clock, autoscaler, 5)
+    assert pool.resizes == []
+
+    # 8 waiting fits 4 processes but not 3 at the low mark: not calm.
+    _publish(redis, "default:6", 8)
+    _tick(clock, autoscaler, cooldown)
+    redis.delete("default:6")
+    _tick(clock, autoscaler, 5)
+    _tick(clock, autoscaler, cooldown - 5)
+    assert pool.resizes == []
+
+    _tick(clock, autoscaler, 5)
+    assert pool.resizes == [-1]
+
+
+def test_pool_below_its_minimum_is_topped_up(redis, scaler):
+    pool, autoscaler = scaler(processes=1, min_concurrency=3)
+
+    autoscaler.maybe_scale()
+
+    assert pool.resizes == [2]
+
+
+def test_unreadable_broker_leaves_the_pool(monkeypatch, scaler):
+    pool, autoscaler = scaler(processes=2)
+
+    def broken(queues):
+        raise ConnectionError("broker down")
+
+    monkeypatch.setattr(autoscale, "queue_stats", broken)
+
+    assert autoscaler._maybe_scale() is False
+    assert pool.resizes == []
@@ -0,0 +1,117 @@
+import datetime
+
+import pytest
+from django.db import IntegrityError
+from django.utils import timezone
+
+from accounts.models import AuditEvent, Tenant, User
+from utils.bulk import bulk_write
+
+AWKWARD = ["tab\there", "new\nline", "cr\rhere", "back\\slash", "\\N", "ünï"]
+
+
+def _users(tenant, names, **extra):
+    return [
+        {
+            "email": f"user{i}@harare.example.com",
+            "first_name": name,
+            "tenant_id": tenant.pk,
+            "password": "!",
+            **extra,
+        }
+        for i, name in enumerate(names)
+    ]
+
+
+def test_text_is_escaped(tenant):
+    assert bulk_write(User, _users(tenant, AWKWARD)) == len(AWKWARD)
+
+    stored = User.objects.order_by("email").values_list("first_name", flat=True)
+    assert list(stored) == AWKWARD
+
+
+def test_nulls_and_defaults(tenant):
+    tenants = [
+        Tenant(name="Bulawayo", domain="byo.example.com", email_host=None),
+        {"name": "Mutare", "domain": "mutare.example.com", "email_port": None},
+    ]
+
+    assert bulk_write(Tenant, tenants) == 2
+
+    for tenant in Tenant.objects.filter(name__in=["Bulawayo", "Mutare"]):
+        assert tenant.email_host is None and tenant.email_port is None
+        assert tenant.is_active is True
+        assert tenant.created_at is not None
+
+
+def test_json_columns(tenant):
+    changes = {
+        "note": 'quote " tab\t back\\slash',
+        "when": datetime.date(2026, 1, 31),
+        "nested": [1, None, {"ok": True}],
+    }
+    event = {
+        "tenant_id": tenant.pk,
+        "action": "user.updated",
+        "target_type": "user",
+        "target_id": "1",
+        "changes": changes,
+    }
+
+    assert bulk_write(AuditEvent, [event, {**event, "target_id": "2"}]) == 2
+
+    stored = AuditEvent.objects.get(target_id="1").changes
+    assert stored == {**changes, "when": "2026-01-31"}
+    assert AuditEvent.objects.get(target_id="2").created_at <= timezone.now()
+
+
+def test_relations_can_be_given_as_instances(tenant, branch):
+    row = {"email": "till@harare.example.com", "tenant": tenant, "branch": branch}
+
+    assert bulk_write(User, [row]) == 1
+
+    user = User.objects.get(email=row["email"])
+    assert (user.tenant_id, user.branch_id) == (tenant.pk, branch.pk)
+
+
+def test_duplicates_fail_without_conflict_handling(tenant):
+    bulk_write(User, _users(tenant, ["Rudo"]))
+
+    with pytest.raises(IntegrityError):
+        bulk_write(User, _users(tenant, ["Rudo"]))
+
+
+def test_ignore_skips_existing_rows(tenant):
+    bulk_write(User, _users(tenant, ["Rudo"]))
+
+    written = bulk_write(User, _users(tenant, ["Tendai", "Chipo"]), conflict="ignore")
+
+    assert written == 1
+    assert User.objects.get(email="user0@harare.example.com").first_name == "Rudo"
+    assert User.objects.get(email="user1@harare.example.com").first_name == "Chipo"
+
+
+def test_update_overwrites_only_the_listed_fields(tenant):
+    bulk_write(User, _users(tenant, ["Rudo"], last_name="Moyo"))
+    rows = _users(tenant, ["Tendai"], last_name="Banda")
+    # The same key twice in one batch: the last row wins.
+    rows.append({**rows[0], "first_name": "Chipo"})
+
+    written = bulk_write(
+        User,
+        rows,
+        conflict="update",
+        unique_fields=["email"],
+        update_fields=["first_name"],
+    )
+
+    assert written == 1
+    user = User.objects.get(email="user0@harare.example.com")
+    assert (user.first_name, user.last_name) == ("Chipo", "Moyo")
+
+
+def test_unknown_conflict_handling_is_rejected():
+    with pytest.raises(ValueError):
+        bulk_write(User, [], conflict="merge")
+    with pytest.raises(ValueError):
+        bulk_write(User, [], conflict="update")
@@ -0,0 +1,57 @@
+import pytest
+
+from utils import cache
+
+
+@pytest.fixture(autouse=True)
+def refreshes():
+    cache._reset_executor()
+    yield
+    if cache._executor is not None:
+        cache._executor.shutdown(wait=True)
+    cache._reset_executor()
+
+
+def _key(name):
+    return cache._entry_key(name, cache.GLOBAL, ())
+
+
+def test_miss_is_computed_once_and_stored():
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return "fresh"
+
+    assert cache.get_or_set("report", compute) == "fresh"
+    assert cache.get_or_set("report", compute) == "fresh"
+    assert len(calls) == 1
+
+
+def test_waiter_that_gives_up_leaves_the_lock(settings):
+    settings.TENANT_CACHE_LOCK_TIMEOUT = 0.1
+    lock = f"lock:{_key('report')}"
+    cache._cache().add(lock, 1, timeout=60)
+
+    assert cache.get_or_set("report", lambda: "mine") == "mine"
+    assert cache._cache().get(lock) == 1
+
+
+def test_stale_entry_is_served_while_it_is_refreshed(settings):
+    settings.TENANT_CACHE_TTL = 1
+    cache._store(_key("report"), "old", ttl=-1, stale_ttl=60)
+
+    assert cache.get_or_set("report", lambda: "new") == "old"
+    cache._executor.shutdown(wait=True)
+
+    assert cache.get_or_set("report", lambda: "newer") == "new"
+    assert cache._cache().get(f"lock:{_key('report')}") is None
+
+
+def test_invalidate_drops_the_namespace():
+    cache.get_or_set("report", lambda: "old", namespace="t1")
+    cache.get_or_set("report", lambda: "other", namespace="t2")
+    cache.invalidate("t1")
+
+    assert cache.get_or_set("report", lambda: "new", namespace="t1") == "new"
+    assert cache.get_or_set("report", lambda: "gone", namespace="t2") == "other"
@@ -0,0 +1,131 @@
+import asyncio
+import socket
+import threading
+
+import aiosmtplib
+import pytest
+from django.core.mail import EmailMessage
+
+from utils import email_backends
+from utils.email_backends import AsyncSMTPBackend
+
+
+class SMTPStub:
+    """An in-process SMTP server that records what it is sent."""
+
+    def __init__(self, latency=0.01):
+        self.latency = latency
+        self.messages = []
+        self.sessions = 0
+        self.peak_sessions = 0
+        self.loop = asyncio.new_event_loop()
+        self.server = self.loop.run_until_complete(
+            asyncio.start_server(self._session, "127.0.0.1", 0)
+        )
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+
+    async def _reply(self, writer, line):
+        await asyncio.sleep(self.latency)
+        writer.write(line)
+        await writer.drain()
+
+    async def _session(self, reader, writer):
+        self.sessions += 1
+        self.peak_sessions = max(self.peak_sessions, self.sessions)
+        try:
+            await self._reply(writer, b"220 stub ESMTP\r\n")
+            while line := await reader.readline():
+                command = line[:4].upper()
+                if command == b"EHLO":
+                    await self._reply(writer, b"250-stub\r\n250 8BITMIME\r\n")
+                elif command == b"DATA":
+                    await self._reply(writer, b"354 go ahead\r\n")
+                    body = []
+                    while (line := await reader.readline()) != b".\r\n":
+                        body.append(line)
+                    self.messages.append(b"".join(body))
+                    await self._reply(writer, b"250 queued\r\n")
+                elif command == b"QUIT":
+                    await self._reply(writer, b"221 bye\r\n")
+                    break
+                else:
+                    await self._reply(writer, b"250 ok\r\n")
+        finally:
+            self.sessions -= 1
+            writer.close()
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.server.close)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+
+@pytest.fixture
+def smtp(settings):
+    settings.EMAIL_ASYNC_MAX_IN_FLIGHT = 10
+    settings.EMAIL_ASYNC_ACCOUNT_CONCURRENCY = 2
+    settings.EMAIL_ASYNC_MAX_PENDING = 50
+    email_backends._reset_engine()
+    stub = SMTPStub()
+    yield stub
+    stub.close()
+    email_backends._reset_engine()
+
+
+def _messages(count):
+    return [
+        EmailMessage(
+            subject=f"Invitation {index}",
+            body="You have been invited.",
+            from_email="noreply@example.com",
+            to=[f"user{index}@example.com"],
+        )
+        for index in range(count)
+    ]
+
+
+def _backend(smtp, **kwargs):
+    return AsyncSMTPBackend(
+        host="127.0.0.1",
+        port=smtp.port,
+        username="",
+        password="",
+        use_tls=False,
+        use_ssl=False,
+        **kwargs,
+    )
+
+
+def test_messages_are_delivered(smtp):
+    sent = _backend(smtp).send_messages(_messages(3))
+
+    assert sent == 3
+    assert len(smtp.messages) == 3
+    assert any(b"Subject: Invitation 0" in message for message in smtp.messages)
+
+
+def test_account_concurrency_is_capped(smtp):
+    sent = _backend(smtp).send_messages(_messages(8))
+
+    assert sent == 8
+    assert smtp.peak_sessions == 2
+
+
+def test_idle_accounts_are_forgotten(smtp):
+    _backend(smtp).send_messages(_messages(4))
+
+    assert email_backends.get_engine()._accounts == {}
+
+
+def test_failures_raise_unless_silenced(smtp):
+    # Nothing listens on a port the OS just handed out and took back.
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        smtp.port = sock.getsockname()[1]
+
+    assert _backend(smtp, fail_silently=True).send_messages(_messages(2)) == 0
+    assert email_backends.get_engine()._accounts == {}
+    with pytest.raises(aiosmtplib.SMTPConnectError):
+        _backend(smtp).send_messages(_messages(1))
@@ -0,0 +1,54 @@
+import threading
+
+import pytest
+
+from utils import health
+
+
+@pytest.fixture(autouse=True)
+def probes(settings):
+    settings.HEALTH_PROBE_TIMEOUT = 0.2
+    health._reset()
+    yield
+    if health._executor is not None:
+        health._executor.shutdown(wait=True)
+    health._reset()
+
+
+@pytest.fixture
+def hung_broker(monkeypatch):
+    release = threading.Event()
+    calls = []
+
+    def broker():
+        calls.append(1)
+        release.wait(5)
+
+    monkeypatch.setitem(health.PROBES, "broker", broker)
+    yield calls
+    release.set()
+
+
+def test_all_probes_pass(db):
+    results = health.probe()
+
+    assert all(result["ok"] for result in results.values())
+    assert set(results) == set(health.PROBES)
+
+
+def test_hung_probe_is_not_resubmitted(db, hung_broker):
+    first = health.probe()
+    second = health.probe()
+
+    assert not first["broker"]["ok"]
+    assert not second["broker"]["ok"]
+    assert "timed out" in second["broker"]["error"]
+    assert second["database"]["ok"] and second["cache"]["ok"]
+    assert len(hung_broker) == 1
+
+
+def test_readiness_reports_the_failing_dependency(db, client, hung_broker):
+    response = client.get("/healthz/ready")
+
+    assert response.status_code == 503
+    assert response.json()["checks"]["broker"]["ok"] is False
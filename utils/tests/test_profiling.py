@@ -0,0 +1,83 @@
+import marshal
+import time
+
+from django.urls import reverse
+from rest_framework.serializers import BaseSerializer
+
+from accounts.models import Tenant, User
+from utils import profiling
+
+
+def _timings(header):
+    return {
+        entry.split(";")[0]: float(entry.split("dur=")[1].split(";")[0])
+        for entry in header.split(", ")
+    }
+
+
+def test_nested_timers_are_not_counted_twice():
+    profile = profiling.Profile()
+    with profile.collect():
+        with profiling.timer("serialize"):
+            with profiling.timer("db"):
+                time.sleep(0.02)
+
+    assert profile.timings["db"] >= 0.02
+    assert profile.timings["serialize"] < 0.01
+
+
+def test_profiled_request_times_serializers_and_hides_query_params(owner, api_client):
+    owner.is_staff = True
+    owner.save()
+    client = api_client(owner)
+
+    response = client.get(reverse("accounts:profile"), HTTP_X_PROFILE="1")
+    meta = client.get(
+        reverse("accounts:request_profile", args=[response["X-Profile-Id"]])
+    ).json()
+
+    assert _timings(response["Server-Timing"])["serialize"] > 0
+    assert meta["queries"]
+    assert all("params" not in query for query in meta["queries"])
+
+
+def test_serializers_are_only_timed_while_profiling():
+    untimed = BaseSerializer.__dict__["data"]
+
+    with profiling.Profile().collect():
+        assert BaseSerializer.__dict__["data"] is not untimed
+    assert BaseSerializer.__dict__["data"] is untimed
+
+
+def _profile(owner, api_client):
+    owner.is_staff = True
+    owner.save()
+    response = api_client(owner).get(reverse("accounts:profile"), HTTP_X_PROFILE="1")
+    return response["X-Profile-Id"]
+
+
+def test_stored_profile_can_be_read_and_downloaded(owner, api_client):
+    profile_id = _profile(owner, api_client)
+    client = api_client(owner)
+
+    meta = client.get(reverse("accounts:request_profile", args=[profile_id]))
+    stats = client.get(reverse("accounts:download_request_profile", args=[profile_id]))
+
+    assert meta.status_code == 200
+    assert meta.json()["path"] == reverse("accounts:profile")
+    assert stats.status_code == 200
+    assert marshal.loads(stats.content)
+
+
+def test_other_tenants_staff_cannot_read_a_profile(owner, api_client):
+    profile_id = _profile(owner, api_client)
+    other = Tenant.objects.create(name="Bulawayo", domain="byo.example.com")
+    outsider = User.objects.create_user(
+        email="admin@byo.example.com", tenant=other, role="owner", is_staff=True
+    )
+    root = User.objects.create_superuser(email="root@example.com", password="pw")
+
+    for name in ("accounts:request_profile", "accounts:download_request_profile"):
+        url = reverse(name, args=[profile_id])
+        assert api_client(outsider).get(url).status_code == 404
+        assert api_client(root).get(url).status_code == 200
@@ -0,0 +1,47 @@
+import msgpack
+from django.urls import reverse
+
+from accounts.models import User
+
+
+def test_msgpack_is_negotiated_from_accept(owner, api_client):
+    response = api_client(owner).get(
+        reverse("accounts:profile"), HTTP_ACCEPT="application/msgpack"
+    )
+
+    assert response["Content-Type"] == "application/msgpack"
+    assert msgpack.unpackb(response.content)["email"] == owner.email
+
+
+def test_msgpack_request_bodies_are_parsed(owner, api_client):
+    body = msgpack.packb({"name": "cashier", "permissions": ["SELL"]})
+
+    response = api_client(owner).post(
+        reverse("accounts:roles"), body, content_type="application/msgpack"
+    )
+
+    assert response.status_code == 201
+    assert response.json()["name"] == "cashier"
+
+
+def test_malformed_msgpack_is_a_bad_request(owner, api_client):
+    response = api_client(owner).post(
+        reverse("accounts:roles"), b"\xc1", content_type="application/msgpack"
+    )
+
+    assert response.status_code == 400
+
+
+def test_only_large_responses_are_compressed(settings, tenant, owner, api_client):
+    User.objects.bulk_create(
+        User(email=f"till{i}@harare.example.com", tenant=tenant) for i in range(30)
+    )
+    client = api_client(owner)
+    url = reverse("accounts:list_users")
+
+    large = client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+    settings.RESPONSE_COMPRESSION_MIN_SIZE = 100000
+    small = client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+
+    assert large["Content-Encoding"] == "gzip"
+    assert not small.has_header("Content-Encoding")
@@ -0,0 +1,88 @@
+from types import SimpleNamespace
+
+import pytest
+from celery import shared_task
+
+from utils import tracing
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+SPAN_ID = "00f067aa0ba902b7"
+
+
+@shared_task
+def current_traceparent():
+    return tracing.traceparent()
+
+
+@pytest.fixture
+def exported(settings, monkeypatch):
+    """Turn tracing on; yields the spans it would export."""
+    settings.TRACING_EXPORTER = "utils.tracing.ConsoleExporter"
+    settings.TRACING_SAMPLE_RATE = 1.0
+    spans = []
+    processor = SimpleNamespace(submit=spans.append)
+    monkeypatch.setattr(tracing, "_processor", lambda: processor)
+    return spans
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        (f"00-{TRACE_ID}-{SPAN_ID}-01", (TRACE_ID, SPAN_ID, True)),
+        (f"00-{TRACE_ID}-{SPAN_ID}-00", (TRACE_ID, SPAN_ID, False)),
+        (f"  00-{TRACE_ID}-{SPAN_ID}-03\n", (TRACE_ID, SPAN_ID, True)),
+        (f"00-{TRACE_ID.upper()}-{SPAN_ID}-01", (TRACE_ID.upper(), SPAN_ID, True)),
+    ],
+)
+def test_parse_valid(header, expected):
+    assert tracing.parse(header) == expected
+
+
+@pytest.mark.parametrize(
+    "header",
+    [
+        None,
+        "",
+        "garbage",
+        f"01-{TRACE_ID}-{SPAN_ID}-01",
+        f"00-{TRACE_ID}-{SPAN_ID}-01-extra",
+        f"00-{TRACE_ID[:-1]}-{SPAN_ID}-01",
+        f"00-{TRACE_ID}-{SPAN_ID}0-01",
+        f"00-{'0' * 32}-{SPAN_ID}-01",
+        f"00-{TRACE_ID}-{'0' * 16}-01",
+        f"00-{'g' * 32}-{SPAN_ID}-01",
+        f"00-{TRACE_ID}-{SPAN_ID}-zz",
+        42,
+    ],
+)
+def test_parse_invalid(header):
+    assert tracing.parse(header) is None
+
+
+def test_start_continues_a_valid_parent_and_ignores_a_bad_one(settings):
+    settings.TRACING_SAMPLE_RATE = 0.0
+
+    child = tracing.start("child", parent=f"00-{TRACE_ID}-{SPAN_ID}-01")
+    assert (child.trace_id, child.parent_id, child.sampled) == (
+        TRACE_ID,
+        SPAN_ID,
+        True,
+    )
+
+    root = tracing.start("root", parent="00-bad")
+    assert root.trace_id != TRACE_ID
+    assert root.parent_id is None
+
+
+def test_task_apply_keeps_the_trace_id(exported):
+    with tracing.span("request") as parent:
+        result = current_traceparent.apply(headers={tracing.HEADER: parent.traceparent})
+
+    trace_id, task_span_id, sampled = tracing.parse(result.get())
+    assert trace_id == parent.trace_id
+    assert sampled
+    task = next(item for item in exported if item.kind == "consumer")
+    assert task.span_id == task_span_id
+    assert task.parent_id == parent.span_id
+    assert task.attributes["celery.state"] == "SUCCESS"
+    assert tracing.current() is None
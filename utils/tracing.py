@@ -0,0 +1,356 @@
+import atexit
+import json
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from celery.signals import (
+    after_task_publish,
+    before_task_publish,
+    task_failure,
+    task_postrun,
+    task_prerun,
+)
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import DjangoTemplates
+from django.template.backends.django import Template as DjangoTemplate
+from django.utils.module_loading import import_string
+from loguru import logger
+
+HEADER = "traceparent"
+
+_current = ContextVar("tracing_span", default=None)
+_publishing = ContextVar("tracing_publish", default=None)
+_task = ContextVar("tracing_task", default=None)
+
+
+class Span:
+    """
+    One timed operation in a trace, shaped like an OpenTelemetry span.
+
+    Spans of unsampled traces are still created so the trace id and the
+    sampling decision propagate, but they are never exported.
+    """
+
+    __slots__ = (
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "sampled",
+        "name",
+        "kind",
+        "attributes",
+        "start",
+        "end",
+        "error",
+    )
+
+    def __init__(self, name, trace_id, parent_id, sampled, kind, attributes):
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes or {}
+        self.start = time.time_ns()
+        self.end = None
+        self.error = None
+
+    @property
+    def traceparent(self):
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def to_dict(self):
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_time_unix_nano": self.start,
+            "end_time_unix_nano": self.end,
+            "attributes": self.attributes,
+            "status": (
+                {"code": "ERROR", "message": self.error}
+                if self.error
+                else {"code": "OK"}
+            ),
+        }
+
+
+def parse(traceparent):
+    """``(trace_id, span_id, sampled)`` from a W3C traceparent, or None."""
+    try:
+        version, trace_id, span_id, flags = traceparent.strip().split("-")
+        int(trace_id, 16), int(span_id, 16)
+        sampled = bool(int(flags, 16) & 1)
+    except (AttributeError, ValueError):
+        return None
+    if version != "00" or len(trace_id) != 32 or len(span_id) != 16:
+        return None
+    if trace_id == "0" * 32 or span_id == "0" * 16:
+        return None
+    return trace_id, span_id, sampled
+
+
+def enabled():
+    return bool(settings.TRACING_EXPORTER)
+
+
+def current():
+    return _current.get()
+
+
+def traceparent():
+    """The current span's traceparent, or "" outside a trace."""
+    span = _current.get()
+    return span.traceparent if span else ""
+
+
+def recording():
+    """Whether spans started now would be exported."""
+    span = _current.get()
+    return span is not None and span.sampled
+
+
+def start(name, kind="internal", attributes=None, parent=None):
+    """
+    Start a span under ``parent`` (a traceparent string), the current
+    span, or as the root of a new trace sampled at
+    ``TRACING_SAMPLE_RATE``. Pair with ``finish()``.
+    """
+    context = parse(parent) if parent else None
+    if context:
+        trace_id, parent_id, sampled = context
+    elif (span := _current.get()) is not None:
+        trace_id, parent_id, sampled = span.trace_id, span.span_id, span.sampled
+    else:
+        trace_id = f"{random.getrandbits(128):032x}"
+        parent_id = None
+        sampled = random.random() < settings.TRACING_SAMPLE_RATE
+    return Span(name, trace_id, parent_id, sampled, kind, attributes)
+
+
+def finish(span, error=None):
+    span.end = time.time_ns()
+    if error is not None:
+        span.error = str(error) or type(error).__name__
+    if span.sampled and enabled():
+        _processor().submit(span)
+
+
+@contextmanager
+def span(name, kind="internal", attributes=None, parent=None):
+    """Run the block in a new span that is current while it runs."""
+    if not enabled():
+        yield None
+        return
+    new = start(name, kind, attributes, parent)
+    token = _current.set(new)
+    error = None
+    try:
+        yield new
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        _current.reset(token)
+        finish(new, error)
+
+
+def _trace_sql(execute, sql, params, many, context):
+    if not recording():
+        return execute(sql, params, many, context)
+    attributes = {
+        "db.system": context["connection"].vendor,
+        "db.statement": sql[: settings.TRACING_MAX_STATEMENT_LENGTH],
+    }
+    with span("db.query", "client", attributes):
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def trace_queries():
+    """Give each query run in the block a span, when the trace is sampled."""
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(_trace_sql))
+        yield
+
+
+class TracedTemplate(DjangoTemplate):
+    def render(self, context=None, request=None):
+        if not recording():
+            return super().render(context, request)
+        with span("template.render", attributes={"template": self.origin.name}):
+            return super().render(context, request)
+
+
+class TracedDjangoTemplates(DjangoTemplates):
+    """The Django template backend, with a span per render."""
+
+    def from_string(self, template_code):
+        return TracedTemplate(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return TracedTemplate(super().get_template(template_name).template, self)
+
+
+@before_task_publish.connect
+def _publish_start(sender=None, headers=None, **kwargs):
+    if not enabled() or headers is None:
+        return
+    # A traceparent already in the headers, e.g. from the outbox relay,
+    # wins over the publishing process's own context.
+    publish = start(
+        f"publish {sender}",
+        "producer",
+        {"messaging.destination": kwargs.get("routing_key")},
+        parent=headers.get(HEADER),
+    )
+    headers[HEADER] = publish.traceparent
+    _publishing.set(publish)
+
+
+@after_task_publish.connect
+def _publish_end(**kwargs):
+    publish = _publishing.get()
+    if publish is not None:
+        _publishing.set(None)
+        finish(publish)
+
+
+def _task_traceparent(request):
+    # Workers expose custom message headers as request attributes;
+    # task.apply() keeps them under request.headers.
+    return getattr(request, HEADER, None) or (request.headers or {}).get(HEADER)
+
+
+@task_prerun.connect
+def _task_start(task_id=None, task=None, **kwargs):
+    if not enabled():
+        return
+    run = start(
+        f"task {task.name}",
+        "consumer",
+        {"celery.task_id": task_id, "celery.retries": task.request.retries},
+        parent=_task_traceparent(task.request),
+    )
+    stack = ExitStack()
+    stack.enter_context(trace_queries())
+    _task.set((run, _current.set(run), stack))
+
+
+@task_failure.connect
+def _task_failed(exception=None, **kwargs):
+    state = _task.get()
+    if state is not None:
+        state[0].error = str(exception) or type(exception).__name__
+
+
+@task_postrun.connect
+def _task_end(state=None, **kwargs):
+    context = _task.get()
+    if context is None:
+        return
+    run, token, stack = context
+    _task.set(None)
+    stack.close()
+    _current.reset(token)
+    run.attributes["celery.state"] = state
+    finish(run)
+
+
+class ConsoleExporter:
+    """Write each span as a JSON line to stdout."""
+
+    def export(self, spans):
+        for item in spans:
+            sys.stdout.write(json.dumps(item.to_dict()) + "\n")
+        sys.stdout.flush()
+
+
+class FileExporter:
+    """Append each span as a JSON line to ``TRACING_FILE``."""
+
+    def __init__(self, path=None):
+        self.path = path or settings.TRACING_FILE
+
+    def export(self, spans):
+        with open(self.path, "a") as f:
+            for item in spans:
+                f.write(json.dumps(item.to_dict()) + "\n")
+
+
+class _Processor:
+    """
+    Hand finished spans to the exporter from a background thread, so
+    exporting never runs on the request or task. Spans are dropped, not
+    queued without bound, when the exporter falls behind.
+    """
+
+    def __init__(self, exporter):
+        self.exporter = exporter
+        self.queue = queue.Queue(settings.TRACING_MAX_QUEUE)
+        self.thread = threading.Thread(target=self._run, daemon=True, name="tracing")
+        self.thread.start()
+        atexit.register(self.flush)
+
+    def submit(self, item):
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            pass
+
+    def _drain(self, batch):
+        while len(batch) < 512:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _export(self, batch):
+        try:
+            self.exporter.export(batch)
+        except Exception as e:
+            logger.warning("Span export failed: {}", e)
+
+    def _run(self):
+        while True:
+            self._export(self._drain([self.queue.get()]))
+
+    def flush(self):
+        """Export whatever is still queued, e.g. at exit."""
+        while batch := self._drain([]):
+            self._export(batch)
+
+
+_lock = threading.Lock()
+_instance = None
+
+
+def _processor():
+    global _instance
+    if _instance is None:
+        with _lock:
+            if _instance is None:
+                _instance = _Processor(import_string(settings.TRACING_EXPORTER)())
+    return _instance
+
+
+def _reset():
+    # The export thread doesn't survive fork(), e.g. the celery prefork pool.
+    global _instance, _lock
+    _instance, _lock = None, threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset)